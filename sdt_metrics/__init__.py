@@ -1,4 +1,66 @@
 from .support import *
-from .plotting import *
 from ._sdt_metrics import *
-from ._sdt_metrics import _S
+from ._sdt_metrics import _S, _metric_names
+
+# Names that live in modules with heavy dependencies are imported the
+# first time they are looked up so "import sdt_metrics" stays cheap for
+# code that only needs the scalar metrics. plotting pulls in pylab,
+# matplotlib and scipy, the array containers pull in numpy.
+_lazy_attrs = {'plotting'               : '.plotting',
+               'poc_plot'               : '.plotting',
+               'roc_plot'               : '.plotting',
+               'mult_roc_plot'          : '.plotting',
+               'metric_validation_plot' : '.plotting',
+               'SDTBatch'               : '._batch',
+               'SDTAccumulator'         : '._streaming',
+               'threshold_sweep'        : '._roc',
+               'auc'                    : '._roc',
+               'metric_table'           : '._tables',
+               'metric_lookup'          : '._tables',
+               'clear_table_cache'      : '._tables',
+               'bootstrap_ci'           : '._bootstrap',
+               'SDTRatings'             : '._ratings',
+               'fit_uvsd'               : '._uvsd',
+               'UVSDFit'                : '._uvsd',
+               'ScoreSketch'            : '._sketch',
+               'metric_file'            : '._memmap',
+               'group_counts'           : '._groupby',
+               'compute'                : '._compute',
+               'SDTWindow'              : '._window',
+               'SDTDecay'               : '._decay',
+               'set_ztable'             : '._ztable',
+               'clear_ztable_cache'     : '._ztable'}
+
+__all__ = ['SDT', 'HI', 'MI', 'CR', 'FA', 'TP', 'TN', 'FN', 'FP',
+           'ltqnorm', 'Singleton'] + _metric_names + sorted(_lazy_attrs)
+
+def __getattr__(name):
+    if name in _lazy_attrs:
+        import importlib
+        module = importlib.import_module(_lazy_attrs[name], __name__)
+        if name == 'plotting':
+            return module
+        return getattr(module, name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attrs))
+
+import sys as _sys
+if _sys.version_info < (3, 7):
+    # module level __getattr__ (PEP 562) isn't available
+    from .plotting import *
+    from ._batch import SDTBatch
+    from ._streaming import SDTAccumulator
+    from ._roc import threshold_sweep, auc
+    from ._tables import metric_table, metric_lookup, clear_table_cache
+    from ._bootstrap import bootstrap_ci
+    from ._ratings import SDTRatings
+    from ._uvsd import fit_uvsd, UVSDFit
+    from ._sketch import ScoreSketch
+    from ._memmap import metric_file
+    from ._groupby import group_counts
+    from ._compute import compute
+    from ._window import SDTWindow
+    from ._decay import SDTDecay
+    from ._ztable import set_ztable, clear_ztable_cache
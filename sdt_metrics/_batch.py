@@ -0,0 +1,239 @@
+from __future__ import print_function
+from __future__ import division
+
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+import numpy as np
+
+from ._sdt_metrics import SDT, HI, MI, CR, FA, _strobj, \
+                          _add_metric_methods
+from . import _kernels
+
+class SDTBatch(object):
+    """
+    A compact container for many sets of signal detection data
+
+       Where SDT keeps the counts of one confusion matrix in a dict,
+       SDTBatch keeps the counts of N confusion matrices in a (4, N)
+       numpy array (self.data). Each row holds the HI, MI, CR, or FA
+       counts of every matrix and is contiguous in memory, so a batch
+       costs 32 bytes per matrix with the default int64 dtype.
+
+       Indexing with HI, MI, CR, or FA returns that row. Indexing with
+       an integer returns an SDT. Slices, boolean masks, and index
+       arrays return a new SDTBatch (slices share data with the original
+       batch, like numpy views).
+
+       The +, -, |, and & operators work like the SDT operators, one
+       matrix at a time. The other operand can be an SDTBatch of the
+       same length or a single SDT, which is broadcast.
+
+       Batches of weighted counts (see group_counts) carry the
+       effective sample size of every matrix in self.neff, which the
+       standard correction uses as N (see SDT.neff). Indexing keeps it,
+       the operators drop it.
+
+       Every metric is available as a method that returns an ndarray
+       (computed with the kernels in _kernels). Passing workers= or
+       executor= to a metric method evaluates it on a process pool and
+       threads= on a thread pool (see _parallel).
+    """
+    # (N,) effective sample sizes of weighted counts (or None)
+    neff = None
+
+    def __init__(self, iterable=None, dtype=None, **kwds):
+        """
+        SDTBatch(iterable) builds a batch from SDT objects (or any
+        mappings of event types to counts).
+
+        SDTBatch(HI=..., MI=..., CR=..., FA=...) builds a batch from
+        sequences of counts. Omitted event types are zero.
+
+        dtype defaults to int64 for integer counts and float64
+        otherwise.
+        """
+        for k in kwds:
+            if k not in [HI,MI,CR,FA]:
+                raise KeyError(k)
+
+        if iterable is not None:
+            if isinstance(iterable, SDTBatch):
+                rows = iterable.data
+            elif hasattr(iterable, '__iter__'):
+                rows = [[], [], [], []]
+                for sdt in iterable:
+                    for row, k in zip(rows, [HI,MI,CR,FA]):
+                        row.append(sdt.get(k, 0))
+            else:
+                raise TypeError("'%s' object is not iterable"
+                                % type(iterable).__name__)
+        else:
+            n = max([np.size(v) for v in kwds.values()] + [0])
+            rows = [np.broadcast_to(kwds.get(k, 0), (n,))
+                    for k in [HI,MI,CR,FA]]
+
+        if dtype is None:
+            dtype = np.result_type(np.int64, *[np.asarray(r) for r in rows
+                                               if len(r)])
+        self.data = np.array(rows, dtype=dtype, ndmin=2).reshape(4, -1)
+
+    @classmethod
+    def _fromdata(cls, data):
+        """wraps a (4, N) array without copying it"""
+        obj = cls.__new__(cls)
+        obj.data = data
+        return obj
+
+    @classmethod
+    def concatenate(cls, batches):
+        """
+        joins a sequence of SDTBatch objects end to end
+
+           The effective sample sizes of weighted batches are joined
+           too, so the batches must be all weighted or all unweighted.
+        """
+        batches = list(batches)
+        result = cls._fromdata(np.concatenate([b.data for b in batches],
+                                              axis=1))
+        weighted = [b.neff is not None for b in batches]
+        if all(weighted):
+            result.neff = np.concatenate(
+                [np.broadcast_to(b.neff, (len(b),)) for b in batches])
+        elif any(weighted):
+            raise ValueError('cannot concatenate weighted and unweighted '
+                             'batches')
+        return result
+
+    def keys(self):
+        """returns list of event types"""
+        return [HI,MI,CR,FA]
+
+    def items(self):
+        """returns list of event type count array pairs"""
+        return [(k,self[k]) for k in self.keys()]
+
+    def __len__(self):
+        return self.data.shape[1]
+
+    def __iter__(self):
+        """iterates over the matrices as SDT objects"""
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, key):
+        if isinstance(key, _strobj):
+            return self.data[self.keys().index(key)]
+        elif isinstance(key, (int, np.integer)):
+            sdt = SDT._fromcounts(*self.data[:, key].tolist())
+            if self.neff is not None:
+                sdt.neff = float(self.neff[key])
+            return sdt
+        obj = self._fromdata(self.data[:, key])
+        if self.neff is not None:
+            obj.neff = self.neff[key]
+        return obj
+
+    def __setitem__(self, key, value):
+        """``batch[HI] = counts`` replaces a row of counts"""
+        if key not in self.keys():
+            raise KeyError(key)
+        self.data[self.keys().index(key)] = value
+
+    def copy(self):
+        """Return a deep copy."""
+        obj = self._fromdata(self.data.copy())
+        if self.neff is not None:
+            obj.neff = self.neff.copy()
+        return obj
+
+    def __repr__(self):
+        if len(self) == 0:
+            return '%s()' % self.__class__.__name__
+        items = ', '.join(['%s=%s'%(k, np.array2string(v, separator=', ',
+                                                       threshold=6))
+                           for k,v in self.items()])
+        return '%s(%s)' % (self.__class__.__name__, items)
+
+    # Same semantics as the SDT operators, see SDT.__add__ etc.
+    def _other(self, other):
+        if isinstance(other, SDTBatch):
+            return other.data
+        if isinstance(other, SDT):
+            return np.array([[other[k]] for k in [HI,MI,CR,FA]])
+        return None
+
+    def __add__(self, other):
+        """Add counts, keeping only positive counts."""
+        data = self._other(other)
+        if data is None:
+            return NotImplemented
+        return self._fromdata(np.maximum(self.data + data, 0))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        """Subtract count, but keep only results with positive counts."""
+        data = self._other(other)
+        if data is None:
+            return NotImplemented
+        return self._fromdata(np.maximum(self.data - data, 0))
+
+    def __rsub__(self, other):
+        data = self._other(other)
+        if data is None:
+            return NotImplemented
+        return self._fromdata(np.maximum(data - self.data, 0))
+
+    def __or__(self, other):
+        """Union is the maximum of value in either of the inputs."""
+        data = self._other(other)
+        if data is None:
+            return NotImplemented
+        return self._fromdata(np.maximum(self.data, data))
+
+    __ror__ = __or__
+
+    def __and__(self, other):
+        """Intersection is the minimum of corresponding counts."""
+        data = self._other(other)
+        if data is None:
+            return NotImplemented
+        return self._fromdata(np.minimum(self.data, data))
+
+    __rand__ = __and__
+
+    def count(self):
+        """returns array with the count of events in each matrix"""
+        return self.data.sum(axis=0)
+
+    def p(self, elem):
+        """returns array with the probability of event type"""
+        if elem not in self.keys():
+            raise KeyError(elem)
+        return getattr(self._intermediates(), 'p' + elem)
+
+    def _intermediates(self):
+        x = _kernels._Intermediates(*self.data)
+        x.neff = self.neff
+        return x
+
+    def compute(self, metrics, output='dict'):
+        """
+        evaluates several metrics sharing their intermediate results,
+        see sdt_metrics.compute
+        """
+        from ._compute import compute
+        return compute(metrics, *self.data, output=output, neff=self.neff)
+
+def _batch_method(name):
+    def method(self, workers=None, executor=None, threads=None):
+        if (workers is None and executor is None and threads is None) or \
+           self.neff is not None:
+            # weighted batches are evaluated serially
+            return getattr(_kernels, name)(self._intermediates())
+        from . import _parallel
+        return _parallel._evaluate(name, self.data, workers, executor,
+                                   threads=threads)
+    return method
+
+_add_metric_methods(SDTBatch, _batch_method)
@@ -0,0 +1,209 @@
+from __future__ import print_function
+from __future__ import division
+
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+Bootstrap confidence intervals for the metrics
+
+   A 2x2 table has only four cells, so resampling the trials of a table
+   is the same as drawing new counts from a binomial (per class) or
+   multinomial (all trials) distribution. bootstrap_ci draws the counts
+   of every resample of every table as arrays and evaluates the metric
+   over all of them with the array kernels. Nothing is looped over in
+   Python except blocks of tables.
+"""
+
+import numpy as np
+
+from ._sdt_metrics import _metric_names
+from . import _kernels
+
+# number of resampled tables evaluated at a time (bounds the memory
+# used by bootstrap_ci)
+blocksize = 1 << 22
+
+_methods = ['percentile', 'bca']
+_samplings = ['binomial', 'multinomial']
+
+def _evaluate(name, hi, mi, cr, fa):
+    """
+    evaluates metric over count arrays. Tables without signal or noise
+    trials (which can come up when resampling) give nan instead of
+    raising.
+    """
+    undefined = (hi + mi == 0) | (cr + fa == 0)
+    if np.any(undefined):
+        hi = np.where(undefined, 1, hi)
+        cr = np.where(undefined, 1, cr)
+
+    with np.errstate(all='ignore'):
+        theta = getattr(_kernels, name)(
+                    _kernels._Intermediates.from_counts(hi, mi, cr, fa))
+    theta = np.array(np.broadcast_to(theta, hi.shape), dtype=np.float64)
+    theta[undefined] = np.nan
+    return theta
+
+def _resample(rng, counts, B, sampling):
+    """
+    returns (4, T, B) array of resampled counts. Each table's resamples
+    are drawn consecutively so numpy can reuse the sampler setup.
+    """
+    hi, mi, cr, fa = counts[:, :, None]
+    T = counts.shape[1]
+    if sampling == 'binomial':
+        # the number of signal and noise trials are fixed by design
+        P, N = hi + mi, cr + fa
+        H = rng.binomial(P, hi / P, size=(T, B))
+        F = rng.binomial(N, fa / N, size=(T, B))
+        return np.array([H, P - H, N - F, F])
+
+    n = counts.sum(axis=0)
+    pvals = (counts / n).T
+    return np.moveaxis(rng.multinomial(n[:, None], pvals[:, None, :],
+                                       size=(T, B)), -1, 0)
+
+def _acceleration(name, counts):
+    """
+    BCa acceleration from the jackknife. Leaving out one trial of a
+    given event type always gives the same table, so the jackknife only
+    needs four evaluations per table (weighted by the counts).
+    """
+    theta = np.empty(counts.shape)
+    for k in range(4):
+        loo = counts.copy()
+        loo[k] = np.maximum(loo[k] - 1, 0)
+        theta[k] = _evaluate(name, *loo)
+
+    w = np.where(np.isnan(theta), 0., counts)
+    theta = np.where(np.isnan(theta), 0., theta)
+    mean = _kernels._guarded_divide((w*theta).sum(axis=0), w.sum(axis=0))
+    d = mean - theta
+    return _kernels._guarded_divide((w*d**3).sum(axis=0),
+                                    6.*(w*d**2).sum(axis=0)**1.5)
+
+def _quantile(S, n, q):
+    """
+    linear interpolation quantiles of the rows of S (sorted, with the
+    n[i] valid values of row i first). q can differ by row.
+    """
+    rows = np.arange(S.shape[0])
+    last = np.maximum(n - 1, 0)
+    pos = q * last
+    lo = np.floor(pos).astype(np.intp)
+    hi = np.minimum(lo + 1, last)
+    frac = pos - lo
+    with np.errstate(invalid='ignore'):
+        result = S[rows, lo]*(1 - frac) + S[rows, hi]*frac
+    return np.where(n == 0, np.nan, result)
+
+def _interval(name, counts, rng, B, alpha, method, sampling):
+    """confidence limits for one block of tables"""
+    theta_hat = _evaluate(name, *counts)[:, None]
+    S = np.sort(_evaluate(name, *_resample(rng, counts, B, sampling)),
+                axis=1)
+    n = np.sum(~np.isnan(S), axis=1)
+
+    q = np.array([alpha/2., 1. - alpha/2.])
+    if method == 'percentile':
+        return [_quantile(S, n, qi) for qi in q]
+
+    # bias correction (ties count half) and acceleration
+    prop = (np.sum(S < theta_hat, axis=1) +
+            .5*np.sum(S == theta_hat, axis=1)) / np.maximum(n, 1)
+    prop = np.clip(prop, .5/np.maximum(n, 1), 1. - .5/np.maximum(n, 1))
+    z0 = _kernels.ltqnorm(prop)
+    a = _acceleration(name, counts)
+
+    limits = []
+    for qi, zq in zip(q, _kernels.ltqnorm(q)):
+        with np.errstate(all='ignore'):
+            adj = _kernels._ncdf(z0 + (z0 + zq)/(1. - a*(z0 + zq)))
+        limits.append(_quantile(S, n, np.where(np.isnan(adj), qi, adj)))
+    return limits
+
+def bootstrap_ci(metric, hi, mi, cr, fa, B=2000, alpha=.05,
+                 method='percentile', sampling='binomial',
+                 seed=None, threads=None):
+    """
+    Bootstrap confidence interval of a metric
+
+       args:
+          metric: metric name (e.g. 'dprime') or metric function
+
+          hi, mi, cr, fa: hit, miss, correct rejection, and false alarm
+                          counts. Sequences or arrays give one interval
+                          per table. Float counts must hold whole
+                          numbers (weighted counts can't be resampled).
+
+       kwds:
+          B: number of resamples per table
+
+          alpha: the interval covers 1-alpha
+
+          method: 'percentile' or 'bca' (bias corrected and
+                  accelerated, Efron 1987)
+
+          sampling: 'binomial' resamples the signal and noise trials
+                    separately (the number of each is fixed by design).
+                    'multinomial' resamples all of the trials.
+
+          seed: seed for numpy.random.default_rng. Results only depend
+                on the seed, not on threads.
+
+          threads: number of threads the blocks of tables are spread
+                   over (None evaluates them in the calling thread)
+
+       returns:
+          (lower, upper) limits. Floats for a single table, arrays
+          otherwise. Resamples where a metric is undefined (no signal
+          or no noise trials) are dropped.
+    """
+    name = getattr(metric, '__name__', metric)
+    if name not in _metric_names:
+        raise ValueError("unknown metric '%s'" % name)
+    if method not in _methods:
+        raise ValueError("method should be one of %s" % _methods)
+    if sampling not in _samplings:
+        raise ValueError("sampling should be one of %s" % _samplings)
+    if not 0 < alpha < 1:
+        raise ValueError('alpha should be between 0 and 1')
+
+    args = np.broadcast_arrays(*[np.asarray(v) for v in (hi, mi, cr, fa)])
+    shape = args[0].shape
+    counts = np.array([v.ravel() for v in args])
+    if counts.dtype.kind not in 'iu':
+        # resampling needs whole trials, casting would truncate
+        if counts.dtype.kind not in 'bf' or \
+           not np.all(np.isfinite(counts) & (counts == np.floor(counts))):
+            raise ValueError('counts must be integers')
+    if np.any(counts < 0):
+        raise ValueError('counts must be >= 0')
+    counts = counts.astype(np.int64)
+
+    # tables without signal or noise trials raise like the metrics do
+    if np.any(counts[0] + counts[1] == 0) or np.any(counts[2] + counts[3] == 0):
+        raise ZeroDivisionError('float division by zero')
+
+    T = counts.shape[1]
+    size = max(1, blocksize // B)
+    blocks = [slice(i, i + size) for i in range(0, T, size)]
+    rngs = [np.random.default_rng(s) for s in
+            np.random.SeedSequence(seed).spawn(len(blocks))]
+
+    def run(i):
+        return _interval(name, counts[:, blocks[i]], rngs[i],
+                         B, alpha, method, sampling)
+
+    if threads is None or threads <= 1 or len(blocks) == 1:
+        results = [run(i) for i in range(len(blocks))]
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(threads) as executor:
+            results = list(executor.map(run, range(len(blocks))))
+
+    lower = np.concatenate([r[0] for r in results]).reshape(shape)
+    upper = np.concatenate([r[1] for r in results]).reshape(shape)
+    if lower.ndim == 0:
+        return float(lower), float(upper)
+    return lower, upper
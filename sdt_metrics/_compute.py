@@ -0,0 +1,81 @@
+from __future__ import print_function
+from __future__ import division
+
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+Evaluation of several metrics over shared intermediates
+
+   Every kernel in _kernels reads its inputs from an _Intermediates
+   object, whose attributes (rates, corrected rates, z-scores,
+   marginal prevalences, ...) are computed on first use and cached.
+   compute() hands one _Intermediates to all of the requested kernels,
+   so dprime, beta, and c share one pair of z-scores, mcc and accuracy
+   share the rates, and so on.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+from ._tables import _metric_name
+from . import _kernels
+
+_outputs = ['dict', 'record']
+
+def compute(metrics, hi, mi, cr, fa, output='dict', neff=None):
+    """
+    evaluates several metrics from hit, miss, correct rejection, and
+    false alarm counts
+
+       args:
+          metrics: sequence of metric names (e.g. ['dprime', 'c']) or
+                   metric functions (e.g. sdt_metrics.dprime)
+
+          hi, mi, cr, fa: counts (numbers, sequences, or arrays that
+                          broadcast against each other)
+
+       kwds:
+          output: 'dict' returns an OrderedDict of metric name to
+                  result in the order requested (Python lists when the
+                  counts are Python numbers or sequences, like
+                  metric.direct). 'record' returns a numpy record array
+                  with one float64 field per metric.
+
+          neff: effective sample sizes of weighted counts, used as N by
+                the standard correction (see SDT.neff)
+
+       Each intermediate quantity is evaluated once no matter how many
+       of the metrics need it.
+    """
+    if output not in _outputs:
+        raise ValueError("output must be one of %s" % _outputs)
+
+    names = []
+    for metric in metrics:
+        name = _metric_name(metric)
+        if name not in names:
+            names.append(name)
+    if not names:
+        raise ValueError('need at least one metric')
+
+    args = (hi, mi, cr, fa)
+    x = _kernels._Intermediates.from_counts(*args)
+    if neff is not None:
+        x.neff = np.asarray(neff, dtype=np.float64)
+    shape = np.broadcast(x.hi, x.mi, x.cr, x.fa).shape
+
+    results = OrderedDict()
+    for name in names:
+        result = getattr(_kernels, name)(x)
+        results[name] = np.array(np.broadcast_to(result, shape),
+                                 dtype=np.float64)
+
+    if output == 'record':
+        return np.rec.fromarrays(list(results.values()),
+                                 names=names, shape=shape)
+
+    if _kernels._returns_list(args):
+        for name in names:
+            results[name] = results[name].tolist()
+    return results
@@ -0,0 +1,140 @@
+from __future__ import print_function
+from __future__ import division
+
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+import numpy as np
+
+from ._sdt_metrics import SDT, HI, MI, CR, FA, _add_metric_methods, \
+                          _snapshot_method
+from ._groupby import _cells
+
+class SDTDecay(object):
+    """
+    Exponentially time-decayed signal detection counts
+
+       Every event counts 2**(-age/half_life) where age is the time
+       since the event, so recent behavior dominates and no history has
+       to be kept. The float counts are stored as of self.time (the
+       newest time seen) and decay is applied lazily: counts_at(t) scales
+       them to any later time, and metrics are evaluated as of
+       self.time (use snapshot(t) for another time). Decay scales all
+       four counts by the same factor, so the rates (and most metrics)
+       do not depend on the time they are read at; only the standard
+       correction, which uses N, does.
+
+       Decayed counts from different workers merge with + or merge():
+       both are brought to the later of their two times and added.
+    """
+    def __init__(self, half_life, time=None):
+        if not half_life > 0:
+            raise ValueError('half_life must be > 0')
+        self.half_life = float(half_life)
+        self.time = time
+        self.counts = np.zeros(4, dtype=np.float64)
+
+    def _factor(self, age):
+        return np.exp2(-np.asarray(age, dtype=np.float64)/self.half_life)
+
+    def advance(self, t):
+        """
+        moves self.time forward to t, decaying the counts (t older
+        than self.time is a no-op)
+        """
+        if self.time is None:
+            self.time = t
+        elif t > self.time:
+            self.counts *= self._factor(t - self.time)
+            self.time = t
+
+    def update(self, y_true, y_pred, t):
+        """
+        adds events observed at time t (one time or one per event)
+
+           y_true and y_pred are boolean array-likes of the same length
+           (True for signal trials and "yes" responses). Events older
+           than self.time are added with their decay so far.
+        """
+        y_true = np.asarray(y_true, dtype=bool).ravel()
+        y_pred = np.asarray(y_pred, dtype=bool).ravel()
+        if y_true.shape != y_pred.shape:
+            raise ValueError('y_true and y_pred must have the same length')
+        t = np.asarray(t, dtype=np.float64)
+        if t.size:
+            self.advance(float(t.max()))
+        if len(y_true) == 0:
+            return
+
+        weights = np.broadcast_to(self._factor(self.time - t), y_true.shape)
+        self.counts += np.bincount(_cells(y_true, y_pred), weights=weights,
+                                   minlength=4)
+
+    def add_counts(self, counts, t):
+        """adds (HI, MI, CR, FA) counts observed at time t"""
+        counts = np.asarray(counts, dtype=np.float64).reshape(4)
+        self.advance(t)
+        self.counts += counts*self._factor(self.time - t)
+
+    def counts_at(self, t=None):
+        """returns the (HI, MI, CR, FA) counts decayed to time t"""
+        if t is None or self.time is None:
+            return self.counts.copy()
+        return self.counts*self._factor(t - self.time)
+
+    def _check(self, other):
+        if not isinstance(other, SDTDecay):
+            return False
+        if self.half_life != other.half_life:
+            raise ValueError('half lives must be the same')
+        return True
+
+    def __add__(self, other):
+        """Merge the counts of two decayed counters."""
+        if not self._check(other):
+            return NotImplemented
+        result = self.copy()
+        result += other
+        return result
+
+    def __iadd__(self, other):
+        if not self._check(other):
+            return NotImplemented
+        if other.time is not None:
+            self.add_counts(other.counts, other.time)
+        return self
+
+    @classmethod
+    def merge(cls, others):
+        """merges a sequence of decayed counters into a new one"""
+        others = list(others)
+        result = others[0].copy()
+        for other in others[1:]:
+            result += other
+        return result
+
+    def copy(self):
+        """Return a deep copy."""
+        result = SDTDecay(self.half_life, self.time)
+        result.counts[:] = self.counts
+        return result
+
+    def clear(self):
+        """resets the counts to zero"""
+        self.counts[:] = 0
+        self.time = None
+
+    def snapshot(self, t=None):
+        """returns the counts decayed to time t as an SDT"""
+        return SDT(list(zip([HI,MI,CR,FA], self.counts_at(t).tolist())))
+
+    def count(self):
+        """returns the decayed count of events"""
+        return float(self.counts.sum())
+
+    def __repr__(self):
+        items = ', '.join(['%s=%g'%(k,v) for k,v in
+                           zip([HI,MI,CR,FA], self.counts.tolist())])
+        return '%s(half_life=%g, time=%r, %s)' % (
+            self.__class__.__name__, self.half_life, self.time, items)
+
+_add_metric_methods(SDTDecay, _snapshot_method)
@@ -0,0 +1,131 @@
+from __future__ import print_function
+from __future__ import division
+
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+Group-by aggregation of trial data into per-group counts
+
+   group_counts turns trial level arrays (group keys, whether the
+   signal was present, and whether the observer said "yes") into one
+   SDTBatch with a confusion matrix per group. Every trial is coded as
+   4*group + cell and the codes are counted with a single np.bincount,
+   so the cost is one pass over the trials no matter how many groups
+   there are.
+"""
+
+import numpy as np
+
+from ._batch import SDTBatch
+
+# number of trials coded at a time, bounds the temporary code arrays
+chunksize = 1 << 22
+
+def _cells(y_true, y_pred):
+    """0, 1, 2, 3 for HI, MI, CR, FA trials"""
+    return 2*(~y_true) + (y_true != y_pred)
+
+def _group_codes(groups, ngroups):
+    """returns (keys, codes, ngroups) for one or more key arrays"""
+    if isinstance(groups, tuple):
+        if len(groups) == 0:
+            raise ValueError('need at least one group key')
+        uniques, inverses = zip(*[np.unique(np.asarray(g).ravel(),
+                                            return_inverse=True)
+                                  for g in groups])
+        dims = [len(u) for u in uniques]
+        combined = np.ravel_multi_index(inverses, dims)
+
+        # keep only the combinations that occur
+        occupied, codes = np.unique(combined, return_inverse=True)
+        index = np.unravel_index(occupied, dims)
+        keys = tuple(u[i] for u, i in zip(uniques, index))
+        return keys, codes.ravel(), len(occupied)
+
+    groups = np.asarray(groups).ravel()
+    if ngroups is None:
+        keys, codes = np.unique(groups, return_inverse=True)
+        return keys, codes.ravel(), len(keys)
+
+    # groups are already codes 0, 1, ..., ngroups-1
+    if groups.dtype.kind not in 'iub':
+        raise TypeError('groups must be integers when ngroups is given')
+    if len(groups) and (groups.min() < 0 or groups.max() >= ngroups):
+        raise ValueError('groups must be in range(ngroups)')
+    return np.arange(ngroups), groups, ngroups
+
+def group_counts(groups, y_true, y_pred, ngroups=None, weights=None):
+    """
+    counts hits, misses, correct rejections, and false alarms by group
+
+       args:
+          groups: group key of every trial. Either an array of keys of
+                  any sortable dtype or a tuple of such arrays (e.g.
+                  (subject, condition)) that together define a group.
+
+          y_true: True (or 1) for signal trials
+
+          y_pred: True (or 1) for "yes" responses
+
+       kwds:
+          ngroups: when given, groups must be integer codes in
+                   range(ngroups) and are used as they are. This skips
+                   sorting the keys and returns a matrix for every code,
+                   including codes without trials.
+
+          weights: weight of every trial (e.g. importance weights).
+                   The counts become float sums of weights and
+                   batch.neff holds the effective sample size
+                   sum(w)**2/sum(w**2) of every group, which the
+                   standard correction uses as N.
+
+       returns:
+          keys: the sorted distinct keys (a tuple of arrays for a tuple
+                of key arrays, with one entry per combination that
+                occurs)
+
+          batch: SDTBatch where batch[i] holds the counts of keys[i],
+                 so batch.dprime() etc. evaluate every group at once
+
+       Trials are coded and counted chunksize at a time with
+       np.bincount, so memory stays bounded for very long inputs.
+    """
+    y_true = np.asarray(y_true, dtype=bool).ravel()
+    y_pred = np.asarray(y_pred, dtype=bool).ravel()
+    if y_true.shape != y_pred.shape:
+        raise ValueError('y_true and y_pred must have the same shape')
+
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64).ravel()
+        if weights.shape != y_true.shape:
+            raise ValueError('weights and y_true must have the same length')
+
+    keys, codes, ngroups = _group_codes(groups, ngroups)
+    if codes.shape != y_true.shape:
+        raise ValueError('groups and y_true must have the same length')
+
+    if weights is None:
+        counts = np.zeros(4*ngroups, dtype=np.int64)
+    else:
+        counts = np.zeros(4*ngroups, dtype=np.float64)
+        sumsq = np.zeros(ngroups, dtype=np.float64)
+
+    for i in range(0, len(codes), chunksize):
+        j = i + chunksize
+        c = codes[i:j].astype(np.int64)
+        if weights is not None:
+            w = weights[i:j]
+            sumsq += np.bincount(c, weights=w*w, minlength=ngroups)
+        else:
+            w = None
+        c *= 4
+        c += _cells(y_true[i:j], y_pred[i:j])
+        counts += np.bincount(c, weights=w, minlength=4*ngroups)
+
+    batch = SDTBatch._fromdata(
+                np.ascontiguousarray(counts.reshape(ngroups, 4).T))
+    if weights is not None:
+        total = batch.data.sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            batch.neff = np.where(sumsq > 0, total*total/sumsq, 0.)
+    return keys, batch
@@ -0,0 +1,566 @@
+from __future__ import print_function
+from __future__ import division
+
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+Array implementations of the SDT metrics
+
+   The _vmethod objects in _sdt_metrics route sequences and numpy arrays
+   here instead of looping over the scalar SDT methods. Every kernel
+   mirrors its scalar counterpart operation for operation (including the
+   order of floating point operations, _correction, and the dem == 0
+   guards) so the two paths agree. Metrics built only from arithmetic
+   and sqrt are bit-identical to the scalar path. Metrics that go
+   through log or exp (dprime, beta, c, the loglinear family, and
+   mutual_info) can differ in the last ulp because numpy and the math
+   module use different libm implementations.
+
+   Kernels take an _Intermediates object instead of raw arrays. Rates,
+   corrected rates, and z-scores are computed the first time a kernel
+   asks for them and are cached on the object.
+"""
+
+import numpy as np
+
+from ._sdt_metrics import _ltqnorm_a, _ltqnorm_b, _ltqnorm_c, _ltqnorm_d, \
+                          _ltqnorm_plow, _ltqnorm_phigh
+
+##
+## Support Functions
+##
+
+class _lazyattr(object):
+    """
+    Non-data descriptor that computes an attribute on first access
+    and then caches it on the instance.
+    """
+    def __init__(self, func):
+        self.func = func
+        self.__name__ = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self
+        value = obj.__dict__[self.__name__] = self.func(obj)
+        return value
+
+def _divide(num, dem):
+    """num/dem, raising ZeroDivisionError like the scalar path does"""
+    if np.any(dem == 0):
+        raise ZeroDivisionError('float division by zero')
+    return num / dem
+
+def _guarded_divide(num, dem, fill=0.):
+    """num/dem with fill wherever dem == 0 (mirrors the scalar guards)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(dem == 0, fill, num / dem)
+
+def _correction(v, N):
+    """protects input to ltqnorm (array version of _correction)"""
+    v = np.asarray(v, dtype=np.float64)
+    if np.all((0 < v) & (v < 1)):
+        return v
+    elif N is None or not np.all((0 <= v) & (v <= 1)):
+        raise ValueError('v should be >= 0 and <= 1')
+
+    # at this point we know the out of bound values are all 0 or 1
+    # and N is not None (fractional N below 1 is taken to be 1)
+    N = np.maximum(N, 1)
+    with np.errstate(divide='ignore'):
+        return np.where(v == 0, 1/(2*N), np.where(v == 1, 1-1/(2*N), v))
+
+def _horner(coeffs, x, out, tail=None):
+    """
+    evaluates (((coeffs[0]*x + coeffs[1])*x + ... + coeffs[-1])
+    in place in out. If tail is given the result is once more multiplied
+    by x and tail is added (the "+1" terms in the ltqnorm denominators).
+    """
+    np.multiply(x, coeffs[0], out=out)
+    for k in coeffs[1:-1]:
+        out += k
+        out *= x
+    out += coeffs[-1]
+    if tail is not None:
+        out *= x
+        out += tail
+    return out
+
+def ltqnorm(p, out=None, refine=False):
+    """
+    Array version of ltqnorm with ufunc semantics
+
+       p can be any array-like. The rational approximation for the
+       central region is evaluated over the whole array with in-place
+       arithmetic. The lower and upper tail regions are then evaluated
+       on masked subsets of p and scattered into the result. Results are
+       bit-identical to the scalar ltqnorm.
+
+       Like scipy.stats.norm.ppf and unlike the scalar ltqnorm, invalid
+       input does not raise: p == 0 gives -inf, p == 1 gives inf, and
+       p outside [0,1] (or nan) gives nan.
+
+       kwds:
+          out: float64 array the result is written to. out may be p
+               itself to transform p in place.
+
+          refine: apply one step of Halley's rational method. This
+                  takes the relative error from 1.15e-9 down to about
+                  machine precision. It needs an erfc; scipy.special is
+                  used when it is importable.
+    """
+    p = np.asarray(p, dtype=np.float64)
+    if out is None:
+        out = np.empty(p.shape)
+    else:
+        # a narrower out would silently lose precision
+        if not isinstance(out, np.ndarray) or out.dtype != np.float64:
+            raise TypeError('out must be a float64 array, not %s'
+                            % getattr(out, 'dtype', type(out).__name__))
+        if out.shape != p.shape:
+            p = np.broadcast_to(p, out.shape)
+
+    # everything that needs p is gathered before anything is written
+    # to out because out may be p
+    lower = p < _ltqnorm_plow
+    upper = _ltqnorm_phigh < p
+    p_lower, p_upper = p[lower], p[upper]
+    special = []
+    if not np.all((0 < p) & (p < 1)):
+        special = [(p == 0, -np.inf), (p == 1, np.inf),
+                   (~((0 <= p) & (p <= 1)), np.nan)]
+    if refine and np.may_share_memory(p, out):
+        p = p.copy()
+
+    a,b,c,d = _ltqnorm_a,_ltqnorm_b,_ltqnorm_c,_ltqnorm_d
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Rational approximation for central region (over everything):
+        q = p - 0.5
+        r = q*q
+        dem = _horner(b, r, np.empty(p.shape), tail=1)
+        _horner(a, r, out)
+        out *= q
+        out /= dem
+        del q, r, dem
+
+        # Rational approximation for lower region:
+        if p_lower.size:
+            q = np.sqrt(-2*np.log(p_lower))
+            out[lower] = (((((c[0]*q+c[1])*q+c[2])*q+c[3])*q+c[4])*q+c[5]) / \
+                          ((((d[0]*q+d[1])*q+d[2])*q+d[3])*q+1)
+
+        # Rational approximation for upper region:
+        if p_upper.size:
+            q = np.sqrt(-2*np.log(1-p_upper))
+            out[upper] = -(((((c[0]*q+c[1])*q+c[2])*q+c[3])*q+c[4])*q+c[5]) / \
+                           ((((d[0]*q+d[1])*q+d[2])*q+d[3])*q+1)
+
+        if refine:
+            _halley(out, p, out)
+
+    for mask, v in special:
+        out[mask] = v
+
+    return out
+
+def _erfc(x):
+    """complementary error function (scipy.special.erfc if available)"""
+    try:
+        from scipy.special import erfc
+    except ImportError:
+        import math
+        erfc = np.vectorize(math.erfc, otypes=[np.float64])
+    return erfc(x)
+
+def _halley(x, p, out):
+    """
+    one step of Halley's rational method (third order) applied to x
+    (array version of the refinement step in _sdt_metrics.ltqnorm)
+    """
+    e = 0.5 * _erfc(-x/np.sqrt(2)) - p
+    u = e * np.sqrt(2*np.pi) * np.exp(x*x/2)
+    np.subtract(x, u/(1 + x*u/2), out=out)
+    return out
+
+def _npdf(z):
+    """standard normal density"""
+    return np.exp(-z*z/2)/np.sqrt(2*np.pi)
+
+def _ncdf(z):
+    """standard normal cdf"""
+    return .5*_erfc(-z/np.sqrt(2))
+
+def _flip(pHI, pFA):
+    """
+    reflects points below the diagonal (pFA > pHI) about the minor
+    diagonal. This is the array equivalent of the recursion used by
+    _aprime, _amzs, _bmz, and _bph.
+    """
+    flip = pFA > pHI
+    return flip, np.where(flip, 1-pHI, pHI), np.where(flip, 1-pFA, pFA)
+
+class _Intermediates(object):
+    """
+    Lazily evaluated quantities shared by the metric kernels
+
+       Built from hit, miss, correct rejection, and false alarm counts
+       (from_counts) or from hit and false alarm rates (from_probs).
+       In the latter case the count attributes are None and N is None
+       so _correction raises on rates of 0 or 1 (see Gotcha 1 in
+       _sdt_metrics).
+    """
+    # effective sample size of weighted counts, used by the standard
+    # correction in place of N when set (see SDT.neff)
+    neff = None
+
+    def __init__(self, hi=None, mi=None, cr=None, fa=None):
+        self.hi, self.mi, self.cr, self.fa = hi, mi, cr, fa
+        self._directmode = hi is not None
+
+    @classmethod
+    def from_counts(cls, hi, mi, cr, fa):
+        return cls(*[np.asarray(v) for v in (hi, mi, cr, fa)])
+
+    @classmethod
+    def from_probs(cls, pHI, pFA):
+        obj = cls()
+        obj.pHI = np.asarray(pHI, dtype=np.float64)
+        obj.pFA = np.asarray(pFA, dtype=np.float64)
+        return obj
+
+    @_lazyattr
+    def nSignal(self):
+        return self.hi + self.mi
+
+    @_lazyattr
+    def nNoise(self):
+        return self.cr + self.fa
+
+    @_lazyattr
+    def pHI(self):
+        return _divide(self.hi, self.nSignal)
+
+    @_lazyattr
+    def pMI(self):
+        if self._directmode:
+            return _divide(self.mi, self.nSignal)
+        return 1-self.pHI
+
+    @_lazyattr
+    def pCR(self):
+        if self._directmode:
+            return _divide(self.cr, self.nNoise)
+        return 1-self.pFA
+
+    @_lazyattr
+    def pFA(self):
+        return _divide(self.fa, self.nNoise)
+
+    @_lazyattr
+    def N(self):
+        if self._directmode:
+            return self.hi + self.mi + self.cr + self.fa
+        return None
+
+    @_lazyattr
+    def correction_N(self):
+        if self.neff is not None:
+            return self.neff
+        return self.N
+
+    # marginal prevalences of the stimulus classes and the responses
+
+    @_lazyattr
+    def pSignal(self):
+        return _divide(self.nSignal, self.N)
+
+    @_lazyattr
+    def pNoise(self):
+        return _divide(self.nNoise, self.N)
+
+    @_lazyattr
+    def pYes(self):
+        return _divide(self.hi + self.fa, self.N)
+
+    @_lazyattr
+    def pNo(self):
+        return _divide(self.cr + self.mi, self.N)
+
+    @_lazyattr
+    def corrected_pHI(self):
+        return _correction(self.pHI, self.correction_N)
+
+    @_lazyattr
+    def corrected_pFA(self):
+        return _correction(self.pFA, self.correction_N)
+
+    def _zlookup(self, elem, correction):
+        """z-scores of the HI or FA rate from _ztable (or None)"""
+        from . import _ztable
+        if not (_ztable.enabled and self._directmode):
+            return None
+        if elem == 'HI':
+            return _ztable.lookup(self.hi, self.nSignal, correction,
+                                  self.correction_N)
+        return _ztable.lookup(self.fa, self.nNoise, correction,
+                              self.correction_N)
+
+    @_lazyattr
+    def zHI(self):
+        z = self._zlookup('HI', 'standard')
+        if z is None:
+            z = ltqnorm(self.corrected_pHI)
+        return z
+
+    @_lazyattr
+    def zFA(self):
+        z = self._zlookup('FA', 'standard')
+        if z is None:
+            z = ltqnorm(self.corrected_pFA)
+        return z
+
+    @_lazyattr
+    def zHI_var(self):
+        h = self.corrected_pHI
+        return h*(1-h)/(self.nSignal*_npdf(self.zHI)*_npdf(self.zHI))
+
+    @_lazyattr
+    def zFA_var(self):
+        f = self.corrected_pFA
+        return f*(1-f)/(self.nNoise*_npdf(self.zFA)*_npdf(self.zFA))
+
+    @_lazyattr
+    def loglinear_pHI(self):
+        return (self.hi + 0.5)/(self.nSignal + 1)
+
+    @_lazyattr
+    def loglinear_pFA(self):
+        return (self.fa + 0.5)/(self.nNoise + 1)
+
+    @_lazyattr
+    def loglinear_zHI(self):
+        z = self._zlookup('HI', 'loglinear')
+        if z is None:
+            z = ltqnorm(self.loglinear_pHI)
+        return z
+
+    @_lazyattr
+    def loglinear_zFA(self):
+        z = self._zlookup('FA', 'loglinear')
+        if z is None:
+            z = ltqnorm(self.loglinear_pFA)
+        return z
+
+##
+## Metric kernels (same names and formulas as the SDT methods)
+##
+
+def aprime(x):
+    flip, h, f = _flip(x.pHI, x.pFA)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        a = .5 + (h - f)*(1 + h - f)/(4*h*(1 - f))
+    a = np.where((h == 0) | (f == 1), .5, a)
+    return np.where(flip, 1 - a, a)
+
+def amzs(x):
+    pHI, pFA = x.pHI, x.pFA
+    boundary = ((pHI == 0) & (pFA == 0)) | ((pHI == 1) & (pFA == 1))
+    flip, h, f = _flip(pHI, pFA)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        upper_left = .75 + (h-f)/4 - f*(1-h)
+        above = np.where(h == 0, (3 + h - f)/4,
+                                 (3 + h - f - f/h)/4)
+        below = np.where(f == 1, (3 + h - f)/4,
+                                 (3 + h - f - (1-h)/(1-f))/4)
+    a = np.where((f <= .5) & (.5 <= h), upper_left,
+                 np.where(h <= (1-f), above, below))
+    a = np.where(flip, 1 - a, a)
+    return np.where(boundary, .5, a)
+
+def bpp(x):
+    pHI, pFA = x.pHI, x.pFA
+    vHI, vFA = pHI*(1-pHI), pFA*(1-pFA)
+    ge = pHI >= pFA
+    num = np.where(ge, vHI - vFA, vFA - vHI)
+    dem = np.where(ge, vHI + vFA, vFA + vHI)
+    return _guarded_divide(num, dem, 0.)
+
+def bph(x):
+    flip, h, f = _flip(x.pHI, x.pFA)
+    upper = h <= 1 - f
+    vHI, vFA = h*(1-h), f*(1-f)
+    num = np.where(upper, vFA, vHI)
+    dem = np.where(upper, vHI, vFA)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = num/dem
+    return np.where(upper, np.where(dem == 0,  1., 1. - ratio),
+                           np.where(dem == 0, -1., ratio - 1.))
+
+def bppd(x):
+    pHI, pFA = x.pHI, x.pFA
+    num = ((1.-pHI)*(1.-pFA)-pHI*pFA)
+    dem = ((1.-pHI)*(1.-pFA)+pHI*pFA)
+    return _guarded_divide(num, dem, 0.)
+
+def loglinear_bppd(x):
+    pHI, pFA = x.loglinear_pHI, x.loglinear_pFA
+    num = ((1.-pHI)*(1.-pFA)-pHI*pFA)
+    dem = ((1.-pHI)*(1.-pFA)+pHI*pFA)
+    return num / dem
+
+def bmz(x):
+    flip, h, f = _flip(x.pHI, x.pFA)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        upper_left = (5-4*h)/(1+4*f)
+        lower_left = (h*h+h)/(h*h+f)
+        upper_right = ((1-f)*(1-f)+(1-h))/((1-f)*(1-f)+(1-f))
+    return np.select([(f <= .5) & (.5 <= h),
+                      (f < h) & (h < .5),
+                      (.5 < f) & (f < h)],
+                     [upper_left, lower_left, upper_right], 1.)
+
+def b(x):
+    return 0.5*x.pHI + 0.5*x.pFA
+
+def dprime(x):
+    return x.zHI - x.zFA
+
+def loglinear_dprime(x):
+    return x.loglinear_zHI - x.loglinear_zFA
+
+def beta(x):
+    zhr, zfar = x.zHI, x.zFA
+    return np.exp(-zhr*zhr/2 + zfar*zfar/2)
+
+def loglinear_beta(x):
+    zhr, zfar = x.loglinear_zHI, x.loglinear_zFA
+    return np.exp(-zhr*zhr/2 + zfar*zfar/2)
+
+def c(x):
+    return -1.*(.5*x.zHI + .5*x.zFA)
+
+def loglinear_c(x):
+    return -1.*(.5*x.loglinear_zHI + .5*x.loglinear_zFA)
+
+def accuracy(x):
+    return (1.+x.pHI-x.pFA)/2.
+
+def mcc(x):
+    pHI,pFA,pCR,pMI = x.pHI,x.pFA,x.pCR,x.pMI
+    num = pHI * pCR - pFA * pMI
+    dem = np.sqrt((pHI + pFA)*( pHI + pMI )*( pCR + pFA )*( pCR + pMI ))
+    return _guarded_divide(num, dem, 0.)
+
+# HI,MI,CR,FA = TP,TN,FN,FP (see the module level declaration in _sdt_metrics)
+
+def ppv(x):
+    return _guarded_divide(x.hi, x.hi + x.fa)
+
+def npv(x):
+    return _guarded_divide(x.mi, x.mi + x.cr)
+
+def fdr(x):
+    return _guarded_divide(x.fa, x.fa + x.hi)
+
+def sensitivity(x):
+    return _guarded_divide(x.hi, x.hi + x.cr)
+
+def specificity(x):
+    return _guarded_divide(x.mi, x.mi + x.fa)
+
+precision = ppv
+recall = sensitivity
+
+def f1(x):
+    precision,recall = ppv(x),sensitivity(x)
+    num = (2. * precision * recall)
+    dem = (precision + recall)
+    return _guarded_divide(num, dem, 0.)
+
+def mutual_info(x):
+    py  = [x.pNoise, x.pSignal]
+    pyh = [x.pNo, x.pYes]
+    hi, mi, cr, fa, N = x.hi, x.mi, x.cr, x.fa, x.N
+    pjoint = [[cr/N, mi/N],
+              [fa/N, hi/N]]
+
+    info = 0.
+    for i,j in zip([0,0,1,1], [0,1,0,1]):
+        pij = pjoint[i][j]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            term = pij * np.log(pij / (pyh[i]*py[j]))
+        info = info + np.where(pij != 0, term, 0.)
+    return info
+
+##
+## Delta method variances (see _variances in _sdt_metrics)
+##
+
+def dprime_var(x):
+    return x.zHI_var + x.zFA_var
+
+def c_var(x):
+    return (x.zHI_var + x.zFA_var)/4
+
+def beta_var(x):
+    zh, zf = x.zHI, x.zFA
+    b = beta(x)
+    return b*b*(zh*zh*x.zHI_var + zf*zf*x.zFA_var)
+
+def aprime_var(x):
+    pHI, pFA = x.pHI, x.pFA
+    flip, h, f = _flip(pHI, pFA)
+    d = h - f
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gh = ((1 + 2*d)*h - d*(1 + d))/(4*h*h*(1 - f))
+        gf = (d*(1 + d) - (1 + 2*d)*(1 - f))/(4*h*(1 - f)*(1 - f))
+    edge = (h == 0) | (f == 1)
+    gh, gf = np.where(edge, 0., gh), np.where(edge, 0., gf)
+    return gh*gh*pHI*(1-pHI)/x.nSignal + gf*gf*pFA*(1-pFA)/x.nNoise
+
+##
+## Entry points used by _vmethod
+##
+
+def _returns_list(args):
+    """
+    Sequences of Python numbers get Python lists back (what the old
+    per-element loop returned). Anything else gets an ndarray.
+    """
+    return all(isinstance(arg, (list, tuple)) or np.isscalar(arg)
+               for arg in args)
+
+def direct(metric, hi, mi, cr, fa):
+    """evaluates metric from hit, miss, correct rejection, and false alarm counts"""
+    args = (hi, mi, cr, fa)
+    result = globals()[metric](_Intermediates.from_counts(*args))
+    if _returns_list(args):
+        return result.tolist()
+    return result
+
+def var(metric, hi, mi, cr, fa):
+    """delta method variance of metric from counts"""
+    args = (hi, mi, cr, fa)
+    result = globals()[metric + '_var'](_Intermediates.from_counts(*args))
+    if _returns_list(args):
+        return result.tolist()
+    return result
+
+def se(metric, hi, mi, cr, fa):
+    """delta method standard error of metric from counts"""
+    args = (hi, mi, cr, fa)
+    result = np.sqrt(globals()[metric + '_var'](
+                         _Intermediates.from_counts(*args)))
+    if _returns_list(args):
+        return result.tolist()
+    return result
+
+def prob(metric, pHI, pFA):
+    """evaluates metric from hit and false alarm rates"""
+    args = (pHI, pFA)
+    result = globals()[metric](_Intermediates.from_probs(*args))
+    if _returns_list(args):
+        return result.tolist()
+    return result
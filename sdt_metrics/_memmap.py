@@ -0,0 +1,98 @@
+from __future__ import print_function
+from __future__ import division
+
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+Out-of-core evaluation of metrics over memory-mapped count arrays
+
+   metric_file reads a (4, ...) array of HI, MI, CR, and FA counts
+   (the layout of SDTBatch.data) from a .npy file or np.memmap a chunk
+   at a time and writes the metric into an output array, which can
+   itself be a .npy file opened as a memmap. Only one chunk of counts
+   and its kernel temporaries are in memory at any time, so peak memory
+   depends on chunksize and not on the size of the file.
+"""
+
+import numpy as np
+
+from ._tables import _metric_name
+from . import _kernels, _parallel
+
+# default number of tables read per chunk (32 MB of int64 counts)
+blocksize = 1 << 20
+
+def _open(source):
+    """opens a path as a read-only memmap, passes arrays through"""
+    if isinstance(source, (str, bytes)) or hasattr(source, '__fspath__'):
+        return np.load(source, mmap_mode='r')
+    return np.asanyarray(source)
+
+def metric_file(metric, counts, out=None, chunksize=None, threads=None):
+    """
+    evaluates a metric over a count array too large to load at once
+
+       args:
+          metric: metric name (e.g. 'dprime') or metric function
+                  (e.g. sdt_metrics.dprime)
+
+          counts: path to a .npy file or an array (typically a
+                  np.memmap) with shape (4, ...) holding the HI, MI,
+                  CR, and FA counts. The file is memory-mapped
+                  read-only and must be C-contiguous.
+
+       kwds:
+          out: path of a .npy file to create, or a float64 array with
+               the shape counts.shape[1:] to fill. Defaults to a new
+               in-memory array.
+
+          chunksize: number of tables evaluated at a time (defaults to
+                     the module level blocksize)
+
+          threads: evaluate each chunk on this many threads (see
+                   _parallel.direct)
+
+       returns:
+          out (a read-write memmap when out is a path)
+    """
+    name = _metric_name(metric)
+    if chunksize is None:
+        chunksize = blocksize
+    if chunksize < 1:
+        raise ValueError('chunksize must be >= 1')
+
+    data = _open(counts)
+    if data.ndim < 1 or data.shape[0] != 4:
+        raise ValueError('counts must have shape (4, ...)')
+    if not data.flags.c_contiguous:
+        # reshaping would copy the whole array into memory
+        raise ValueError('counts must be C-contiguous')
+    shape = data.shape[1:]
+    flat = data.reshape(4, -1)
+    n = flat.shape[1]
+
+    if out is None:
+        out = np.empty(shape, dtype=np.float64)
+    elif isinstance(out, (str, bytes)) or hasattr(out, '__fspath__'):
+        out = np.lib.format.open_memmap(out, mode='w+', dtype=np.float64,
+                                        shape=shape)
+    elif out.shape != shape:
+        raise ValueError('out must have shape %s' % (shape,))
+    elif not out.flags.c_contiguous:
+        raise ValueError('out must be C-contiguous')
+    result = out.reshape(-1)
+
+    for i in range(0, n, chunksize):
+        j = min(i + chunksize, n)
+        # np.array reads just this chunk of each row off the disk
+        block = np.array(flat[:, i:j])
+        if threads is None:
+            result[i:j] = getattr(_kernels, name)(
+                              _kernels._Intermediates(*block))
+        else:
+            result[i:j] = _parallel._evaluate(name, block, threads=threads)
+        del block
+
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out
@@ -0,0 +1,216 @@
+from __future__ import print_function
+from __future__ import division
+
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+Parallel evaluation of the metric kernels
+
+   direct() splits a batch of count arrays into chunks and evaluates
+   them on a process pool. The counts are copied once into a shared
+   memory block and the workers write their results into a second
+   block, so only the block names and chunk bounds are pickled.
+
+   With threads= (or a ThreadPoolExecutor) the chunks are evaluated on
+   a thread pool instead. The kernels spend nearly all of their time in
+   numpy ufuncs, which release the GIL, so threads scale without the
+   start up and copying costs of processes (and without forking). Each
+   thread walks its chunk in tiles of tilesize tables, so the inputs
+   and temporaries of a tile stay in cache.
+"""
+
+import numpy as np
+
+from ._sdt_metrics import _metric_names
+from . import _kernels
+
+# smallest number of tables worth sending to a worker
+minchunk = 1 << 16
+
+# tables per tile on the thread pool. The kernels make a dozen or so
+# float64 temporaries per table, so 8192 tables keep a tile within a
+# typical 1 MB L2 cache
+tilesize = 1 << 13
+
+def _chunks(n, workers, chunksize):
+    """(start, stop) bounds covering range(n)"""
+    if chunksize is None:
+        # a few chunks per worker evens out the load
+        chunksize = max(minchunk, -(-n // (4*workers)))
+    return [(i, min(i + chunksize, n)) for i in range(0, n, chunksize)]
+
+def _attach(name):
+    """
+    attaches to an existing shared memory block (the creating process
+    unlinks it)
+    """
+    from multiprocessing import shared_memory
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always registers the block. The workers share
+        # the parent's resource tracker, where registering the name
+        # again is a no-op, so it must not be unregistered here.
+        return shared_memory.SharedMemory(name=name)
+
+def _shm_worker(metric, in_name, out_name, dtype, n, start, stop):
+    """evaluates metric on tables start:stop of the shared blocks"""
+    shm_in, shm_out = _attach(in_name), _attach(out_name)
+    try:
+        counts = np.ndarray((4, n), dtype=dtype, buffer=shm_in.buf)
+        out = np.ndarray((n,), dtype=np.float64, buffer=shm_out.buf)
+        x = _kernels._Intermediates(*counts[:, start:stop])
+        out[start:stop] = getattr(_kernels, metric)(x)
+
+        # the views have to go before the blocks can be closed
+        del counts, out, x
+    finally:
+        shm_in.close()
+        shm_out.close()
+
+def _thread_direct(metric, counts, workers, executor, chunksize):
+    """evaluates metric over (4, n) counts on a thread pool"""
+    n = counts.shape[1]
+    out = np.empty(n)
+    kernel = getattr(_kernels, metric)
+
+    def run(start, stop):
+        for i in range(start, stop, tilesize):
+            j = min(i + tilesize, stop)
+            out[i:j] = kernel(_kernels._Intermediates(*counts[:, i:j]))
+
+    own = executor is None
+    if own:
+        from concurrent.futures import ThreadPoolExecutor
+        executor = ThreadPoolExecutor(workers)
+    try:
+        if chunksize is None:
+            chunksize = max(tilesize, -(-n // (4*workers)))
+        futures = [executor.submit(run, start, stop)
+                   for start, stop in _chunks(n, workers, chunksize)]
+        for future in futures:
+            future.result()
+    finally:
+        if own:
+            executor.shutdown()
+    return out
+
+def _process_direct(metric, counts, workers, executor, chunksize):
+    """evaluates metric over (4, n) counts on a process pool"""
+    from multiprocessing import shared_memory
+
+    n = counts.shape[1]
+    shm_in = shared_memory.SharedMemory(create=True,
+                                        size=max(counts.nbytes, 1))
+    shm_out = shared_memory.SharedMemory(create=True, size=max(8*n, 1))
+    try:
+        shared = np.ndarray(counts.shape, dtype=counts.dtype,
+                            buffer=shm_in.buf)
+        shared[:] = counts
+        del shared
+
+        own = executor is None
+        if own:
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(workers)
+        try:
+            futures = [executor.submit(_shm_worker, metric,
+                                       shm_in.name, shm_out.name,
+                                       counts.dtype.str, n, start, stop)
+                       for start, stop in _chunks(n, workers, chunksize)]
+            for future in futures:
+                future.result()
+        finally:
+            if own:
+                executor.shutdown()
+
+        result = np.ndarray((n,), dtype=np.float64, buffer=shm_out.buf).copy()
+    finally:
+        shm_in.close()
+        shm_in.unlink()
+        shm_out.close()
+        shm_out.unlink()
+    return result
+
+def direct(metric, hi, mi, cr, fa, workers=None, executor=None,
+           chunksize=None, threads=None):
+    """
+    evaluates metric from hit, miss, correct rejection, and false alarm
+    counts in parallel
+
+       args:
+          metric: metric name (e.g. 'dprime')
+
+          hi, mi, cr, fa: count arrays (broadcast against each other)
+
+       kwds:
+          workers: number of worker processes. Batches of minchunk
+                   tables or less are evaluated serially. Without
+                   workers, executor, or threads the whole batch is
+                   evaluated serially.
+
+          executor: a concurrent.futures executor to submit the chunks
+                    to instead of starting a pool. Reusing one executor
+                    across calls saves the pool start up. Chunks given
+                    to a ThreadPoolExecutor are not copied.
+
+          threads: evaluate on this many threads instead of processes.
+                   Batches of tilesize tables or less are evaluated
+                   serially.
+
+          chunksize: number of tables per chunk (defaults to about four
+                     chunks per worker, and at least minchunk)
+
+       Results are reassembled in order and match the serial kernels.
+       Exceptions raised by a chunk (e.g. ZeroDivisionError for tables
+       without signal trials) are raised here.
+    """
+    if metric not in _metric_names:
+        raise ValueError("unknown metric '%s'" % metric)
+
+    args = (hi, mi, cr, fa)
+    arrays = np.broadcast_arrays(*[np.asarray(a) for a in args])
+    shape = arrays[0].shape
+    dtype = np.result_type(np.int64, *arrays)
+    counts = np.array([a.ravel() for a in arrays], dtype=dtype)
+
+    result = _evaluate(metric, counts, workers, executor, chunksize, threads)
+    result = result.reshape(shape)
+    if _kernels._returns_list(args):
+        return result.tolist()
+    return result
+
+def _evaluate(metric, counts, workers=None, executor=None, chunksize=None,
+              threads=None):
+    """
+    evaluates metric over a (4, n) array of counts, serially when the
+    batch is too small to be worth a pool
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    if threads is not None and workers is not None:
+        raise ValueError('pass workers or threads, not both')
+
+    use_threads = threads is not None or \
+                  isinstance(executor, ThreadPoolExecutor)
+    if use_threads:
+        workers, smallest = threads, tilesize
+    else:
+        smallest = minchunk
+
+    n = counts.shape[1]
+    if workers is None:
+        if executor is None:
+            # no pool unless one was asked for
+            workers = 1
+        else:
+            workers = getattr(executor, '_max_workers', 1)
+
+    if n == 0 or (executor is None and (workers <= 1 or n <= smallest)):
+        result = getattr(_kernels, metric)(_kernels._Intermediates(*counts))
+    elif use_threads:
+        result = _thread_direct(metric, counts, workers, executor, chunksize)
+    else:
+        result = _process_direct(metric, counts, workers, executor,
+                                 chunksize)
+    return np.asarray(result, dtype=np.float64)
@@ -0,0 +1,122 @@
+from __future__ import print_function
+from __future__ import division
+
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+import numpy as np
+
+from ._sdt_metrics import SDT, _add_metric_methods
+from ._batch import SDTBatch
+from . import _kernels
+
+class SDTRatings(object):
+    """
+    Rating scale (confidence) data for one or many subjects
+
+       signal[..., k] and noise[..., k] hold the number of signal and
+       noise trials that were given rating k (0 <= k < K), where higher
+       ratings mean more confidence that a signal was present. Leading
+       dimensions index subjects, so thousands of subjects are stored as
+       two (S, K) arrays.
+
+       A rating scale with K levels has K-1 criteria. Criterion j lies
+       between ratings j and j+1: ratings above it count as "yes"
+       responses. The HI, MI, CR, and FA counts of every criterion of
+       every subject come from one cumsum per class (see counts()), and
+       every metric is available as a method that returns a (..., K-1)
+       array.
+    """
+    def __init__(self, signal, noise, dtype=None):
+        """
+        SDTRatings(signal, noise) where signal and noise are array-likes
+        of rating counts with the same shape (..., K). dtype defaults
+        to int64 for integer counts and float64 otherwise.
+        """
+        signal, noise = np.asarray(signal), np.asarray(noise)
+        if signal.shape != noise.shape:
+            raise ValueError('signal and noise must have the same shape')
+        if signal.ndim == 0 or signal.shape[-1] < 2:
+            raise ValueError('need at least two rating levels')
+
+        if dtype is None:
+            dtype = np.result_type(np.int64, signal, noise)
+        self.signal = np.array(signal, dtype=dtype)
+        self.noise = np.array(noise, dtype=dtype)
+
+    @property
+    def levels(self):
+        """number of rating levels (K)"""
+        return self.signal.shape[-1]
+
+    @property
+    def shape(self):
+        """shape of the subject dimensions"""
+        return self.signal.shape[:-1]
+
+    def __len__(self):
+        if not self.shape:
+            raise TypeError('len() of unsized SDTRatings')
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        """indexes the subject dimensions"""
+        if not self.shape:
+            raise IndexError('SDTRatings of one subject cannot be indexed')
+        return SDTRatings(self.signal[key], self.noise[key])
+
+    def copy(self):
+        """Return a deep copy."""
+        return SDTRatings(self.signal.copy(), self.noise.copy())
+
+    def __repr__(self):
+        return '%s(signal=%s, noise=%s)' % (
+            self.__class__.__name__,
+            np.array2string(self.signal, separator=', ', threshold=12),
+            np.array2string(self.noise, separator=', ', threshold=12))
+
+    def pooled(self):
+        """returns the counts summed over all subjects"""
+        axes = tuple(range(len(self.shape)))
+        return SDTRatings(self.signal.sum(axis=axes),
+                          self.noise.sum(axis=axes))
+
+    def counts(self):
+        """
+        returns the (HI, MI, CR, FA) count arrays of every criterion,
+        each with shape (..., K-1)
+        """
+        mi = np.cumsum(self.signal, axis=-1)
+        cr = np.cumsum(self.noise, axis=-1)
+        P, N = mi[..., -1:], cr[..., -1:]
+        mi, cr = mi[..., :-1], cr[..., :-1]
+        return P - mi, mi, cr, N - cr
+
+    def points(self):
+        """returns the (pFA, pHI) operating points of every criterion"""
+        x = self._intermediates()
+        return x.pFA, x.pHI
+
+    def batch(self):
+        """
+        returns the operating points as an SDTBatch (subjects first,
+        criteria varying fastest)
+        """
+        return SDTBatch._fromdata(np.array([np.ravel(v) for v in
+                                            self.counts()]))
+
+    def sdt(self, criterion):
+        """returns the counts at one criterion of a single subject as an SDT"""
+        if self.shape:
+            raise ValueError('select a subject first')
+        counts = [v[criterion] for v in self.counts()]
+        return SDT._fromcounts(*[v.tolist() for v in counts])
+
+    def _intermediates(self):
+        return _kernels._Intermediates(*self.counts())
+
+def _ratings_method(name):
+    def method(self):
+        return getattr(_kernels, name)(self._intermediates())
+    return method
+
+_add_metric_methods(SDTRatings, _ratings_method)
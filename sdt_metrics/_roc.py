@@ -0,0 +1,130 @@
+from __future__ import print_function
+from __future__ import division
+
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+import numpy as np
+
+from ._batch import SDTBatch
+
+def threshold_sweep(scores, labels):
+    """
+    Signal detection counts at every distinct threshold of a set of scores
+
+       args:
+          scores: continuous classifier outputs (higher means "more
+                  signal-like")
+
+          labels: True (or 1) for signal trials and False (or 0) for
+                  noise trials
+
+       returns:
+          thresholds: the distinct scores in descending order
+
+          batch: SDTBatch where batch[i] holds the counts for responding
+                 "yes" whenever score >= thresholds[i]
+
+       Runs in O(n log n): one sort followed by a cumulative sum over
+       the labels. Every metric can then be evaluated across the sweep,
+       e.g. batch.dprime() or batch.mcc().
+    """
+    scores = np.asarray(scores)
+    labels = np.asarray(labels, dtype=bool)
+    if scores.ndim != 1 or scores.shape != labels.shape:
+        raise ValueError('scores and labels must be 1-d and the same length')
+    if np.any(np.isnan(scores)):
+        raise ValueError('scores contains nan')
+
+    order = np.argsort(scores, kind='mergesort')[::-1]
+    scores, labels = scores[order], labels[order]
+
+    # index of the last element of each run of tied scores
+    last = np.flatnonzero(scores[1:] != scores[:-1])
+    if len(scores):
+        last = np.append(last, len(scores) - 1)
+
+    hi = np.cumsum(labels, dtype=np.int64)[last]
+    fa = (last + 1) - hi
+    n_signal = np.count_nonzero(labels)
+    n_noise = len(labels) - n_signal
+
+    batch = SDTBatch._fromdata(np.array([hi, n_signal - hi, n_noise - fa, fa]))
+    return scores[last], batch
+
+def _rank_sum(column, labels):
+    """
+    sum of the 1-based ranks of the signal trials in column, with tied
+    scores given the mean of their ranks
+    """
+    order = np.argsort(column)
+    s = column[order]
+
+    # first position of each run of tied scores
+    starts = np.flatnonzero(np.r_[True, s[1:] != s[:-1]])
+    del s
+    ends = np.r_[starts[1:], len(column)] - 1
+    signal = np.add.reduceat(labels[order], starts, dtype=np.int64)
+    return np.dot(signal, (starts + ends)/2. + 1.)
+
+def _auc_column(column, labels, n_signal, n_noise):
+    """AUC of one column of scores"""
+    R = _rank_sum(np.ascontiguousarray(column), labels)
+    return (R - n_signal*(n_signal + 1)/2.)/(n_signal*n_noise)
+
+def auc(scores, labels, threads=None):
+    """
+    Exact area under the ROC curve of continuous scores
+
+       args:
+          scores: (n,) array of classifier outputs or (n, m) array with
+                  one column per classifier (higher means "more
+                  signal-like")
+
+          labels: (n,) True (or 1) for signal trials and False (or 0)
+                  for noise trials
+
+       kwds:
+          threads: sort the columns of 2-d scores on this many threads
+                   (numpy's sorts release the GIL). Each thread holds
+                   the temporaries of one column at a time.
+
+       returns:
+          float for 1-d scores, (m,) array for 2-d scores
+
+       The AUC is the Mann-Whitney U statistic divided by the number of
+       signal-noise pairs: the probability that a random signal trial
+       scores higher than a random noise trial, with ties counting one
+       half. Each column is sorted once and tied scores get mid-ranks,
+       so the cost is O(n log n) per column. Unlike aprime and amzs
+       this is not an approximation from a single operating point.
+    """
+    scores = np.asarray(scores)
+    labels = np.asarray(labels, dtype=bool)
+    if scores.ndim not in (1, 2) or labels.ndim != 1 or \
+       scores.shape[0] != labels.shape[0]:
+        raise ValueError('scores must be (n,) or (n, m) and labels (n,)')
+    if np.any(np.isnan(scores)):
+        raise ValueError('scores contains nan')
+
+    n_signal = np.count_nonzero(labels)
+    n_noise = len(labels) - n_signal
+    if n_signal == 0 or n_noise == 0:
+        raise ZeroDivisionError('float division by zero')
+
+    # columns are evaluated one at a time (one per thread), so the
+    # sort temporaries are O(n) per thread rather than O(n*m)
+    columns = scores.reshape(len(labels), -1)
+    m = columns.shape[1]
+
+    def run(j):
+        return _auc_column(columns[:, j], labels, n_signal, n_noise)
+
+    if threads is None or threads <= 1 or m == 1:
+        result = np.array([run(j) for j in range(m)])
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(min(threads, m)) as executor:
+            result = np.array(list(executor.map(run, range(m))))
+    if scores.ndim == 1:
+        return float(result[0])
+    return result
@@ -56,6 +56,11 @@ best to briefly discuss those gotchas here.
     the loglinear_dprime, loglinear_beta, and loglinear_c methods
     use a different correction suggested by Hautus (1995).
 
+    Counts do not have to be integers (see SDTDecay). When fractional
+    counts add up to less than one trial N is taken to be 1. Weighted
+    counts (see SDTAccumulator and group_counts) use their effective
+    sample size (sum(w)**2/sum(w**2), SDT.neff) as N.
+
  2. Some of the metrics (aprime, amzs, and bmz) have symmetry about the
     diagonal in ROC space where p(HI) == p(FA). Their implemenations are
     easier with recursion. These recurive metrics are implemented
@@ -66,9 +71,16 @@ best to briefly discuss those gotchas here.
    datastructure. In some instances SDT metrics need to be calculated
    from frequency counts. In these instances having functions that
    take counts or probabilities makes more sense. To avoid implementing
-   all the algorithms twice a singleton object (_S) with an SDT object
-   (_S.sdt) is created when this class is imported. This prevents
-   unnecessary instances of SDT being created.
+   all the algorithms twice the _vmethod functions build a throwaway
+   SDT object for every call (SDT._fromcounts and SDT._fromprobs) and
+   call the SDT method on it. These constructors skip the validation in
+   update() so they are cheap, and because nothing is shared between
+   calls the metrics can be evaluated from many threads at once without
+   locking.
+
+   (Earlier versions kept a singleton object (_S) with an SDT object
+   (_S.sdt) and overwrote its data on every call. _S is still around for
+   backwards compatibility but nothing in sdt_metrics uses it.)
 
    A factory class (_vmethod) let's us build vectorized versions of the
    metrics. To support taking probabilities directly the SDT class has
@@ -84,7 +96,7 @@ best to briefly discuss those gotchas here.
         
                    -  These attributes are otherwise not used.
                    
-                   -  They are set directly in _vmethod.prob
+                   -  They are set by SDT._fromprobs
                  
         count(): returns None (to trigger exceptions for Gotcha 1)
 
@@ -115,6 +127,16 @@ best to briefly discuss those gotchas here.
          >>> D = SDT()
          >>> D(HI)    # add a hit
          >>> D[HI]+=1 # adds another hit
+
+  6. When the _vmethod functions are given sequences or numpy arrays
+     instead of scalars they don't loop over SDT objects. The whole batch is
+     handed to the array kernels in _kernels, which mirror the SDT
+     methods operation for operation. numpy is imported the first time
+     this happens so the scalar path stays pure python.
+
+     numpy arrays (and other array-likes) give back ndarrays. Lists and
+     tuples of numbers give back lists, like the per-element loop this
+     replaced.
 """
 
 ##
@@ -130,7 +152,10 @@ def _correction(v, N):
     elif N is None or v < 0 or v >1:
         raise ValueError('v should be >= 0 and <= 1')
 
-    # at this point we know v must be 0 or 1 and N is not None
+    # at this point we know v must be 0 or 1 and N is not None.
+    # Fractional (weighted or decayed) counts can add up to less than
+    # one trial, which is treated as one trial.
+    N = max(N, 1)
     return (1/(2*N), 1-1/(2*N))[int(v)]
 
 def _isint(x):
@@ -141,7 +166,25 @@ def _isint(x):
     except:
         return False
 
-def ltqnorm( p ):
+# Coefficients in rational approximations used by ltqnorm. They live
+# at module level so the array implementation in _kernels can share them.
+_ltqnorm_a = (-3.969683028665376e+01,  2.209460984245205e+02, \
+              -2.759285104469687e+02,  1.383577518672690e+02, \
+              -3.066479806614716e+01,  2.506628277459239e+00)
+_ltqnorm_b = (-5.447609879822406e+01,  1.615858368580409e+02, \
+              -1.556989798598866e+02,  6.680131188771972e+01, \
+              -1.328068155288572e+01 )
+_ltqnorm_c = (-7.784894002430293e-03, -3.223964580411365e-01, \
+              -2.400758277161838e+00, -2.549732539343734e+00, \
+               4.374664141464968e+00,  2.938163982698783e+00)
+_ltqnorm_d = ( 7.784695709041462e-03,  3.224671290700398e-01, \
+               2.445134137142996e+00,  3.754408661907416e+00)
+
+# Define break-points.
+_ltqnorm_plow  = 0.02425
+_ltqnorm_phigh = 1 - _ltqnorm_plow
+
+def ltqnorm( p, out=None, refine=False ):
     # could be replaced with scipy.stats.norm.ppf,
     # but not including it makes it a pure python module
     #
@@ -172,47 +215,57 @@ def ltqnorm( p ):
     Time-stamp:  2000-07-19 18:26:14
     E-mail:      pjacklam@online.no
     WWW URL:     http://home.online.no/~pjacklam
+
+    Array support (sdt_metrics):
+
+    When p is a sequence or numpy array, or out is given, the array
+    version in sdt_metrics._kernels is used. It accepts an out array
+    (which may be p itself), returns -inf/inf/nan for p == 0, p == 1,
+    and invalid p instead of raising, and is bit-identical to the
+    scalar code on (0,1).
+
+    When refine is True one step of Halley's rational method is
+    applied, which brings the result to about machine precision.
     """
+    if out is not None or not _isint(p):
+        from . import _kernels
+        return _kernels.ltqnorm(p, out=out, refine=refine)
 
     if p <= 0 or p >= 1:
         # The original perl code exits here, we'll throw an exception instead
         raise ValueError( "Argument to ltqnorm %f must be in open interval (0,1)" % p )
 
-    # Coefficients in rational approximations.
-    a = (-3.969683028665376e+01,  2.209460984245205e+02, \
-         -2.759285104469687e+02,  1.383577518672690e+02, \
-         -3.066479806614716e+01,  2.506628277459239e+00)
-    b = (-5.447609879822406e+01,  1.615858368580409e+02, \
-         -1.556989798598866e+02,  6.680131188771972e+01, \
-         -1.328068155288572e+01 )
-    c = (-7.784894002430293e-03, -3.223964580411365e-01, \
-         -2.400758277161838e+00, -2.549732539343734e+00, \
-          4.374664141464968e+00,  2.938163982698783e+00)
-    d = ( 7.784695709041462e-03,  3.224671290700398e-01, \
-          2.445134137142996e+00,  3.754408661907416e+00)
-
-    # Define break-points.
-    plow  = 0.02425
-    phigh = 1 - plow
+    a,b,c,d = _ltqnorm_a,_ltqnorm_b,_ltqnorm_c,_ltqnorm_d
+    plow,phigh = _ltqnorm_plow,_ltqnorm_phigh
 
     # Rational approximation for lower region:
     if p < plow:
        q  = math.sqrt(-2*math.log(p))
-       return (((((c[0]*q+c[1])*q+c[2])*q+c[3])*q+c[4])*q+c[5]) / \
-               ((((d[0]*q+d[1])*q+d[2])*q+d[3])*q+1)
+       x = (((((c[0]*q+c[1])*q+c[2])*q+c[3])*q+c[4])*q+c[5]) / \
+            ((((d[0]*q+d[1])*q+d[2])*q+d[3])*q+1)
 
     # Rational approximation for upper region:
-    if phigh < p:
+    elif phigh < p:
        q  = math.sqrt(-2*math.log(1-p))
-       return -(((((c[0]*q+c[1])*q+c[2])*q+c[3])*q+c[4])*q+c[5]) / \
-                ((((d[0]*q+d[1])*q+d[2])*q+d[3])*q+1)
+       x = -(((((c[0]*q+c[1])*q+c[2])*q+c[3])*q+c[4])*q+c[5]) / \
+             ((((d[0]*q+d[1])*q+d[2])*q+d[3])*q+1)
 
     # Rational approximation for central region:
-    q = p - 0.5
-    r = q*q
-    return (((((a[0]*r+a[1])*r+a[2])*r+a[3])*r+a[4])*r+a[5])*q / \
+    else:
+       q = p - 0.5
+       r = q*q
+       x = (((((a[0]*r+a[1])*r+a[2])*r+a[3])*r+a[4])*r+a[5])*q / \
            (((((b[0]*r+b[1])*r+b[2])*r+b[3])*r+b[4])*r+1)
 
+    if refine:
+        # Halley's rational method (third order) gives full machine
+        # precision (see the refinement section of Acklam's notes)
+        e = 0.5 * math.erfc(-x/math.sqrt(2)) - p
+        u = e * math.sqrt(2*math.pi) * math.exp(x*x/2)
+        x = x - u/(1 + x*u/2)
+
+    return x
+
 def _aprime(pHI,pFA):
     """recursive private function for calculating A'"""
     pCR = 1 - pFA
@@ -270,9 +323,9 @@ def _bmz(pHI,pFA):
     if   pFA <= .5 <= pHI:
         return (5-4*pHI)/(1+4*pFA)
     elif pFA < pHI < .5:
-        return (pHI**2+pHI)/(pHI**2+pFA)
+        return (pHI*pHI+pHI)/(pHI*pHI+pFA)
     elif .5 < pFA < pHI:
-        return ((1-pFA)**2+(1-pHI))/((1-pFA)**2+(1-pFA))
+        return ((1-pFA)*(1-pFA)+(1-pHI))/((1-pFA)*(1-pFA)+(1-pFA))
     else: # pHI == pFA
         return 1.
 
@@ -310,6 +363,13 @@ class SDT(dict):
     """
     # class is modelled from collections.Counter
     global HI,MI,CR,FA,TP,FP,TN,FN
+
+    # effective sample size of weighted counts. When set the standard
+    # correction uses it in place of count() (see SDTAccumulator and
+    # Gotcha 1). update() and subtract() leave it as is, copy() and
+    # pickling keep it. The operators return SDTs without it: the neff
+    # of a combination isn't known from the neffs of its operands.
+    neff = None
     
     def __init__(self, iterable=None, **kwds):
         """Create a new, empty SDT object.  And if given, count elements
@@ -324,6 +384,31 @@ class SDT(dict):
         self.pHI = None
         self.pFA = None
 
+    @classmethod
+    def _fromcounts(cls, hi, mi, cr, fa):
+        """
+        Builds an SDT from hit, miss, correct rejection and false alarm
+        counts without going through update(). Used by _vmethod.direct.
+        """
+        obj = cls.__new__(cls)
+        dict.__init__(obj, ((HI,hi),(MI,mi),(CR,cr),(FA,fa)))
+        obj._directmode = True
+        obj.pHI = None
+        obj.pFA = None
+        return obj
+
+    @classmethod
+    def _fromprobs(cls, pHI, pFA):
+        """
+        Builds an SDT that is not in _directmode from hit and false
+        alarm rates. Used by _vmethod.prob.
+        """
+        obj = cls.__new__(cls)
+        obj._directmode = False
+        obj.pHI = pHI
+        obj.pFA = pFA
+        return obj
+
     def keys(self):
         """returns list of event types"""
         return [HI,MI,CR,FA]
@@ -445,10 +530,16 @@ class SDT(dict):
 
     def copy(self):
         """Return a shallow copy."""
-        return self.__class__(self)
+        result = self.__class__(self)
+        if self.neff is not None:
+            result.neff = self.neff
+        return result
 
     def __reduce__(self):
-        return self.__class__, (dict(self),)
+        if self.neff is None:
+            return self.__class__, (dict(self),)
+        # the state is restored into __dict__ after construction
+        return self.__class__, (dict(self),), {'neff': self.neff}
 
     def __delitem__(self, elem):
         """
@@ -460,7 +551,9 @@ class SDT(dict):
     def __repr__(self):
         if self.count()==0:
             return '%s()' % self.__class__.__name__
-        items = ', '.join(['%s=%i'%(k,self[k]) for k in self])
+        # weighted and decayed counts are fractional
+        items = ', '.join([('%s=%i' if float(self[k]).is_integer() else
+                            '%s=%g')%(k,self[k]) for k in self])
         return '%s(%s)' % (self.__class__.__name__, items)
 
     # Multiset-style mathematical operations discussed in:
@@ -499,7 +592,7 @@ class SDT(dict):
             else:
                 diffs.append(d)
                     
-        return SDT(zip(self.keys(), diffs))
+        return SDT(list(zip(self.keys(), diffs)))
 
     def __or__(self, other): # overloads |
         """Union is the maximum of value in either of the input SDTs."""
@@ -521,6 +614,12 @@ class SDT(dict):
             return sum(v for v in self.values())
         else:
             return None
+
+    def _correction_N(self):
+        """N used by the standard correction"""
+        if self.neff is not None:
+            return self.neff
+        return self.count()
     
     def p(self, elem):
         """returns probability of event type"""
@@ -741,7 +840,7 @@ class SDT(dict):
                  detection theory measures. Behavorial Research Methods,
                  Instruments, and Computers, 31 (1), 137-149.
         """
-        N = self.count()
+        N = self._correction_N()
         return ltqnorm(_correction(self.p(HI),N)) - \
                ltqnorm(_correction(self.p(FA),N))
 
@@ -790,7 +889,7 @@ class SDT(dict):
                  analysis of group data: Estimating sensitivity from average hit
                  and false-alarm rates. Psychological Bulletin, 98, 185-199.
         """
-        N = self.count()
+        N = self._correction_N()
         zhr = ltqnorm(_correction(self.p(HI),N))
         zfar = ltqnorm(_correction(self.p(FA),N))
         return math.exp(-zhr*zhr/2 + zfar*zfar/2)
@@ -865,7 +964,7 @@ class SDT(dict):
                  analysis of group data: Estimating sensitivity from average hit
                  and false-alarm rates. Psychological Bulletin, 98, 185-199.
         """
-        N = self.count()
+        N = self._correction_N()
         return -1.*(.5*ltqnorm(_correction(self.p(HI),N)) + \
                     .5*ltqnorm(_correction(self.p(FA),N)))
 
@@ -1078,13 +1177,85 @@ class SDT(dict):
                       math.log( p[('y^','y')][i][j] / (p['y^'][i]*p['y'][j]) )
         return mi
     
+#
+# Delta method variances
+#
+
+# Each function takes an SDT in direct mode and returns the large
+# sample variance of the metric. The hit and false alarm rates are
+# treated as independent binomial proportions with variances
+# pHI(1-pHI)/(HI+MI) and pFA(1-pFA)/(CR+FA) [1]_ and propagated through
+# the metric with its first order Taylor expansion. The z-score based
+# metrics use the same corrected rates as the metrics themselves.
+#
+# .. [1] Gourevitch, V., and Galanter, E. (1967). A significance test
+#        for one parameter isosensitivity functions. Psychometrika, 32,
+#        25-33.
+
+def _npdf(z):
+    """standard normal density"""
+    return math.exp(-z*z/2)/math.sqrt(2*math.pi)
+
+def _zvars(sdt):
+    """
+    returns the variances of the z-transformed (corrected) hit and
+    false alarm rates and the z-scores themselves
+    """
+    N = sdt._correction_N()
+    h = _correction(sdt.p(HI), N)
+    f = _correction(sdt.p(FA), N)
+    zh, zf = ltqnorm(h), ltqnorm(f)
+    vh = h*(1-h)/((sdt[HI] + sdt[MI])*_npdf(zh)*_npdf(zh))
+    vf = f*(1-f)/((sdt[CR] + sdt[FA])*_npdf(zf)*_npdf(zf))
+    return vh, vf, zh, zf
+
+def _dprime_var(sdt):
+    vh, vf, zh, zf = _zvars(sdt)
+    return vh + vf
+
+def _c_var(sdt):
+    vh, vf, zh, zf = _zvars(sdt)
+    return (vh + vf)/4
+
+def _beta_var(sdt):
+    # var(ln beta) scaled by beta**2
+    vh, vf, zh, zf = _zvars(sdt)
+    beta = math.exp(-zh*zh/2 + zf*zf/2)
+    return beta*beta*(zh*zh*vh + zf*zf*vf)
+
+def _aprime_grad(pHI, pFA):
+    """partial derivatives of A' with respect to pHI and pFA"""
+    # A'(pHI,pFA) == 1 - A'(1-pHI,1-pFA) below the diagonal. The two
+    # sign changes cancel so the derivatives carry over unchanged.
+    if pFA > pHI:
+        return _aprime_grad(1-pHI, 1-pFA)
+
+    if pHI == 0 or pFA == 1:
+        return 0., 0.
+
+    d = pHI - pFA
+    return (((1 + 2*d)*pHI - d*(1 + d))/(4*pHI*pHI*(1 - pFA)),
+            (d*(1 + d) - (1 + 2*d)*(1 - pFA))/(4*pHI*(1 - pFA)*(1 - pFA)))
+
+def _aprime_var(sdt):
+    pHI, pFA = sdt.p(HI), sdt.p(FA)
+    gh, gf = _aprime_grad(pHI, pFA)
+    return gh*gh*pHI*(1-pHI)/(sdt[HI] + sdt[MI]) + \
+           gf*gf*pFA*(1-pFA)/(sdt[CR] + sdt[FA])
+
+_variances = {'dprime' : _dprime_var,
+              'c'      : _c_var,
+              'beta'   : _beta_var,
+              'aprime' : _aprime_var}
+
 #
 # Code to Implement "direct" and "prob" methods
 #
 
 
-# It makes sense to have a singleton so we don't have a bazzilon SDT
-# instances floating around.
+# Kept for backwards compatibility. _vmethod used to share this
+# singleton's SDT object between calls, which wasn't thread-safe
+# (see Gotcha 3).
 #
 # see: http://www.garyrobinson.net/2004/03/python_singleto.html
 class _S(Singleton):
@@ -1118,24 +1289,38 @@ def _prob(cls, *args):
     """
     Calculates metric based on hit rate and false alarm rate
     """
-    global _S
-    
     if all(_isint(arg) for arg in args):
-        _S.getInstance().setprobs(*args)
-        func = getattr(_S.getInstance().sdt, cls.__name__)
-        return func()
+        return getattr(SDT._fromprobs(*args), cls.__name__)()
     else:
-        results = []
-        for unpacked_args in zip(*args):
-            _S.getInstance().setprobs(*unpacked_args)
-            func = getattr(_S.getInstance().sdt, cls.__name__)
-            results.append(func())
-        return results
-
-    # Don't bothering cleaning up _S.sdt. Leave it out of
-    # _directmode with whatever data happens to be there.
-    # Whatever uses it next is responsible for setting it up.
+        # sequences and arrays are handed to the numpy kernels
+        # (see Gotcha 6)
+        from . import _kernels
+        return _kernels.prob(cls.__name__, *args)
     
+def _var(cls, hi, mi, cr, fa):
+    """
+    Delta method variance of the metric from hit, miss, correct
+    rejection, and false alarm counts
+    """
+    args = (hi, mi, cr, fa)
+    if all(_isint(arg) for arg in args):
+        return _variances[cls.__name__](SDT._fromcounts(*args))
+    else:
+        from . import _kernels
+        return _kernels.var(cls.__name__, *args)
+
+def _se(cls, hi, mi, cr, fa):
+    """
+    Delta method standard error of the metric from hit, miss, correct
+    rejection, and false alarm counts
+    """
+    args = (hi, mi, cr, fa)
+    if all(_isint(arg) for arg in args):
+        return math.sqrt(_variances[cls.__name__](SDT._fromcounts(*args)))
+    else:
+        from . import _kernels
+        return _kernels.se(cls.__name__, *args)
+
 class _vmethod(object):
     """
     Defines a factory to vectorized methods.
@@ -1150,38 +1335,45 @@ class _vmethod(object):
             self.prob.__doc__ = 'Calculates metric based on hit '\
                                 'rate and false alarm rate'
 
-    def direct(self, *args):
+        # metrics with a closed form variance (see _variances)
+        if methodname in _variances:
+            self.var = lambda *args: _var(self, *args)
+            self.var.__doc__ = _var.__doc__
+            self.se = lambda *args: _se(self, *args)
+            self.se.__doc__ = _se.__doc__
+
+    def direct(self, *args, **kwds):
         """
         Calculates metric based on hit, miss, correct
         rejection, and false alarm counts
+
+        workers=, threads=, and executor= evaluate large arrays
+        on a process or thread pool (see _parallel.direct)
         """
-        global _S
-        
+        # workers=None etc. mean the default, serial evaluation
+        kwds = dict((k, v) for k, v in kwds.items() if v is not None)
+        if kwds:
+            from . import _parallel
+            return _parallel.direct(self.__name__, *args, **kwds)
         if all(_isint(arg) for arg in args):
-            _S.getInstance().setdirects(*args)
-            func = getattr(_S.getInstance().sdt, self.__name__)
-            return func()
+            return getattr(SDT._fromcounts(*args), self.__name__)()
         else:
-            results = []
-            for unpacked_args in zip(*args):
-                _S.getInstance().setdirects(*unpacked_args)
-                func = getattr(_S.getInstance().sdt, self.__name__)
-                results.append(func())
-            return results
-
-        # Don't bothering cleaning up _S.sdt. Leave it in
-        # _directmode with whatever data happens to be there.
-        # Whatever uses it next is responsible for setting it up.
+            # sequences and arrays are handed to the numpy kernels
+            # (see Gotcha 6)
+            from . import _kernels
+            return _kernels.direct(self.__name__, *args)
 
-    def __call__(self, *args):
+    def __call__(self, *args, **kwds):
         """
         based on the number of args and the availability of .prob
-        routes call to appropriate method.
+        routes call to appropriate method. Keywords (workers=,
+        threads=, executor=) are passed on to direct.
         """
-        if self._has_prob_method and len(args) == 2:
+        kwds = dict((k, v) for k, v in kwds.items() if v is not None)
+        if self._has_prob_method and len(args) == 2 and not kwds:
             return self.prob(*args)
         elif len(args) == 4:
-            return self.direct(*args)
+            return self.direct(*args, **kwds)
         else:
             raise Exception('Cannot route args to method')
 
@@ -1212,3 +1404,30 @@ loglinear_bppd   = _vmethod('loglinear_bppd')
 loglinear_dprime = _vmethod('loglinear_dprime')
 loglinear_beta   = _vmethod('loglinear_beta')
 loglinear_c      = _vmethod('loglinear_c')
+
+# names of the metrics built above (used by the array based containers
+# to generate their metric methods)
+_metric_names = ['aprime', 'amzs', 'bpp', 'bph', 'bppd', 'bmz', 'b',
+                 'dprime', 'beta', 'c', 'accuracy', 'mcc', 'precision',
+                 'recall', 'f1', 'ppv', 'npv', 'fdr', 'sensitivity',
+                 'specificity', 'mutual_info', 'loglinear_bppd',
+                 'loglinear_dprime', 'loglinear_beta', 'loglinear_c']
+
+def _add_metric_methods(cls, factory):
+    """
+    adds a method for every metric in _metric_names to cls
+
+       factory(name) returns the function that evaluates the metric
+       name; its __name__ and __doc__ are taken from the SDT method.
+    """
+    for name in _metric_names:
+        method = factory(name)
+        method.__name__ = name
+        method.__doc__ = getattr(SDT, name).__doc__
+        setattr(cls, name, method)
+
+def _snapshot_method(name):
+    """method factory for containers that evaluate self.snapshot()"""
+    def method(self):
+        return getattr(self.snapshot(), name)()
+    return method
@@ -0,0 +1,202 @@
+from __future__ import print_function
+from __future__ import division
+
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+import struct
+
+import numpy as np
+
+from ._sdt_metrics import SDT
+from ._batch import SDTBatch
+
+# magic, format version, lo, hi, bins
+_header = struct.Struct('<4sBddq')
+_magic = b'SDTS'
+_version = 1
+
+class ScoreSketch(object):
+    """
+    Fixed memory summary of (score, label) pairs for distributed ROC
+
+       Scores are binned into `bins` equal width bins between lo and hi
+       (scores outside the range are clipped into the first or last
+       bin) and counted separately for noise and signal trials. A
+       sketch takes 16 bytes per bin no matter how many trials it has
+       seen.
+
+       Sketches with the same lo, hi, and bins merge by adding their
+       counts (+, +=, or ScoreSketch.merge), so shards can be summarized
+       independently and combined in O(bins). to_bytes() and
+       from_bytes() move them between processes.
+
+       Error bounds:
+          Counts are exact at thresholds that fall on the bin edges
+          inside (lo, hi) (see threshold_sweep() and sdt()). There are
+          no underflow or overflow counts: a score below lo is
+          counted as "yes" at threshold lo, and a score above hi is
+          counted as "no" at thresholds above the lower edge of the
+          last bin. Choose lo and hi to cover the scores when the
+          outermost thresholds matter. The AUC of the binned scores
+          treats scores that share a bin as ties, so it can differ from
+          the exact AUC by at most half the fraction of signal-noise
+          pairs that share a bin (see auc_bounds()).
+    """
+    def __init__(self, lo=0., hi=1., bins=512):
+        if not hi > lo:
+            raise ValueError('hi must be greater than lo')
+        if bins < 1:
+            raise ValueError('bins must be >= 1')
+        self.lo, self.hi, self.bins = float(lo), float(hi), int(bins)
+
+        # row 0 holds the noise counts and row 1 the signal counts
+        self.counts = np.zeros((2, self.bins), dtype=np.int64)
+
+    @property
+    def edges(self):
+        """the bins+1 bin edges"""
+        return np.linspace(self.lo, self.hi, self.bins + 1)
+
+    def update(self, scores, labels):
+        """
+        adds (score, label) pairs. labels are True (or 1) for signal
+        trials and False (or 0) for noise trials
+        """
+        scores = np.asarray(scores, dtype=np.float64).ravel()
+        labels = np.asarray(labels, dtype=bool).ravel()
+        if scores.shape != labels.shape:
+            raise ValueError('scores and labels must be the same length')
+        if np.any(np.isnan(scores)):
+            raise ValueError('scores contains nan')
+
+        # searchsorted against the edges (rather than scaling) keeps
+        # bin k == edges[k] <= score < edges[k+1] exact
+        idx = np.searchsorted(self.edges, scores, side='right') - 1
+        np.clip(idx, 0, self.bins - 1, out=idx)
+        self.counts += np.bincount(idx + self.bins*labels,
+                                   minlength=2*self.bins
+                                   ).reshape(2, self.bins)
+
+    def _check(self, other):
+        if not isinstance(other, ScoreSketch):
+            return False
+        if (self.lo, self.hi, self.bins) != (other.lo, other.hi, other.bins):
+            raise ValueError('sketches must have the same lo, hi, and bins')
+        return True
+
+    def __add__(self, other):
+        """Merge the counts of two sketches."""
+        if not self._check(other):
+            return NotImplemented
+        result = self.copy()
+        result.counts += other.counts
+        return result
+
+    def __iadd__(self, other):
+        if not self._check(other):
+            return NotImplemented
+        self.counts += other.counts
+        return self
+
+    @classmethod
+    def merge(cls, sketches):
+        """merges a sequence of sketches into a new sketch"""
+        sketches = list(sketches)
+        result = sketches[0].copy()
+        for other in sketches[1:]:
+            result += other
+        return result
+
+    def copy(self):
+        """Return a deep copy."""
+        result = ScoreSketch(self.lo, self.hi, self.bins)
+        result.counts[:] = self.counts
+        return result
+
+    def count(self):
+        """returns count of trials"""
+        return int(self.counts.sum())
+
+    def __repr__(self):
+        return '%s(lo=%r, hi=%r, bins=%i, signal=%i, noise=%i)' % (
+            self.__class__.__name__, self.lo, self.hi, self.bins,
+            self.counts[1].sum(), self.counts[0].sum())
+
+    def to_bytes(self):
+        """serializes the sketch (header and little-endian counts)"""
+        return _header.pack(_magic, _version, self.lo, self.hi, self.bins) + \
+               self.counts.astype('<i8').tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """rebuilds a sketch from to_bytes() output"""
+        data = bytes(data)
+        if len(data) < _header.size:
+            raise ValueError('data is too short to be a ScoreSketch')
+        magic, version, lo, hi, bins = _header.unpack_from(data)
+        if magic != _magic or version != _version:
+            raise ValueError('data is not a ScoreSketch')
+        if len(data) != _header.size + 16*bins:
+            raise ValueError('data has the wrong length')
+
+        result = cls(lo, hi, bins)
+        result.counts[:] = np.frombuffer(data, dtype='<i8',
+                                         offset=_header.size
+                                         ).reshape(2, bins)
+        return result
+
+    def threshold_sweep(self):
+        """
+        Signal detection counts at every bin edge
+
+           returns:
+              thresholds: the lower edges of the bins in descending order
+
+              batch: SDTBatch where batch[i] holds the counts for
+                     responding "yes" whenever score >= thresholds[i]
+                     (exact for the binned scores; the last entry,
+                     threshold lo, also counts the scores below lo as
+                     "yes" since they were clipped into the first bin)
+        """
+        noise, signal = self.counts[:, ::-1]
+        hi, fa = np.cumsum(signal), np.cumsum(noise)
+        P, N = hi[-1], fa[-1]
+        batch = SDTBatch._fromdata(np.array([hi, P - hi, N - fa, fa]))
+        return self.edges[-2::-1], batch
+
+    def sdt(self, threshold):
+        """
+        returns the counts for responding "yes" whenever score >=
+        threshold as an SDT. Exact when threshold is a bin edge inside
+        (lo, hi), otherwise the threshold is moved up to the next bin
+        edge. Scores outside [lo, hi] were clipped into the first or
+        last bin, so a threshold at or below lo counts every score as
+        "yes" and one above the lower edge of the last bin counts every
+        score as "no".
+        """
+        k = np.searchsorted(self.edges[:-1], threshold, side='left')
+        noise, signal = self.counts[:, k:].sum(axis=1).tolist()
+        P, N = self.counts[1].sum(), self.counts[0].sum()
+        return SDT._fromcounts(signal, int(P) - signal, int(N) - noise, noise)
+
+    def _pairs(self):
+        """(U of the binned scores, pairs sharing a bin, all pairs)"""
+        noise, signal = self.counts.astype(np.float64)
+        below = np.cumsum(noise) - noise
+        same = np.dot(signal, noise)
+        U = np.dot(signal, below) + .5*same
+        return U, same, signal.sum()*noise.sum()
+
+    def auc(self):
+        """area under the ROC curve of the binned scores"""
+        U, same, pairs = self._pairs()
+        if pairs == 0:
+            raise ZeroDivisionError('float division by zero')
+        return U/pairs
+
+    def auc_bounds(self):
+        """(lower, upper) bounds on the AUC of the unbinned scores"""
+        U, same, pairs = self._pairs()
+        if pairs == 0:
+            raise ZeroDivisionError('float division by zero')
+        return (U - .5*same)/pairs, (U + .5*same)/pairs
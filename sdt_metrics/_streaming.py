@@ -0,0 +1,156 @@
+from __future__ import print_function
+from __future__ import division
+
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+import itertools
+
+import numpy as np
+
+from ._sdt_metrics import SDT, HI, MI, CR, FA, _add_metric_methods, \
+                          _snapshot_method
+
+def _tally(y_true, y_pred):
+    """
+    returns the (HI, MI, CR, FA) counts of two equal length boolean
+    arrays (y_true is True for signal trials, y_pred is True for "yes"
+    responses)
+
+       Three count_nonzero reductions and one logical and are much
+       cheaper than building bincount codes.
+    """
+    y_true = np.asarray(y_true, dtype=bool)
+    y_pred = np.asarray(y_pred, dtype=bool)
+    if y_true.shape != y_pred.shape:
+        raise ValueError('y_true and y_pred must have the same shape')
+
+    n = y_true.size
+    n_signal = np.count_nonzero(y_true)
+    n_yes = np.count_nonzero(y_pred)
+    hi = np.count_nonzero(y_true & y_pred)
+    return hi, n_signal - hi, n - n_signal - n_yes + hi, n_yes - hi
+
+def _weighted_tally(y_true, y_pred, weights):
+    """
+    returns the weighted (HI, MI, CR, FA) counts and the sum of the
+    squared weights
+    """
+    from ._groupby import _cells
+    y_true = np.asarray(y_true, dtype=bool)
+    y_pred = np.asarray(y_pred, dtype=bool)
+    weights = np.asarray(weights, dtype=np.float64)
+    if not y_true.shape == y_pred.shape == weights.shape:
+        raise ValueError('y_true, y_pred, and weights must have the '
+                         'same shape')
+    counts = np.bincount(_cells(y_true, y_pred).ravel(),
+                         weights=weights.ravel(), minlength=4)
+    return counts, np.dot(weights.ravel(), weights.ravel())
+
+class SDTAccumulator(object):
+    """
+    Streaming accumulator for labelled predictions
+
+       Feed it chunks of (y_true, y_pred) with update() or an iterable
+       of chunks with consume(). The four counts are updated with a few
+       vectorized reductions per chunk instead of one Python call per
+       event. Every metric is available as a method that evaluates the
+       counts seen so far, and snapshot() returns them as an SDT.
+
+       Events can carry weights (e.g. importance weights from
+       stratified sampling). The counts then become float sums of
+       weights, and the standard correction uses the effective sample
+       size sum(w)**2/sum(w**2) as N (see SDT.neff).
+    """
+    # number of elements pulled from a generator at a time
+    chunksize = 1 << 16
+
+    def __init__(self):
+        self.counts = np.zeros(4, dtype=np.int64)
+
+        # sum of squared weights (unweighted events count 1)
+        self.sumsq = 0
+        self.weighted = False
+
+    def _add(self, y_true, y_pred, weights):
+        if weights is None:
+            counts = _tally(y_true, y_pred)
+            sumsq = sum(counts)
+        else:
+            counts, sumsq = _weighted_tally(y_true, y_pred, weights)
+            if not self.weighted:
+                self.counts = self.counts.astype(np.float64)
+                self.weighted = True
+        self.counts += counts
+        self.sumsq += sumsq
+
+    def update(self, y_true, y_pred, weights=None):
+        """
+        adds a chunk of events
+
+           y_true and y_pred are boolean array-likes of the same length
+           or iterators of booleans (consumed chunksize at a time).
+           weights, when given, holds the weight of every event.
+        """
+        args = [y_true, y_pred] + ([] if weights is None else [weights])
+        if all(hasattr(arg, '__len__') for arg in args):
+            self._add(y_true, y_pred, weights)
+            return
+
+        its = [iter(arg) for arg in args]
+        types = [bool, bool, np.float64]
+        while True:
+            chunk = [np.fromiter(itertools.islice(it, self.chunksize), t)
+                     for it, t in zip(its, types)]
+            if len(set(len(c) for c in chunk)) != 1:
+                raise ValueError('y_true and y_pred must have the same length')
+            if len(chunk[0]) == 0:
+                break
+            self._add(chunk[0], chunk[1], chunk[2] if len(chunk) == 3 else None)
+
+    def consume(self, chunks):
+        """
+        adds every (y_true, y_pred) or (y_true, y_pred, weights) chunk
+        from an iterable of chunks
+        """
+        for chunk in chunks:
+            self.update(*chunk)
+
+    def clear(self):
+        """resets the counts to zero"""
+        self.counts = np.zeros(4, dtype=np.int64)
+        self.sumsq = 0
+        self.weighted = False
+
+    @property
+    def neff(self):
+        """
+        the effective sample size sum(w)**2/sum(w**2) (the count of
+        events when no weights were given), an attribute like SDT.neff
+        and SDTBatch.neff
+        """
+        if not self.weighted:
+            return self.count()
+        if self.sumsq == 0:
+            return 0.
+        return float(self.counts.sum())**2/self.sumsq
+
+    def snapshot(self):
+        """returns the counts seen so far as an SDT"""
+        sdt = SDT(list(zip([HI,MI,CR,FA], self.counts.tolist())))
+        if self.weighted:
+            sdt.neff = self.neff
+        return sdt
+
+    def count(self):
+        """returns count of events (sum of weights for weighted events)"""
+        if self.weighted:
+            return float(self.counts.sum())
+        return int(self.counts.sum())
+
+    def __repr__(self):
+        fmt = '%s=%g' if self.weighted else '%s=%i'
+        items = ', '.join([fmt%(k,v) for k,v in
+                           zip([HI,MI,CR,FA], self.counts.tolist())])
+        return '%s(%s)' % (self.__class__.__name__, items)
+
+_add_metric_methods(SDTAccumulator, _snapshot_method)
@@ -0,0 +1,162 @@
+from __future__ import print_function
+from __future__ import division
+
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+Lookup tables of metrics over integer count grids
+
+   With P signal trials and N noise trials there are only (P+1)*(N+1)
+   possible confusion matrices. metric_table evaluates a metric over
+   all of them with one call to the array kernels and keeps the result
+   in a small LRU cache, so plots and simulations that visit the grid
+   cell by cell (or evaluate the same design over and over) reduce to
+   indexing.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from ._sdt_metrics import _metric_names
+from . import _kernels
+
+# maximum number of tables kept by metric_table
+table_cache_size = 32
+
+_tables = OrderedDict()
+_tables_lock = threading.Lock()
+
+_corrections = ['standard', 'loglinear']
+
+def _metric_name(metric):
+    name = getattr(metric, '__name__', metric)
+    if name not in _metric_names:
+        raise ValueError("unknown metric '%s'" % name)
+    return name
+
+def _build_table(name, P, N, correction):
+    h = np.arange(P+1, dtype=np.float64)[:, None]
+    f = np.arange(N+1, dtype=np.float64)[None, :]
+    hi, mi, cr, fa = np.broadcast_arrays(h, P-h, N-f, f)
+    if correction == 'loglinear':
+        hi, mi, cr, fa = hi+.5, mi+.5, cr+.5, fa+.5
+
+    table = getattr(_kernels, name)(
+                _kernels._Intermediates.from_counts(hi, mi, cr, fa))
+    table = np.array(np.broadcast_to(table, hi.shape), dtype=np.float64)
+    table.setflags(write=False)
+    return table
+
+def metric_table(metric, P, N, correction='standard'):
+    """
+    evaluates a metric over every confusion matrix with P signal trials
+    and N noise trials
+
+       args:
+          metric: metric name (e.g. 'dprime') or metric function
+                  (e.g. sdt_metrics.dprime)
+
+          P: number of signal trials (HI + MI)
+
+          N: number of noise trials (CR + FA)
+
+       kwds:
+          correction: 'standard' evaluates the metric on the counts as
+                      they are (metrics that need z-scores replace
+                      rates of 0 and 1 with 1/(2N) and 1-1/(2N)).
+                      'loglinear' adds .5 to every cell first (Hautus,
+                      1995), so metric_table('dprime', P, N, 'loglinear')
+                      holds the loglinear_dprime values.
+
+       returns:
+          read-only (P+1, N+1) float64 array where table[h, f] is the
+          metric of SDT(HI=h, MI=P-h, CR=N-f, FA=f)
+
+       The most recently used tables (up to table_cache_size of them)
+       are cached by (metric, P, N, correction).
+    """
+    name = _metric_name(metric)
+    P, N = int(P), int(N)
+    if P < 1 or N < 1:
+        raise ValueError('P and N must be >= 1')
+    if correction not in _corrections:
+        raise ValueError("correction should be one of %s" % _corrections)
+
+    key = (name, P, N, correction)
+    with _tables_lock:
+        if key in _tables:
+            table = _tables.pop(key)
+            _tables[key] = table
+            return table
+
+    table = _build_table(name, P, N, correction)
+
+    with _tables_lock:
+        _tables[key] = table
+        while len(_tables) > max(table_cache_size, 0):
+            _tables.popitem(last=False)
+    return table
+
+def _direct(name, hi, mi, cr, fa, correction):
+    args = [np.asarray(v, dtype=np.float64) for v in (hi, mi, cr, fa)]
+    if correction == 'loglinear':
+        args = [v + .5 for v in args]
+    result = getattr(_kernels, name)(_kernels._Intermediates.from_counts(*args))
+    return np.array(np.broadcast_to(result, args[0].shape), dtype=np.float64)
+
+def metric_lookup(metric, hi, mi, cr, fa, correction='standard'):
+    """
+    evaluates a metric by indexing into metric_table
+
+       hi, mi, cr, and fa are integer counts or arrays of integer
+       counts. The rows are grouped by (HI+MI, CR+FA) design once and
+       each group is looked up in the table of its design. When the
+       designs do not repeat (more of them than table_cache_size, or
+       tables with more cells than there are rows) building the tables
+       would cost more than it saves, and the metric is evaluated with
+       the array kernels instead.
+    """
+    name = _metric_name(metric)
+    if correction not in _corrections:
+        raise ValueError("correction should be one of %s" % _corrections)
+    hi, mi, cr, fa = np.broadcast_arrays(*[np.asarray(v) for v in
+                                           (hi, mi, cr, fa)])
+    if np.any((hi < 0) | (mi < 0) | (cr < 0) | (fa < 0)):
+        raise ValueError('counts must be >= 0')
+    P, N = hi + mi, cr + fa
+
+    if hi.ndim == 0:
+        return float(metric_table(name, P, N, correction)[hi, fa])
+    if hi.size == 0:
+        return np.empty(hi.shape, dtype=np.float64)
+    if P.min() < 1 or N.min() < 1:
+        raise ValueError('P and N must be >= 1')
+
+    # one code per design, sorted once so every design is a slice
+    P, N = P.ravel().astype(np.int64), N.ravel().astype(np.int64)
+    code = P*(int(N.max()) + 1) + N
+    order = np.argsort(code, kind='stable')
+    code = code[order]
+    starts = np.flatnonzero(np.r_[True, code[1:] != code[:-1]])
+    p, n = P[order[starts]], N[order[starts]]
+
+    cells = int(np.sum((p + 1)*(n + 1)))
+    if len(starts) > table_cache_size or cells > hi.size:
+        return _direct(name, hi, mi, cr, fa, correction)
+
+    h, f = hi.ravel()[order], fa.ravel()[order]
+    values = np.empty(hi.size, dtype=np.float64)
+    bounds = np.r_[starts, hi.size].tolist()
+    for j, k, pj, nj in zip(bounds[:-1], bounds[1:], p.tolist(), n.tolist()):
+        values[j:k] = metric_table(name, pj, nj, correction)[h[j:k], f[j:k]]
+
+    result = np.empty(hi.size, dtype=np.float64)
+    result[order] = values
+    return result.reshape(hi.shape)
+
+def clear_table_cache():
+    """empties the metric_table cache"""
+    with _tables_lock:
+        _tables.clear()
@@ -0,0 +1,257 @@
+from __future__ import print_function
+from __future__ import division
+
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+Maximum likelihood fit of the unequal variance Gaussian model
+
+   Noise trials produce evidence from N(0, 1) and signal trials from
+   N(mu, sigma). Ratings are assigned with K-1 increasing criteria
+   c[0] < ... < c[K-2], so the probability that a noise trial gets a
+   rating <= j is Phi(c[j]) and the probability for a signal trial is
+   Phi((c[j] - mu)/sigma). The zROC is a line with slope 1/sigma and
+   intercept mu/sigma.
+
+   The parameters (mu, log(sigma), c[0], ..., c[K-2]) of every subject
+   are fitted at the same time with Fisher scoring. Each iteration
+   builds the score vectors and expected information matrices of all
+   subjects with a few einsums and solves them with one batched
+   np.linalg.solve. Steps that do not increase the likelihood (or that
+   put the criteria out of order) are halved, subject by subject.
+"""
+
+import numpy as np
+
+from . import _kernels
+from ._ratings import SDTRatings
+
+class UVSDFit(object):
+    """
+    Unequal variance Gaussian model fitted to rating scale data
+
+       Attributes are arrays with the subject shape of the data:
+
+          mu: mean of the signal distribution
+
+          sigma: standard deviation of the signal distribution
+
+          criteria: (..., K-1) criterion locations on the noise axis
+
+          slope, intercept: the zROC line (1/sigma and mu/sigma)
+
+          da: d_a = mu*sqrt(2/(1 + sigma**2)), sensitivity in units of
+              the root mean square standard deviation
+
+          az: area under the fitted ROC, Phi(d_a/sqrt(2))
+
+          loglik: multinomial log likelihood at the estimate
+
+          cov: (..., K+1, K+1) inverse information matrix of
+               (mu, log(sigma), criteria)
+
+          grad: largest absolute score at the estimate
+
+          iterations: scoring iterations used
+
+          converged: False where the fit hit max_iter, could not
+                     improve the likelihood, or only improved it with
+                     halved steps (typically because the counts are
+                     perfectly separated and the estimate runs off to
+                     infinity)
+    """
+    def __init__(self, theta, loglik, info, grad, iterations, converged,
+                 shape):
+        p = theta.shape[-1]
+        self.mu = theta[:, 0].reshape(shape)
+        self.sigma = np.exp(theta[:, 1]).reshape(shape)
+        self.criteria = theta[:, 2:].reshape(shape + (p - 2,))
+        self.slope = 1/self.sigma
+        self.intercept = self.mu/self.sigma
+        self.da = self.mu*np.sqrt(2/(1 + self.sigma**2))
+        self.az = _kernels._ncdf(self.da/np.sqrt(2))
+        self.loglik = loglik.reshape(shape)
+        self.cov = _inverse(info).reshape(shape + (p, p))
+        self.grad = grad.reshape(shape)
+        self.iterations = iterations.reshape(shape)
+        self.converged = converged.reshape(shape)
+
+    def __repr__(self):
+        if self.mu.ndim == 0:
+            return '%s(da=%g, slope=%g, converged=%s)' % (
+                self.__class__.__name__, self.da, self.slope, self.converged)
+        return '%s(%i subjects, %i converged)' % (
+            self.__class__.__name__, self.mu.size, np.sum(self.converged))
+
+def _inverse(info):
+    """batched inverse that falls back to the pseudo-inverse"""
+    try:
+        return np.linalg.inv(info)
+    except np.linalg.LinAlgError:
+        return np.linalg.pinv(info)
+
+def _solve(info, score):
+    """batched solve that falls back to the pseudo-inverse"""
+    try:
+        return np.linalg.solve(info, score[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        return np.einsum('spq,sq->sp', np.linalg.pinv(info), score)
+
+def _cells(theta):
+    """
+    returns the noise and signal cell probabilities (S, K) and their
+    derivatives with respect to theta (S, K, K+1)
+    """
+    S, p = theta.shape
+    mu, sigma, c = theta[:, :1], np.exp(theta[:, 1:2]), theta[:, 2:]
+    u = (c - mu)/sigma
+    phi_c, phi_u = _kernels._npdf(c), _kernels._npdf(u)
+
+    # derivatives of the cumulative probabilities (S, K-1, p)
+    j = np.arange(p - 2)
+    dF = np.zeros((S, p - 2, p))
+    dF[:, j, j + 2] = phi_c
+    dG = np.zeros((S, p - 2, p))
+    dG[:, :, 0] = -phi_u/sigma
+    dG[:, :, 1] = -phi_u*u
+    dG[:, j, j + 2] = phi_u/sigma
+
+    zero, one = np.zeros((S, 1)), np.ones((S, 1))
+    pn = np.diff(np.hstack([zero, _kernels._ncdf(c), one]), axis=1)
+    ps = np.diff(np.hstack([zero, _kernels._ncdf(u), one]), axis=1)
+
+    pad = np.zeros((S, 1, p))
+    dpn = np.diff(np.concatenate([pad, dF, pad], axis=1), axis=1)
+    dps = np.diff(np.concatenate([pad, dG, pad], axis=1), axis=1)
+    return pn, ps, dpn, dps
+
+def _loglik(signal, noise, pn, ps):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ll = np.where(noise > 0, noise*np.log(pn), 0.) + \
+             np.where(signal > 0, signal*np.log(ps), 0.)
+    ll = ll.sum(axis=1)
+    valid = np.all(pn > 0, axis=1) & np.all(ps > 0, axis=1)
+    return np.where(valid, ll, -np.inf)
+
+def _score_info(signal, noise, pn, ps, dpn, dps):
+    """score vectors (S, p) and expected information matrices (S, p, p)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        wn = np.where(noise > 0, noise/pn, 0.)
+        ws = np.where(signal > 0, signal/ps, 0.)
+        vn = noise.sum(axis=1, keepdims=True)/pn
+        vs = signal.sum(axis=1, keepdims=True)/ps
+    score = np.einsum('sk,skp->sp', wn, dpn) + \
+            np.einsum('sk,skp->sp', ws, dps)
+    info = np.einsum('sk,skp,skq->spq', vn, dpn, dpn) + \
+           np.einsum('sk,skp,skq->spq', vs, dps, dps)
+    return score, info
+
+def _start(signal, noise):
+    """starting values from a least squares line through the zROC"""
+    S, K = signal.shape
+    hi, mi, cr, fa = SDTRatings(signal, noise).counts()
+    zh = _kernels.ltqnorm((hi + .5)/(hi + mi + 1))
+    zf = _kernels.ltqnorm((fa + .5)/(cr + fa + 1))
+
+    xm, ym = zf.mean(axis=1, keepdims=True), zh.mean(axis=1, keepdims=True)
+    sxx = ((zf - xm)**2).sum(axis=1)
+    sxy = ((zf - xm)*(zh - ym)).sum(axis=1)
+    slope = np.where(sxx > 0, sxy/np.where(sxx > 0, sxx, 1.), 1.)
+    slope = np.clip(slope, .2, 5.)
+    intercept = ym[:, 0] - slope*xm[:, 0]
+
+    # criteria must be strictly increasing
+    c = -zf
+    for j in range(1, K - 1):
+        c[:, j] = np.maximum(c[:, j], c[:, j-1] + 1e-2)
+
+    theta = np.empty((S, K + 1))
+    theta[:, 0] = intercept/slope
+    theta[:, 1] = -np.log(slope)
+    theta[:, 2:] = c
+    return theta
+
+def fit_uvsd(ratings, max_iter=50, tol=1e-8, max_halvings=30):
+    """
+    Fits the unequal variance Gaussian model to rating scale data
+
+       args:
+          ratings: SDTRatings with at least 3 rating levels (the slope
+                   is not identified with 2). Every subject is fitted.
+
+       kwds:
+          max_iter: maximum number of scoring iterations
+
+          tol: a subject has converged when no parameter changes by
+               more than tol
+
+          max_halvings: maximum number of step halvings per iteration
+
+       returns:
+          UVSDFit
+    """
+    if not isinstance(ratings, SDTRatings):
+        raise TypeError('expected SDTRatings')
+    K = ratings.levels
+    if K < 3:
+        raise ValueError('need at least three rating levels')
+
+    shape = ratings.shape
+    signal = ratings.signal.reshape(-1, K).astype(np.float64)
+    noise = ratings.noise.reshape(-1, K).astype(np.float64)
+    if np.any(signal.sum(axis=1) == 0) or np.any(noise.sum(axis=1) == 0):
+        raise ZeroDivisionError('float division by zero')
+    S = signal.shape[0]
+
+    theta = _start(signal, noise)
+    pn, ps, dpn, dps = _cells(theta)
+    loglik = _loglik(signal, noise, pn, ps)
+    score, info = _score_info(signal, noise, pn, ps, dpn, dps)
+
+    iterations = np.zeros(S, dtype=np.int64)
+    converged = np.zeros(S, dtype=bool)
+    active = np.ones(S, dtype=bool)
+
+    for it in range(max_iter):
+        idx = np.flatnonzero(active)
+        if len(idx) == 0:
+            break
+        iterations[idx] += 1
+        step = _solve(info[idx], score[idx])
+
+        # step halving (per subject) until the likelihood improves
+        lam = np.ones(len(idx))
+        pending = np.arange(len(idx))
+        new_theta = theta[idx].copy()
+        for h in range(max_halvings + 1):
+            trial = theta[idx[pending]] + lam[pending, None]*step[pending]
+            cells = _cells(trial)
+            ll = _loglik(signal[idx[pending]], noise[idx[pending]],
+                         *cells[:2])
+            ok = ll >= loglik[idx[pending]] - 1e-12*np.abs(loglik[idx[pending]])
+            new_theta[pending[ok]] = trial[ok]
+            pending = pending[~ok]
+            if len(pending) == 0:
+                break
+            lam[pending] /= 2
+
+        # subjects that could not improve are stopped where they are
+        stalled = np.zeros(len(idx), dtype=bool)
+        stalled[pending] = True
+
+        change = np.max(np.abs(new_theta - theta[idx]), axis=1)
+        theta[idx] = new_theta
+        pn, ps, dpn, dps = _cells(theta[idx])
+        loglik[idx] = _loglik(signal[idx], noise[idx], pn, ps)
+        score[idx], info[idx] = _score_info(signal[idx], noise[idx],
+                                            pn, ps, dpn, dps)
+
+        # a step that had to be halved is not a converged step: on
+        # separated data the halved steps shrink below tol while the
+        # estimate is still running off to infinity
+        done = (change < tol) & (lam == 1) & ~stalled
+        converged[idx[done]] = True
+        active[idx[done | stalled]] = False
+
+    grad = np.max(np.abs(score), axis=1)
+    return UVSDFit(theta, loglik, info, grad, iterations, converged, shape)
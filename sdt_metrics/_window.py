@@ -0,0 +1,170 @@
+from __future__ import print_function
+from __future__ import division
+
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+import numpy as np
+
+from ._sdt_metrics import SDT, HI, MI, CR, FA, _add_metric_methods, \
+                          _snapshot_method
+from ._batch import SDTBatch
+from ._groupby import _cells
+
+class SDTWindow(object):
+    """
+    Sliding window of signal detection counts over time buckets
+
+       Events are added to integer time buckets (e.g. int(time.time())
+       for one second buckets) and the window holds the counts of the
+       last `width` buckets: those in (head - width, head], where head
+       is the newest bucket seen. The counts of every bucket are kept
+       in a ring buffer next to the running totals of the window, so
+       adding an event is O(1) and moving the window forward retires
+       each expired bucket in O(1) (one subtraction from the totals),
+       no matter how many events it held.
+
+       With keys=n the window holds n independent windows (one per
+       model, segment, ...) that share the time axis. Their counts are
+       stored together in a (width, 4, n) ring and (4, n) totals,
+       events name their window with an integer key in range(n), and
+       metrics return an array with one value per key.
+
+       Every metric is available as a method that evaluates the counts
+       in the window, and snapshot() returns them as an SDT (or an
+       SDTBatch with keys).
+
+       Events older than the window are not counted; their number is
+       kept in self.dropped.
+    """
+    def __init__(self, width, keys=None):
+        if width < 1:
+            raise ValueError('width must be >= 1')
+        if keys is not None and keys < 1:
+            raise ValueError('keys must be >= 1')
+        self.width = int(width)
+        self.keys = keys
+        n = 1 if keys is None else int(keys)
+
+        self.buckets = np.zeros((self.width, 4, n), dtype=np.int64)
+        self.totals = np.zeros((4, n), dtype=np.int64)
+        self.head = None
+        self.dropped = 0
+
+    def advance(self, t):
+        """
+        moves the head of the window to bucket t, retiring the buckets
+        that fall out of the window (t older than head is a no-op)
+        """
+        t = int(t)
+        if self.head is None:
+            self.head = t
+            return
+        if t <= self.head:
+            return
+
+        if t - self.head >= self.width:
+            # everything expires
+            self.buckets[:] = 0
+            self.totals[:] = 0
+        else:
+            for b in range(self.head + 1, t + 1):
+                bucket = self.buckets[b % self.width]
+                self.totals -= bucket
+                bucket[:] = 0
+        self.head = t
+
+    def _key_codes(self, key, n):
+        if self.keys is None:
+            if key is not None:
+                raise ValueError('window was created without keys')
+            return np.zeros(n, dtype=np.int64)
+        if key is None:
+            raise ValueError('key is required for keyed windows')
+        key = np.broadcast_to(np.asarray(key, dtype=np.int64), (n,))
+        if n and (key.min() < 0 or key.max() >= self.keys):
+            raise ValueError('key must be in range(keys)')
+        return key
+
+    def update(self, y_true, y_pred, t, key=None):
+        """
+        adds events to the window
+
+           y_true and y_pred are boolean array-likes of the same length
+           (True for signal trials and "yes" responses). t is the time
+           bucket of the events, either one integer or one per event,
+           and key (keyed windows only) the window of the events.
+
+           The window is first advanced to the newest t. Events in
+           buckets that have already expired are dropped.
+        """
+        y_true = np.asarray(y_true, dtype=bool).ravel()
+        y_pred = np.asarray(y_pred, dtype=bool).ravel()
+        if y_true.shape != y_pred.shape:
+            raise ValueError('y_true and y_pred must have the same length')
+        n = len(y_true)
+        t = np.asarray(t, dtype=np.int64)
+        key = self._key_codes(key, n)
+        if t.size:
+            self.advance(t.max())
+        if n == 0:
+            return
+
+        t = np.broadcast_to(t, (n,))
+        live = t > self.head - self.width
+        if not np.all(live):
+            self.dropped += int(n - np.count_nonzero(live))
+            y_true, y_pred, t, key = y_true[live], y_pred[live], t[live], \
+                                     key[live]
+
+        cell = _cells(y_true, y_pred)
+        nkeys = self.totals.shape[1]
+        np.add.at(self.buckets.reshape(-1),
+                  ((t % self.width)*4 + cell)*nkeys + key, 1)
+        np.add.at(self.totals.reshape(-1), cell*nkeys + key, 1)
+
+    def add_counts(self, counts, t):
+        """
+        adds counts that were already tallied for bucket t
+
+           counts is (HI, MI, CR, FA), or a (4, keys) array for keyed
+           windows.
+        """
+        counts = np.asarray(counts, dtype=np.int64)
+        counts = counts.reshape(self.totals.shape)
+        t = int(t)
+        self.advance(t)
+        if t <= self.head - self.width:
+            self.dropped += int(counts.sum())
+            return
+        self.buckets[t % self.width] += counts
+        self.totals += counts
+
+    def clear(self):
+        """empties the window"""
+        self.buckets[:] = 0
+        self.totals[:] = 0
+        self.head = None
+        self.dropped = 0
+
+    def snapshot(self):
+        """returns the counts in the window as an SDT (SDTBatch with keys)"""
+        if self.keys is None:
+            return SDT(list(zip([HI,MI,CR,FA], self.totals[:, 0].tolist())))
+        return SDTBatch._fromdata(self.totals.copy())
+
+    def count(self):
+        """returns count of events in the window (array with keys)"""
+        if self.keys is None:
+            return int(self.totals.sum())
+        return self.totals.sum(axis=0)
+
+    def __repr__(self):
+        if self.keys is None:
+            items = ', '.join(['%s=%i'%(k,v) for k,v in
+                               zip([HI,MI,CR,FA], self.totals[:, 0].tolist())])
+        else:
+            items = 'keys=%i' % self.keys
+        return '%s(width=%i, head=%s, %s)' % (self.__class__.__name__,
+                                             self.width, self.head, items)
+
+_add_metric_methods(SDTWindow, _snapshot_method)
@@ -0,0 +1,156 @@
+from __future__ import print_function
+from __future__ import division
+
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+Memoized z-scores of integer count rates
+
+   With count data every rate handed to ltqnorm is h/n (or
+   (h + .5)/(n + 1) with the loglinear correction) for two small
+   integers, and the same pairs come up over and over. When enabled is
+   True (see set_ztable) the zHI, zFA, loglinear_zHI, and loglinear_zFA
+   intermediates in _kernels are gathered from a triangular table of
+   ltqnorm values instead of being evaluated.
+
+   Row n of a table holds the z-scores of h = 0, ..., n, so a table that
+   covers n <= nmax has (nmax + 1)*(nmax + 2)/2 entries. Tables are
+   filled lazily up to the largest n seen (rounded up to the next power
+   of two so they are not rebuilt for every new n). The standard and
+   loglinear tables share a budget of ztable_cache_size entries: the
+   least recently used table is evicted when a new one does not fit,
+   and rates with n beyond what fits are evaluated directly.
+
+   The gathered z-scores are bit-identical to ltqnorm. The rates 0 and
+   1 of the standard scheme depend on the total number of trials (see
+   _correction) and are always evaluated directly.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# gather z-scores from the tables (off by default)
+enabled = False
+
+# maximum number of float64 entries kept across both tables (32 MB)
+ztable_cache_size = 1 << 22
+
+_ztables = OrderedDict()
+_ztables_lock = threading.Lock()
+
+_corrections = ['standard', 'loglinear']
+
+def _size(nmax):
+    """entries in a table covering n <= nmax"""
+    return (nmax + 1)*(nmax + 2)//2
+
+def _largest_nmax(entries):
+    """largest nmax whose table has at most entries entries"""
+    nmax = int((np.sqrt(8.*entries + 1) - 3)//2)
+    while _size(nmax + 1) <= entries:
+        nmax += 1
+    while nmax >= 0 and _size(nmax) > entries:
+        nmax -= 1
+    return nmax
+
+def _rates(h, n, correction):
+    if correction == 'loglinear':
+        return (h + 0.5)/(n + 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return h/n
+
+def _build_ztable(nmax, correction):
+    from ._kernels import ltqnorm
+    n = np.repeat(np.arange(nmax + 1), np.arange(1, nmax + 2))
+    h = np.arange(len(n)) - n*(n + 1)//2
+    table = ltqnorm(_rates(h, n, correction))
+    table.setflags(write=False)
+    return table
+
+def _ztable(correction, n_needed):
+    """returns (table, nmax) with nmax as close to n_needed as fits"""
+    with _ztables_lock:
+        if correction in _ztables:
+            table, nmax = _ztables.pop(correction)
+            _ztables[correction] = table, nmax
+            if nmax >= n_needed:
+                return table, nmax
+
+        budget = max(ztable_cache_size, 0)
+        cap = _largest_nmax(budget)
+        nmax = min(max(1 << int(n_needed).bit_length(), 64) - 1, cap)
+        if nmax < 0:
+            _ztables.clear()
+            return None, -1
+
+        # evict the least recently used tables until the new one fits
+        _ztables.pop(correction, None)
+        while _ztables and \
+              sum(t.size for t, _ in _ztables.values()) + _size(nmax) > budget:
+            _ztables.popitem(last=False)
+
+    table = _build_ztable(nmax, correction)
+
+    with _ztables_lock:
+        _ztables[correction] = table, nmax
+    return table, nmax
+
+def lookup(h, n, correction='standard', N=None):
+    """
+    z-scores of the rates h/n ('standard', with 0 and 1 replaced by
+    1/(2N) and 1-1/(2N)) or (h + .5)/(n + 1) ('loglinear')
+
+       Returns None when the counts are not integers with
+       0 <= h <= n and n >= 1, so the caller can fall back to
+       evaluating (and raising) the usual way.
+    """
+    h, n = np.broadcast_arrays(np.asarray(h), np.asarray(n))
+    if h.dtype.kind not in 'iu' or n.dtype.kind not in 'iu' or \
+       h.size == 0 or np.any((h < 0) | (h > n) | (n < 1)):
+        return None
+
+    shape = h.shape
+    h, n = h.ravel().astype(np.int64), n.ravel().astype(np.int64)
+    table, nmax = _ztable(correction, int(n.max()))
+
+    inside = n <= nmax
+    if np.all(inside):
+        z = table[n*(n + 1)//2 + h]
+    else:
+        from ._kernels import ltqnorm
+        z = np.empty(h.shape)
+        hi, ni = h[inside], n[inside]
+        if table is not None:
+            z[inside] = table[ni*(ni + 1)//2 + hi]
+        z[~inside] = ltqnorm(_rates(h[~inside], n[~inside], correction))
+
+    if correction == 'standard':
+        edge = (h == 0) | (h == n)
+        if np.any(edge):
+            from ._kernels import ltqnorm
+            N = np.broadcast_to(N, shape).ravel()[edge]
+            z[edge] = ltqnorm(np.where(h[edge] == 0, 1/(2*N), 1-1/(2*N)))
+
+    return z.reshape(shape)
+
+def set_ztable(on=True, cache_size=None):
+    """
+    turns the memoized z-tables on (on=True) or off
+
+       kwds:
+          cache_size: maximum number of float64 entries kept across the
+                      standard and loglinear tables (ztable_cache_size).
+                      Changing it empties the cache.
+    """
+    global enabled, ztable_cache_size
+    enabled = bool(on)
+    if cache_size is not None and int(cache_size) != ztable_cache_size:
+        ztable_cache_size = int(cache_size)
+        clear_ztable_cache()
+
+def clear_ztable_cache():
+    """empties the z-table cache"""
+    with _ztables_lock:
+        _ztables.clear()
@@ -26,27 +26,14 @@ def metric_validation_plot(metric_name, levels=None, N=100, log=False):
           log: specifies whether log transform should be applied
 
     """
-    func = getattr(sdt_metrics, metric_name)
-
-    H,F,A,B = [],[],[],[]
-
     # pcolor thinks the H and F indices are bin edges so we need so
     # the shape of the final arrays need to be (N+2, N+2)
-    for f in xrange(N+2):
-        H.append([])
-        F.append([])
-        A.append([])
-        for h in xrange(N+2):
-            H[-1].append(h)
-            F[-1].append(f)
-            if h > N or f > N:
-                # this would be on the top and right but get excluded
-                # they are set to zero so it doesn't corrupt the colorbar
-                A[-1].append(0)
-            else:
-                A[-1].append(func(h, N-h, N-f, f))
-
-    F,H,A = np.array(F), np.array(H), np.array(A)
+    F,H = np.mgrid[0:N+2, 0:N+2]
+
+    # the cells on the top and right get excluded. They are set to
+    # zero so they don't corrupt the colorbar
+    A = np.zeros((N+2, N+2))
+    A[:N+1, :N+1] = sdt_metrics.metric_table(metric_name, N, N).T
 
     ticks = np.linspace(0,N+1,5)
     matplotlib.rcParams['contour.negative_linestyle'] = 'solid'
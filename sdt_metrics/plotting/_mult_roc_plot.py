@@ -10,12 +10,86 @@ import scipy
 
 from numpy import pi
 from scipy.stats import norm
+from matplotlib.collections import LineCollection
+
+try:
+    import contourpy
+except ImportError:
+    contourpy = None
 
 import sdt_metrics
 from .._sdt_metrics import ltqnorm,HI,MI,CR,FA
 
 _normdist = lambda x : np.exp(-x**2/2.)/np.sqrt(2*pi)
 
+# pHI values the metric surface is evaluated at. The end points are
+# excluded because the z-score based metrics are undefined there.
+_surface_pHI = (np.arange(1024) + .5)/1024
+
+def _metric_surface(metric_func, pFA):
+    """
+    evaluates metric_func.prob at every (_surface_pHI, pFA) pair in one
+    vectorized call. returns a (len(_surface_pHI), len(pFA)) array
+    """
+    with np.errstate(all='ignore'):
+        return metric_func.prob(_surface_pHI[:,None], np.asarray(pFA)[None,:])
+
+# contour lines of the bias isopleths keyed by (metric, N, levels).
+# Each value holds one list of (k, 2) vertex arrays per level.
+_isopleth_cache = {}
+
+def _isopleth_lines(metric, N, levels):
+    """
+    returns the contour lines of metric over an (N+1)x(N+1) count grid
+
+       The surface comes from sdt_metrics.metric_table (vectorized and
+       cached) and the lines are traced once per (metric, N, levels),
+       so later figures with the same isopleths only redraw them.
+    """
+    key = (metric, N, tuple(levels))
+    if key not in _isopleth_cache:
+        Z = sdt_metrics.metric_table(metric, N, N)
+        P = np.arange(N+1)/N
+        gen = contourpy.contour_generator(P, P, np.ma.masked_invalid(Z),
+                                          line_type='Separate')
+        _isopleth_cache[key] = [gen.lines(level) for level in levels]
+    return _isopleth_cache[key]
+
+def _solve_isopleth(metric_func, metric_val, pFA, surface, iters=20):
+    """
+    returns the pHI at each pFA where metric_func(pHI, pFA) == metric_val
+
+       Every pFA is solved at once. The closest point of the surface
+       (see _metric_surface) is taken first. Where the surface crosses
+       metric_val between two neighbouring pHI values the root is then
+       refined with vectorized bisection.
+    """
+    pFA = np.asarray(pFA)
+    D = surface - metric_val
+    D[np.isnan(D)] = np.inf
+    j = np.argmin(np.abs(D), axis=0)
+    Y = _surface_pHI[j]
+
+    # sign change closest to the closest point in each column
+    cross = (np.signbit(D[:-1]) != np.signbit(D[1:])) & \
+            np.isfinite(D[:-1]) & np.isfinite(D[1:])
+    dist = np.where(cross, np.abs(np.arange(len(D)-1)[:,None] - j), len(D))
+    has = np.any(cross, axis=0)
+    k = np.argmin(dist, axis=0)[has]
+    cols = np.flatnonzero(has)
+
+    a, b, da = _surface_pHI[k], _surface_pHI[k+1], D[k, cols]
+    with np.errstate(all='ignore'):
+        for i in range(iters):
+            mid = (a + b)/2
+            dm = metric_func.prob(mid, pFA[cols]) - metric_val
+            same = np.signbit(dm) == np.signbit(da)
+            a, da = np.where(same, mid, a), np.where(same, dm, da)
+            b = np.where(same, b, mid)
+
+    Y[cols] = (a + b)/2
+    return Y
+
 def mult_roc_plot(*args, **kwds):
     """
     Multiple Receiver Operating Characteristic (ROC) curvesPlot
@@ -72,8 +146,6 @@ def mult_roc_plot(*args, **kwds):
     # plot bias isopleths
     #        
     if isopleths in ['c', 'beta', 'c', 'bppd', 'bmz', 'bpp']:
-        bias_func = getattr(sdt_metrics, isopleths)
-
         # get hard-coded parameters and build levels
         if isopleths == 'c':
             start,stop,step = -1.8,1.8,.2
@@ -83,20 +155,28 @@ def mult_roc_plot(*args, **kwds):
             start,stop,step = .1,3.1,.2
         levels=np.arange(start,stop,step)
 
-        # build array data for pylab.contour
         N=100
-        F,H = np.meshgrid(range(N+1),range(N+1))
-        F,H = np.ravel(F),np.ravel(H)
-        Z = np.reshape(bias_func(H,N-H,N-F,F), (N+1,N+1))
-        F,H = np.reshape(F/N,(N+1,N+1)),np.reshape(H/N,(N+1,N+1))
-
-        # to have linewidths vary with the metric we have to
-        # loop through the levels and apply one contour level
-        # at a time
-        for i,level in enumerate(levels):
-            n = len(levels)
-            pylab.contour(F,H,Z, levels=[level], colors='k',
-                          linewidths=.6+2.4*((n-i)/n), alpha=.15)
+        n = len(levels)
+        linewidths = [.6+2.4*((n-i)/n) for i in range(n)]
+
+        if contourpy is not None:
+            # the lines are cached across figures (see _isopleth_lines)
+            lines = _isopleth_lines(isopleths, N, levels)
+            for segments,lw in zip(lines, linewidths):
+                pylab.gca().add_collection(
+                    LineCollection(segments, colors='k',
+                                   linewidths=lw, alpha=.15))
+        else:
+            # build array data for pylab.contour
+            F,H = np.meshgrid(np.arange(N+1)/N, np.arange(N+1)/N)
+            Z = sdt_metrics.metric_table(isopleths, N, N)
+
+            # to have linewidths vary with the metric we have to
+            # loop through the levels and apply one contour level
+            # at a time
+            for level,lw in zip(levels, linewidths):
+                pylab.contour(F,H,Z, levels=[level], colors='k',
+                              linewidths=lw, alpha=.15)
 
         # some feedback
         pylab.text(0.0,-.13,'%s [%0.1f : %0.1f : %0.1f]'\
@@ -108,6 +188,8 @@ def mult_roc_plot(*args, **kwds):
     colors = 'bgrcmyk'
     linestyles = ['-','--','-.',':']
     markerstyles = 'hvs'
+
+    surface = None
     
     #
     # loop through arguments and plot curves
@@ -143,13 +225,12 @@ def mult_roc_plot(*args, **kwds):
             Y = norm.cdf(Z)
 
         else:
-            # this is probably not the best way to do this performance-wise...
-            X = np.linspace(.001,.999,64).tolist()
-            Y = []
-            for pfa in X:
-                func = lambda phi : abs(metric_func(phi,pfa)-metric_val)
-                out = scipy.optimize.fminbound(func, x1=0., x2=1., xtol=1e-3)
-                Y.append(out)
+            # the metric surface is shared by every curve so it is
+            # evaluated once, the first time it is needed
+            X = np.linspace(.001,.999,64)
+            if surface is None:
+                surface = _metric_surface(metric_func, X)
+            Y = _solve_isopleth(metric_func, metric_val, X, surface)
 
         #
         # plot data
@@ -0,0 +1,129 @@
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+This unittest tests the SDTBatch container.
+"""
+
+import unittest
+
+import numpy as np
+
+import sdt_metrics
+from sdt_metrics import SDT, SDTBatch, HI,FA
+
+class TestSDTBatch__init__(unittest.TestCase):
+    def test0(self):
+        """SDTBatch(iterable)"""
+        B = SDTBatch([SDT(HI=20,MI=5,CR=15,FA=10), SDT(HI=3,CR=2)])
+        self.assertEqual(repr(B),
+                         'SDTBatch(HI=[20,  3], MI=[5, 0], CR=[15,  2], FA=[10,  0])')
+        self.assertEqual(B.data.dtype, np.int64)
+        self.assertTrue(B.data.flags['C_CONTIGUOUS'])
+
+    def test1(self):
+        """SDTBatch(**kwds)"""
+        B = SDTBatch(HI=[20,3], MI=[5,0], CR=[15,2])
+        self.assertTrue(np.array_equal(B[FA], [0,0]))
+        self.assertTrue(np.array_equal(B[HI], [20,3]))
+
+    def test2(self):
+        """float counts"""
+        B = SDTBatch(HI=[.5], MI=[1], CR=[1], FA=[1])
+        self.assertEqual(B.data.dtype, np.float64)
+
+    def test3(self):
+        with self.assertRaises(KeyError) as cm:
+            SDTBatch(HI=[1], XX=[2])
+        self.assertEqual(str(cm.exception),"'XX'")
+
+    def test4(self):
+        self.assertEqual(len(SDTBatch()), 0)
+        self.assertEqual(repr(SDTBatch()), 'SDTBatch()')
+
+class TestSDTBatch__getitem__(unittest.TestCase):
+    def setUp(self):
+        self.B = SDTBatch(HI=[20,3,7], MI=[5,0,1], CR=[15,2,9], FA=[10,1,0])
+
+    def test0(self):
+        """integer gives SDT"""
+        self.assertEqual(self.B[1], SDT(HI=3,MI=0,CR=2,FA=1))
+        self.assertEqual(self.B[-1], SDT(HI=7,MI=1,CR=9,FA=0))
+
+    def test1(self):
+        """slice"""
+        self.assertEqual(list(self.B[1:]),
+                         [SDT(HI=3,MI=0,CR=2,FA=1), SDT(HI=7,MI=1,CR=9,FA=0)])
+
+    def test2(self):
+        """boolean mask"""
+        C = self.B[self.B[FA] > 0]
+        self.assertEqual(len(C), 2)
+        self.assertTrue(np.array_equal(C[HI], [20,3]))
+
+    def test3(self):
+        """concatenate"""
+        C = SDTBatch.concatenate([self.B, self.B[:1]])
+        self.assertEqual(len(C), 4)
+        self.assertEqual(C[3], self.B[0])
+
+    def test4(self):
+        """concatenate keeps neff and won't mix weighted and unweighted"""
+        W = sdt_metrics.group_counts([0, 0, 1, 1], [1, 0, 1, 0], [1, 1, 0, 0],
+                                     weights=[1., 3., 2., 2.])[1]
+        C = SDTBatch.concatenate([W, W[1:]])
+        self.assertEqual(C.neff.tolist(), W.neff.tolist() + [W.neff[1]])
+        self.assertEqual(C[2].neff, W[1].neff)
+        self.assertEqual(SDTBatch.concatenate([self.B, self.B]).neff, None)
+        with self.assertRaises(ValueError):
+            SDTBatch.concatenate([W, self.B])
+
+class TestSDTBatch_operators(unittest.TestCase):
+    def setUp(self):
+        self.L = [SDT(HI=10,MI=1,CR=9), SDT(HI=3,MI=4,FA=2)]
+        self.M = [SDT(HI=11,FA=5), SDT(MI=6,CR=1)]
+        self.BL, self.BM = SDTBatch(self.L), SDTBatch(self.M)
+
+    def test0(self):
+        """same results as the SDT operators"""
+        for op in ['__add__', '__sub__', '__or__', '__and__']:
+            R = [getattr(l, op)(m).items() for l, m in zip(self.L, self.M)]
+            D = [sdt.items() for sdt in getattr(self.BL, op)(self.BM)]
+            self.assertEqual(D, R, op)
+
+    def test1(self):
+        """SDT operands are broadcast"""
+        D = SDT(HI=1,FA=1)
+        items = lambda L : [sdt.items() for sdt in L]
+        self.assertEqual(items(self.BL + D), items([l + D for l in self.L]))
+        self.assertEqual(items(D + self.BL), items([D + l for l in self.L]))
+        self.assertEqual(items(D - self.BL), items([D - l for l in self.L]))
+
+class TestSDTBatch_metrics(unittest.TestCase):
+    def test0(self):
+        L = [SDT(HI=20,MI=5,CR=15,FA=10), SDT(HI=3,MI=0,CR=2,FA=1),
+             SDT(HI=0,MI=4,CR=0,FA=7)]
+        B = SDTBatch(L)
+        for name in ['aprime', 'amzs', 'bppd', 'dprime', 'c', 'mcc', 'f1',
+                     'npv', 'loglinear_dprime', 'loglinear_c']:
+            R = [getattr(sdt, name)() for sdt in L]
+            self.assertTrue(np.array_equal(getattr(B, name)(), R), name)
+
+    def test1(self):
+        B = SDTBatch(HI=[20,3], MI=[5,1], CR=[15,2], FA=[10,1])
+        self.assertTrue(np.array_equal(B.count(), [50, 7]))
+        self.assertTrue(np.array_equal(B.p(HI), [.8, .75]))
+        self.assertEqual(B.dprime.__doc__, SDT.dprime.__doc__)
+
+def suite():
+    return unittest.TestSuite((
+            unittest.makeSuite(TestSDTBatch__init__),
+            unittest.makeSuite(TestSDTBatch__getitem__),
+            unittest.makeSuite(TestSDTBatch_operators),
+            unittest.makeSuite(TestSDTBatch_metrics),
+                              ))
+
+if __name__ == "__main__":
+
+    # run tests
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
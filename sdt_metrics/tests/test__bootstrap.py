@@ -0,0 +1,111 @@
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+This unittest tests the bootstrap confidence intervals.
+"""
+
+import unittest
+
+import numpy as np
+
+import sdt_metrics
+from sdt_metrics import SDT, bootstrap_ci
+from sdt_metrics import _bootstrap
+
+class Test_bootstrap_ci(unittest.TestCase):
+    def test0(self):
+        """percentile interval of the resampled tables"""
+        rng = np.random.default_rng(np.random.SeedSequence(7).spawn(1)[0])
+        R = _bootstrap._resample(rng, np.array([[20], [5], [15], [10]]),
+                                 500, 'binomial')
+        theta = [SDT(HI=h, MI=m, CR=c, FA=f).dprime() for h, m, c, f in
+                 zip(*[r.ravel().tolist() for r in R])]
+
+        lo, hi = bootstrap_ci('dprime', 20, 5, 15, 10, B=500, seed=7)
+        self.assertAlmostEqual(lo, np.percentile(theta, 2.5), 12)
+        self.assertAlmostEqual(hi, np.percentile(theta, 97.5), 12)
+
+    def test1(self):
+        """one interval per table, reproducible, contains the estimate"""
+        H, M, C, F = [20, 200, 3], [5, 50, 7], [15, 150, 9], [10, 100, 1]
+        lo, hi = bootstrap_ci(sdt_metrics.mcc, H, M, C, F, seed=1)
+        self.assertEqual(lo.shape, (3,))
+        self.assertTrue(np.all(lo < sdt_metrics.mcc(H, M, C, F)))
+        self.assertTrue(np.all(hi > sdt_metrics.mcc(H, M, C, F)))
+
+        lo2, hi2 = bootstrap_ci(sdt_metrics.mcc, H, M, C, F, seed=1)
+        self.assertTrue(np.array_equal(lo, lo2))
+        self.assertTrue(np.array_equal(hi, hi2))
+
+    def test2(self):
+        """BCa and multinomial resampling"""
+        for sampling in ['binomial', 'multinomial']:
+            lo, hi = bootstrap_ci('aprime', 40, 10, 30, 20, seed=3,
+                                  method='bca', sampling=sampling)
+            self.assertTrue(lo < SDT(HI=40, MI=10, CR=30, FA=20).aprime() < hi)
+
+    def test3(self):
+        """resamples without signal trials are dropped"""
+        lo, hi = bootstrap_ci('accuracy', 1, 0, 0, 1, B=200, seed=0,
+                              sampling='multinomial')
+        self.assertTrue(0. <= lo <= hi <= 1.)
+
+    def test4(self):
+        """jackknife acceleration"""
+        counts = np.array([[6], [2], [5], [3]])
+        a = _bootstrap._acceleration('dprime', counts)[0]
+
+        # leave out each trial in turn
+        trials = sum([[k]*int(v) for k, v in enumerate(counts[:, 0])], [])
+        theta = []
+        for i in range(len(trials)):
+            c = [0, 0, 0, 0]
+            for k in trials[:i] + trials[i+1:]:
+                c[k] += 1
+            theta.append(sdt_metrics.dprime(*c))
+        d = np.mean(theta) - np.array(theta)
+        self.assertAlmostEqual(a, np.sum(d**3)/(6.*np.sum(d**2)**1.5), 12)
+
+    def test5(self):
+        """threads don't change the result"""
+        H = np.arange(1, 41)
+        args = (H, 41 - H, H, 41 - H)
+        blocksize = _bootstrap.blocksize
+        try:
+            _bootstrap.blocksize = 1000
+            R = bootstrap_ci('c', *args, B=100, seed=5)
+            D = bootstrap_ci('c', *args, B=100, seed=5, threads=2)
+        finally:
+            _bootstrap.blocksize = blocksize
+        self.assertTrue(np.array_equal(R[0], D[0]))
+        self.assertTrue(np.array_equal(R[1], D[1]))
+
+    def test6(self):
+        with self.assertRaises(ZeroDivisionError):
+            bootstrap_ci('dprime', 0, 0, 3, 3)
+        with self.assertRaises(ValueError):
+            bootstrap_ci('dprime', 1, 1, 3, 3, method='bogus')
+        with self.assertRaises(ValueError):
+            bootstrap_ci('SDT', 1, 1, 3, 3)
+
+    def test7(self):
+        """float counts are used when whole, never truncated"""
+        self.assertEqual(bootstrap_ci('dprime', 20., 5, 15, 10., seed=1),
+                         bootstrap_ci('dprime', 20, 5, 15, 10, seed=1))
+        with self.assertRaises(ValueError):
+            bootstrap_ci('dprime', 20.5, 5, 15, 10)
+        with self.assertRaises(ValueError):
+            bootstrap_ci('dprime', [20, 3.7], 5, 15, 10)
+        with self.assertRaises(ValueError):
+            bootstrap_ci('dprime', np.nan, 5, 15, 10)
+
+def suite():
+    return unittest.TestSuite((
+            unittest.makeSuite(Test_bootstrap_ci),
+                              ))
+
+if __name__ == "__main__":
+
+    # run tests
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
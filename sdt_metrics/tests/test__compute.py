@@ -0,0 +1,79 @@
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+This unittest tests the multi-metric compute() bundle.
+"""
+
+import unittest
+
+import numpy as np
+
+from sdt_metrics import SDT, SDTBatch, compute, dprime, mcc
+from sdt_metrics import _kernels
+from sdt_metrics._sdt_metrics import _metric_names
+
+class Test_compute(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.counts = rng.randint(1, 30, (4, 50))
+
+    def test0(self):
+        """every metric matches the separate kernel call"""
+        R = compute(_metric_names, *self.counts)
+        self.assertEqual(list(R.keys()), list(_metric_names))
+        for name in _metric_names:
+            self.assertEqual(R[name].tolist(),
+                             _kernels.direct(name, *self.counts).tolist())
+
+    def test1(self):
+        """record output, functions, and duplicates"""
+        R = compute([dprime, 'beta', 'c', mcc, 'dprime'], *self.counts,
+                    output='record')
+        self.assertEqual(R.dtype.names, ('dprime', 'beta', 'c', 'mcc'))
+        self.assertEqual(R.shape, (50,))
+        self.assertEqual(R.c.tolist(),
+                         _kernels.direct('c', *self.counts).tolist())
+
+    def test2(self):
+        """Python numbers and sequences"""
+        R = compute(['dprime', 'accuracy'], 10, 5, 8, 7)
+        self.assertAlmostEqual(R['dprime'], SDT(HI=10, MI=5, CR=8,
+                                                FA=7).dprime(), 12)
+        self.assertTrue(isinstance(R['accuracy'], float))
+        R = compute(['b'], [1, 2], [3, 4], 5, 6)
+        self.assertEqual(R['b'], _kernels.direct('b', [1, 2], [3, 4], 5, 6))
+
+    def test3(self):
+        """SDTBatch.compute and shared intermediates"""
+        B = SDTBatch._fromdata(self.counts)
+        R = B.compute(['dprime', 'beta', 'loglinear_c', 'mutual_info'])
+        self.assertEqual(R['mutual_info'].tolist(), B.mutual_info().tolist())
+
+        x = _kernels._Intermediates(*self.counts)
+        _kernels.dprime(x)
+        zHI = x.zHI
+        _kernels.beta(x)
+        self.assertTrue(x.zHI is zHI)
+        self.assertEqual((x.pSignal + x.pNoise).tolist(), [1.]*50)
+        self.assertEqual((x.pYes + x.pNo).tolist(), [1.]*50)
+
+    def test4(self):
+        with self.assertRaises(ValueError):
+            compute(['foo'], 1, 2, 3, 4)
+        with self.assertRaises(ValueError):
+            compute([], 1, 2, 3, 4)
+        with self.assertRaises(ValueError):
+            compute(['c'], 1, 2, 3, 4, output='frame')
+        with self.assertRaises(ZeroDivisionError):
+            compute(['dprime', 'mcc'], [0, 1], [0, 1], 3, 4)
+
+def suite():
+    return unittest.TestSuite((
+            unittest.makeSuite(Test_compute),
+                              ))
+
+if __name__ == "__main__":
+
+    # run tests
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
@@ -0,0 +1,111 @@
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+This unittest tests the exponentially decayed SDTDecay counts.
+"""
+
+import unittest
+
+import numpy as np
+
+from sdt_metrics import SDT, SDTDecay, dprime
+from sdt_metrics import _kernels
+
+def _brute_counts(events, half_life, now):
+    """sums 2**(-age/half_life) over the events of each type"""
+    counts = dict(HI=0., MI=0., CR=0., FA=0.)
+    for t, y, p in events:
+        counts[('CR', 'FA', 'MI', 'HI')[2*y + p]] += 2**(-(now-t)/half_life)
+    return [counts[k] for k in ['HI', 'MI', 'CR', 'FA']]
+
+class Test_SDTDecay(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.t = np.sort(rng.uniform(0, 100, 500))
+        self.y = rng.rand(500) < .5
+        self.p = rng.rand(500) < .3 + .4*self.y
+        self.events = list(zip(self.t.tolist(), self.y.tolist(),
+                               self.p.tolist()))
+
+    def test0(self):
+        """event by event, in chunks, and out of order"""
+        R = _brute_counts(self.events, 20., self.t[-1])
+        D = SDTDecay(20.)
+        for i in range(0, 500, 37):
+            D.update(self.y[i:i+37], self.p[i:i+37], self.t[i:i+37])
+        np.testing.assert_allclose(D.counts, R, rtol=1e-12)
+
+        order = np.random.RandomState(1).permutation(500)
+        D = SDTDecay(20.)
+        for i in order:
+            D.update([self.y[i]], [self.p[i]], self.t[i])
+        np.testing.assert_allclose(D.counts, R, rtol=1e-12)
+        self.assertEqual(D.time, self.t[-1])
+
+    def test1(self):
+        """workers with different timestamps merge"""
+        workers = [SDTDecay(20.) for i in range(3)]
+        for i, (t, y, p) in enumerate(self.events):
+            workers[i % 3].update([y], [p], t)
+        workers[1].advance(150.)
+        M = SDTDecay.merge(workers)
+        self.assertEqual(M.time, 150.)
+        np.testing.assert_allclose(M.counts,
+                                   _brute_counts(self.events, 20., 150.),
+                                   rtol=1e-12)
+        np.testing.assert_allclose((workers[0] + workers[2]).counts_at(150.),
+                                   M.counts - workers[1].counts, rtol=1e-12)
+
+    def test2(self):
+        """metrics on fractional counts"""
+        D = SDTDecay(5.)
+        D.update(self.y, self.p, self.t)
+        counts = D.counts.tolist()
+        self.assertAlmostEqual(D.mcc(), SDT(list(zip(['HI', 'MI', 'CR', 'FA'],
+                                                     counts))).mcc(), 14)
+        self.assertAlmostEqual(D.dprime(), dprime.direct(*counts), 12)
+        self.assertAlmostEqual(D.loglinear_c(),
+                               _kernels.direct('loglinear_c',
+                                               *np.array(counts)), 12)
+
+        # rates don't change with the read time
+        self.assertAlmostEqual(D.snapshot(self.t[-1] + 50).accuracy(),
+                               D.accuracy(), 14)
+
+    def test3(self):
+        """standard correction with less than one trial in total"""
+        D = SDTDecay(1.)
+        D.add_counts((1, 0, 1, 0), 0.)
+        D.advance(10.)
+        self.assertTrue(D.count() < 1)
+        self.assertAlmostEqual(D.dprime(), 0., 14)
+        self.assertEqual(
+            _kernels.direct('dprime', np.array([.3]), 0., .1, .05).tolist(),
+            [SDT(HI=.3, MI=0., CR=.1, FA=.05).dprime()])
+
+    def test4(self):
+        with self.assertRaises(ValueError):
+            SDTDecay(0)
+        with self.assertRaises(ValueError):
+            SDTDecay(1.) + SDTDecay(2.)
+        with self.assertRaises(ValueError):
+            SDTDecay(1.).update([1, 0], [1], 0.)
+
+    def test5(self):
+        """fractional counts show in the snapshot repr"""
+        D = SDTDecay(1.)
+        D.update([1, 1, 0], [1, 0, 0], 0.)
+        D.update([0], [1], 2.)
+        self.assertEqual(repr(D.snapshot()),
+                         'SDT(HI=0.25, MI=0.25, CR=0.25, FA=1)')
+
+def suite():
+    return unittest.TestSuite((
+            unittest.makeSuite(Test_SDTDecay),
+                              ))
+
+if __name__ == "__main__":
+
+    # run tests
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
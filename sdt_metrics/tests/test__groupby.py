@@ -0,0 +1,131 @@
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+This unittest tests the group-by aggregation of trial data.
+"""
+
+import unittest
+
+import numpy as np
+
+from sdt_metrics import SDT, SDTBatch, SDTAccumulator, group_counts
+from sdt_metrics import _groupby
+
+def _brute_counts(groups, y_true, y_pred):
+    """one SDT per group, one event at a time"""
+    sdts = {}
+    for g, t, p in zip(groups, y_true, y_pred):
+        sdt = sdts.setdefault(g, SDT(HI=0, MI=0, CR=0, FA=0))
+        sdt[('CR', 'FA', 'MI', 'HI')[2*t + p]] += 1
+    return sdts
+
+class Test_group_counts(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.subject = rng.choice(['s01', 's02', 's03', 's04'], 2000)
+        self.condition = rng.randint(0, 3, 2000)
+        self.y_true = rng.rand(2000) < .5
+        self.y_pred = rng.rand(2000) < .3 + .4*self.y_true
+
+    def test0(self):
+        keys, B = group_counts(self.subject, self.y_true, self.y_pred)
+        R = _brute_counts(self.subject.tolist(), self.y_true.tolist(),
+                          self.y_pred.tolist())
+        self.assertTrue(isinstance(B, SDTBatch))
+        self.assertEqual(keys.tolist(), sorted(R))
+        for k, sdt in zip(keys, B):
+            self.assertEqual(list(sdt.items()), list(R[k].items()))
+
+    def test1(self):
+        """tuple of keys"""
+        keys, B = group_counts((self.subject, self.condition),
+                               self.y_true, self.y_pred)
+        R = _brute_counts(list(zip(self.subject.tolist(),
+                                   self.condition.tolist())),
+                          self.y_true.tolist(), self.y_pred.tolist())
+        self.assertEqual(list(zip(*[k.tolist() for k in keys])), sorted(R))
+        for i, k in enumerate(zip(*keys)):
+            self.assertEqual(list(B[i].items()),
+                             list(R[(str(k[0]), int(k[1]))].items()))
+        self.assertEqual(B.dprime().tolist(),
+                         [R[k].dprime() for k in sorted(R)])
+
+    def test2(self):
+        """integer codes with ngroups, chunked"""
+        chunksize = _groupby.chunksize
+        try:
+            _groupby.chunksize = 128
+            keys, B = group_counts(self.condition, self.y_true, self.y_pred,
+                                   ngroups=5)
+        finally:
+            _groupby.chunksize = chunksize
+        R = _brute_counts(self.condition.tolist(), self.y_true.tolist(),
+                          self.y_pred.tolist())
+        self.assertEqual(keys.tolist(), [0, 1, 2, 3, 4])
+        for k in range(3):
+            self.assertEqual(list(B[k].items()), list(R[k].items()))
+        self.assertEqual(B.count().tolist()[3:], [0, 0])
+        self.assertEqual(B.count().sum(), 2000)
+
+    def test3(self):
+        with self.assertRaises(ValueError):
+            group_counts([0, 1], [1, 0, 1], [1, 0, 1])
+        with self.assertRaises(ValueError):
+            group_counts([0, 5], [1, 0], [1, 0], ngroups=5)
+        with self.assertRaises(TypeError):
+            group_counts(['a', 'b'], [1, 0], [1, 0], ngroups=2)
+        keys, B = group_counts([], [], [])
+        self.assertEqual(len(B), 0)
+
+class Test_group_counts_weights(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(1)
+        self.groups = rng.randint(0, 6, 3000)
+        self.y_true = rng.rand(3000) < .5
+        self.y_pred = rng.rand(3000) < .3 + .4*self.y_true
+        self.w = rng.gamma(2., 1., 3000)
+
+    def test0(self):
+        """each group matches a weighted SDTAccumulator"""
+        keys, B = group_counts(self.groups, self.y_true, self.y_pred,
+                               weights=self.w)
+        self.assertEqual(B.data.dtype, np.float64)
+        for i, k in enumerate(keys):
+            A = SDTAccumulator()
+            mask = self.groups == k
+            A.update(self.y_true[mask], self.y_pred[mask], self.w[mask])
+            np.testing.assert_allclose(B.data[:, i], A.counts, rtol=1e-12)
+            self.assertAlmostEqual(B.neff[i], A.neff, 8)
+            self.assertAlmostEqual(B[i].neff, B.neff[i], 14)
+            for name in ['dprime', 'c', 'beta', 'mcc']:
+                self.assertAlmostEqual(getattr(B, name)()[i],
+                                       getattr(A, name)(), 10)
+
+    def test1(self):
+        """neff reaches the correction through slices and compute"""
+        self.y_pred[self.groups == 2] = self.y_true[self.groups == 2]
+        keys, B = group_counts(self.groups, self.y_true, self.y_pred,
+                               weights=self.w)
+        U = SDTBatch._fromdata(B.data)
+        self.assertNotEqual(B.dprime()[2], U.dprime()[2])
+        self.assertEqual(B[1:4].dprime().tolist(), B.dprime()[1:4].tolist())
+        self.assertEqual(B.dprime(threads=2).tolist(), B.dprime().tolist())
+        self.assertEqual(B.compute(['dprime'])['dprime'].tolist(),
+                         B.dprime().tolist())
+        self.assertEqual(B[2].dprime(), B.dprime()[2])
+
+    def test2(self):
+        with self.assertRaises(ValueError):
+            group_counts([0, 1], [1, 0], [1, 0], weights=[1.])
+
+def suite():
+    return unittest.TestSuite((
+            unittest.makeSuite(Test_group_counts),
+            unittest.makeSuite(Test_group_counts_weights),
+                              ))
+
+if __name__ == "__main__":
+
+    # run tests
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
@@ -0,0 +1,193 @@
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+This unittest tests the array kernels behind the _vmethod functions.
+"""
+
+import unittest
+import itertools
+
+import numpy as np
+
+import sdt_metrics
+from sdt_metrics import SDT
+
+# metrics that are bit-identical to the scalar SDT methods
+EXACT = ['aprime', 'amzs', 'bpp', 'bph', 'bppd', 'bmz', 'b', 'dprime',
+         'c', 'accuracy', 'mcc', 'precision', 'recall', 'f1', 'ppv',
+         'npv', 'fdr', 'sensitivity', 'specificity', 'loglinear_bppd',
+         'loglinear_dprime', 'loglinear_c']
+
+# metrics that go through np.exp or np.log and can differ in the last ulp
+APPROX = ['beta', 'loglinear_beta', 'mutual_info']
+
+def _grid(n=6):
+    """every table with counts 0..n and both rates defined"""
+    rows = [r for r in itertools.product(range(n+1), repeat=4)
+            if r[0] + r[1] > 0 and r[2] + r[3] > 0]
+    return [np.array(v) for v in zip(*rows)]
+
+class Test_direct(unittest.TestCase):
+    def setUp(self):
+        self.H, self.M, self.C, self.F = _grid()
+        self.sdts = [SDT(HI=h, MI=m, CR=c, FA=f) for h, m, c, f in
+                     zip(self.H.tolist(), self.M.tolist(),
+                         self.C.tolist(), self.F.tolist())]
+
+    def test0(self):
+        """exact metrics"""
+        for name in EXACT:
+            R = np.array([getattr(sdt, name)() for sdt in self.sdts], float)
+            D = getattr(sdt_metrics, name)(self.H, self.M, self.C, self.F)
+            self.assertTrue(isinstance(D, np.ndarray))
+            self.assertTrue(np.array_equal(R, D), name)
+
+    def test1(self):
+        """log/exp metrics"""
+        for name in APPROX:
+            R = np.array([getattr(sdt, name)() for sdt in self.sdts], float)
+            D = getattr(sdt_metrics, name)(self.H, self.M, self.C, self.F)
+            np.testing.assert_allclose(D, R, rtol=1e-14, atol=1e-15)
+
+    def test2(self):
+        """empty signal class raises like the scalar path"""
+        with self.assertRaises(ZeroDivisionError):
+            sdt_metrics.dprime(np.array([0, 1]), np.array([0, 1]),
+                               np.array([1, 1]), np.array([1, 1]))
+
+    def test3(self):
+        """lists in, list out"""
+        D = sdt_metrics.dprime([20, 12], [5, 3], [15, 4], [10, 34])
+        self.assertTrue(isinstance(D, list))
+        self.assertEqual(D[0], SDT(HI=20, MI=5, CR=15, FA=10).dprime())
+
+    def test4(self):
+        """broadcasting"""
+        D = sdt_metrics.ppv(np.arange(4), 1, 1, 2)
+        self.assertEqual(D.shape, (4,))
+
+class Test_prob(unittest.TestCase):
+    def setUp(self):
+        self.pHI = np.linspace(0., 1., 21)[:, None] * np.ones((1, 21))
+        self.pFA = self.pHI.T.copy()
+
+    def test0(self):
+        for name in EXACT:
+            metric = getattr(sdt_metrics, name)
+            if not hasattr(metric, 'prob') or name in ['dprime', 'c']:
+                continue
+            R = [metric.prob(h, f) for h, f in
+                 zip(self.pHI.ravel().tolist(), self.pFA.ravel().tolist())]
+            D = metric.prob(self.pHI, self.pFA)
+            self.assertEqual(D.shape, (21, 21))
+            self.assertTrue(np.array_equal(np.array(R), D.ravel()), name)
+
+    def test1(self):
+        """dprime needs counts to correct extreme rates"""
+        with self.assertRaises(ValueError):
+            sdt_metrics.dprime(np.array([0., .5]), np.array([.5, .5]))
+
+    def test2(self):
+        D = sdt_metrics.dprime(np.array([.8, .6]), np.array([.4, .1]))
+        self.assertEqual(D[0], sdt_metrics.dprime(.8, .4))
+        self.assertEqual(D[1], sdt_metrics.dprime(.6, .1))
+
+class Test_ltqnorm(unittest.TestCase):
+    def setUp(self):
+        self.p = np.concatenate([np.linspace(1e-12, .05, 500),
+                                 np.linspace(.05, .95, 500),
+                                 np.linspace(.95, 1-1e-12, 500)])
+
+    def test0(self):
+        """bit-identical to the scalar version"""
+        R = [sdt_metrics.ltqnorm(v) for v in self.p.tolist()]
+        self.assertTrue(np.array_equal(sdt_metrics.ltqnorm(self.p), R))
+
+    def test1(self):
+        """out= and in place"""
+        R = sdt_metrics.ltqnorm(self.p)
+        out = np.empty_like(self.p)
+        self.assertTrue(sdt_metrics.ltqnorm(self.p, out=out) is out)
+        self.assertTrue(np.array_equal(out, R))
+
+        p = self.p.copy()
+        sdt_metrics.ltqnorm(p, out=p)
+        self.assertTrue(np.array_equal(p, R))
+
+        for dtype in [np.float32, np.int64]:
+            with self.assertRaises(TypeError):
+                sdt_metrics.ltqnorm(self.p, out=np.empty(self.p.shape, dtype))
+
+    def test2(self):
+        """boundaries and invalid values don't raise"""
+        z = sdt_metrics.ltqnorm(np.array([0., 1., -.1, 1.1, np.nan, .5]))
+        self.assertEqual(z[0], -np.inf)
+        self.assertEqual(z[1], np.inf)
+        self.assertTrue(np.all(np.isnan(z[2:5])))
+        self.assertEqual(z[5], 0.)
+
+    def test3(self):
+        """Halley refinement"""
+        # Phi(1.959963984540054) == .975
+        p, z = .975, 1.959963984540054
+        self.assertAlmostEqual(sdt_metrics.ltqnorm(p, refine=True), z, 14)
+        self.assertAlmostEqual(
+            sdt_metrics.ltqnorm(np.array([p]), refine=True)[0], z, 14)
+
+        p = self.p.copy()
+        R = sdt_metrics.ltqnorm(self.p, refine=True)
+        sdt_metrics.ltqnorm(p, out=p, refine=True)
+        self.assertTrue(np.array_equal(p, R))
+
+class Test_var(unittest.TestCase):
+    def setUp(self):
+        self.H, self.M, self.C, self.F = _grid(4)
+
+    def test0(self):
+        """arrays agree with the scalar path"""
+        for name in ['dprime', 'c', 'beta', 'aprime']:
+            metric = getattr(sdt_metrics, name)
+            R = [metric.var(*v) for v in zip(self.H.tolist(), self.M.tolist(),
+                                             self.C.tolist(), self.F.tolist())]
+            D = metric.var(self.H, self.M, self.C, self.F)
+            np.testing.assert_allclose(D, R, rtol=1e-13, atol=1e-16)
+            np.testing.assert_allclose(
+                metric.se(self.H, self.M, self.C, self.F), np.sqrt(R),
+                rtol=1e-13)
+
+    def test1(self):
+        """delta method by finite differences"""
+        hi, mi, cr, fa = 30, 10, 25, 15
+        P, N = hi + mi, cr + fa
+        h, f, e = hi/P, fa/N, 1e-6
+        for name in ['dprime', 'c', 'beta', 'aprime']:
+            metric = getattr(sdt_metrics, name)
+            gh = (metric.prob(h+e, f) - metric.prob(h-e, f))/(2*e)
+            gf = (metric.prob(h, f+e) - metric.prob(h, f-e))/(2*e)
+            R = gh*gh*h*(1-h)/P + gf*gf*f*(1-f)/N
+            self.assertAlmostEqual(metric.var(hi, mi, cr, fa)/R, 1., 6)
+
+    def test2(self):
+        """below the diagonal"""
+        self.assertAlmostEqual(sdt_metrics.aprime.var(10, 30, 15, 25),
+                               sdt_metrics.aprime.var(25, 15, 30, 10), 15)
+
+    def test3(self):
+        self.assertTrue(isinstance(sdt_metrics.dprime.se([20, 12], [5, 3],
+                                                         [15, 4], [10, 34]),
+                                   list))
+        self.assertFalse(hasattr(sdt_metrics.mcc, 'var'))
+
+def suite():
+    return unittest.TestSuite((
+            unittest.makeSuite(Test_direct),
+            unittest.makeSuite(Test_prob),
+            unittest.makeSuite(Test_ltqnorm),
+            unittest.makeSuite(Test_var),
+                              ))
+
+if __name__ == "__main__":
+
+    # run tests
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
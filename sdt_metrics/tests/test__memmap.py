@@ -0,0 +1,79 @@
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+This unittest tests the out-of-core metric evaluation.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from sdt_metrics import dprime, metric_file
+from sdt_metrics import _kernels
+
+class Test_metric_file(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        rng = np.random.RandomState(0)
+        self.counts = rng.randint(1, 40, (4, 6, 7, 5))
+        self.path = os.path.join(self.tmp, 'counts.npy')
+        np.save(self.path, self.counts)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test0(self):
+        """.npy in, .npy out, chunks smaller than the file"""
+        out = os.path.join(self.tmp, 'dprime.npy')
+        D = metric_file('dprime', self.path, out, chunksize=17)
+        self.assertTrue(isinstance(D, np.memmap))
+        self.assertEqual(D.shape, (6, 7, 5))
+        R = dprime.direct(*self.counts)
+        self.assertEqual(D.tolist(), R.tolist())
+        del D
+        self.assertEqual(np.load(out).tolist(), R.tolist())
+
+    def test1(self):
+        """memmap in, array out, threads"""
+        counts = np.load(self.path, mmap_mode='r')
+        out = np.zeros((6, 7, 5))
+        D = metric_file(_kernels.mcc, counts, out, chunksize=40, threads=2)
+        self.assertTrue(D is out)
+        self.assertEqual(D.tolist(),
+                         _kernels.direct('mcc', *self.counts).tolist())
+
+    def test2(self):
+        """chunk boundaries don't matter"""
+        R = metric_file('beta', self.path)
+        for chunksize in [1, 7, 210, 1000]:
+            self.assertEqual(metric_file('beta', self.path,
+                                         chunksize=chunksize).tolist(),
+                             R.tolist())
+
+    def test3(self):
+        with self.assertRaises(ValueError):
+            metric_file('foo', self.path)
+        with self.assertRaises(ValueError):
+            metric_file('dprime', self.counts[:3])
+        with self.assertRaises(ValueError):
+            metric_file('dprime', np.asfortranarray(self.counts))
+        with self.assertRaises(ValueError):
+            metric_file('dprime', self.path, np.zeros((6, 7)))
+        with self.assertRaises(ZeroDivisionError):
+            c = self.counts.copy()
+            c[:2, 3, 3, 3] = 0
+            metric_file('dprime', c, chunksize=9)
+
+def suite():
+    return unittest.TestSuite((
+            unittest.makeSuite(Test_metric_file),
+                              ))
+
+if __name__ == "__main__":
+
+    # run tests
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
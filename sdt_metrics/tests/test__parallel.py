@@ -0,0 +1,199 @@
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+This unittest tests the process and thread pool evaluation in _parallel.
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from sdt_metrics import SDTBatch, dprime, mcc, threshold_sweep, auc
+from sdt_metrics import _kernels, _parallel
+
+def _counts(n, seed=0):
+    rng = np.random.RandomState(seed)
+    return rng.randint(1, 50, (4, n))
+
+class Test_direct(unittest.TestCase):
+    def test0(self):
+        """chunks are reassembled in order"""
+        hi, mi, cr, fa = _counts(1000)
+        with ProcessPoolExecutor(2) as executor:
+            for metric in ['dprime', 'beta', 'aprime', 'mcc']:
+                R = _kernels.direct(metric, hi, mi, cr, fa)
+                D = _parallel.direct(metric, hi, mi, cr, fa,
+                                     executor=executor, chunksize=97)
+                self.assertEqual(D.tolist(), R.tolist())
+
+    def test1(self):
+        """broadcasting, shape, and list output"""
+        hi, mi, cr, fa = _counts(60).reshape(4, 3, 20)
+        with ProcessPoolExecutor(2) as executor:
+            D = _parallel.direct('c', hi, mi, cr[0], 7,
+                                 executor=executor, chunksize=7)
+            L = _parallel.direct('c', hi[0].tolist(), 5, 6, 7,
+                                 executor=executor, chunksize=7)
+        self.assertEqual(D.shape, (3, 20))
+        self.assertEqual(D.tolist(),
+                         _kernels.direct('c', hi, mi, cr[0], 7).tolist())
+        self.assertEqual(L, _kernels.direct('c', hi[0].tolist(), 5, 6, 7))
+
+    def test2(self):
+        """exceptions in a chunk are raised in the caller"""
+        hi, mi, cr, fa = _counts(100)
+        hi[77] = mi[77] = 0
+        with ProcessPoolExecutor(2) as executor:
+            with self.assertRaises(ZeroDivisionError):
+                _parallel.direct('dprime', hi, mi, cr, fa,
+                                 executor=executor, chunksize=10)
+
+    def test3(self):
+        """process pool started by direct"""
+        hi, mi, cr, fa = _counts(5000)
+        D = _parallel.direct('dprime', hi, mi, cr, fa, workers=2,
+                             chunksize=1000)
+        self.assertEqual(D.tolist(),
+                         _kernels.direct('dprime', hi, mi, cr, fa).tolist())
+
+    def test4(self):
+        with self.assertRaises(ValueError):
+            _parallel.direct('foo', 1, 2, 3, 4, workers=2)
+        self.assertEqual(_parallel.direct('dprime', [], [], [], []), [])
+
+class Test_call_keywords(unittest.TestCase):
+    def test0(self):
+        """workers= and threads= on the plain metric call"""
+        hi, mi, cr, fa = _counts(_parallel.minchunk + 100, 7)
+        R = _kernels.direct('dprime', hi, mi, cr, fa).tolist()
+        self.assertEqual(dprime(hi, mi, cr, fa, workers=2).tolist(), R)
+        self.assertEqual(dprime(hi, mi, cr, fa, threads=2).tolist(), R)
+        with ThreadPoolExecutor(2) as executor:
+            self.assertEqual(dprime(hi, mi, cr, fa,
+                                    executor=executor).tolist(), R)
+
+    def test1(self):
+        """the process pool leaves nothing on stderr"""
+        script = '\n'.join([
+            'import numpy as np',
+            'from sdt_metrics import dprime, _parallel',
+            'c = np.random.RandomState(0).randint(1, 50, '
+            '(4, _parallel.minchunk + 100))',
+            'dprime.direct(*c, workers=2)',
+            'dprime.direct(*c, workers=2, chunksize=10000)'])
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+                   os.path.abspath(__file__))))
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(
+            [root] + [p for p in [env.get('PYTHONPATH')] if p])
+        proc = subprocess.run([sys.executable, '-c', script], env=env,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.assertEqual(proc.returncode, 0)
+        self.assertEqual(proc.stderr.decode(), '')
+
+    def test2(self):
+        """keywords left at None don't start a pool"""
+        hi, mi, cr, fa = _counts(_parallel.minchunk + 100)
+        R = _kernels.direct('dprime', hi, mi, cr, fa).tolist()
+
+        def no_pool(*args, **kwds):
+            raise AssertionError('pool started')
+        saved = os.cpu_count, _parallel._process_direct, \
+                _parallel._thread_direct
+        os.cpu_count = lambda: 4
+        _parallel._process_direct = _parallel._thread_direct = no_pool
+        try:
+            for kwds in [dict(threads=None), dict(workers=None),
+                         dict(workers=None, threads=None, executor=None)]:
+                self.assertEqual(dprime(hi, mi, cr, fa, **kwds).tolist(), R)
+                self.assertEqual(_parallel.direct('dprime', hi, mi, cr, fa,
+                                                  **kwds).tolist(), R)
+            self.assertEqual(dprime(.6, .3, threads=None), dprime(.6, .3))
+        finally:
+            os.cpu_count, _parallel._process_direct, \
+                _parallel._thread_direct = saved
+
+class Test_batch_workers(unittest.TestCase):
+    def test0(self):
+        data = _counts(300, 1)
+        batch = SDTBatch._fromdata(data)
+        with ProcessPoolExecutor(2) as executor:
+            self.assertEqual(batch.mcc(executor=executor).tolist(),
+                             batch.mcc().tolist())
+            self.assertEqual(dprime.direct(*data, executor=executor).tolist(),
+                             dprime.direct(*data).tolist())
+
+    def test1(self):
+        """small batches stay serial without an executor"""
+        batch = SDTBatch._fromdata(_counts(10, 2))
+        self.assertEqual(batch.mcc(workers=4).tolist(),
+                         mcc.direct(*batch.data).tolist())
+
+class Test_threads(unittest.TestCase):
+    def test0(self):
+        """tiles are reassembled in order"""
+        hi, mi, cr, fa = _counts(3000, 3)
+        tilesize = _parallel.tilesize
+        try:
+            _parallel.tilesize = 64
+            for metric in ['dprime', 'beta', 'aprime', 'mcc']:
+                R = _kernels.direct(metric, hi, mi, cr, fa)
+                D = _parallel.direct(metric, hi, mi, cr, fa, threads=3,
+                                     chunksize=1000)
+                self.assertEqual(D.tolist(), R.tolist())
+        finally:
+            _parallel.tilesize = tilesize
+
+    def test1(self):
+        """shared ThreadPoolExecutor and exceptions"""
+        hi, mi, cr, fa = _counts(500, 4)
+        with ThreadPoolExecutor(2) as executor:
+            D = _parallel.direct('c', hi, mi, cr, fa, executor=executor,
+                                 chunksize=50)
+            self.assertEqual(D.tolist(),
+                             _kernels.direct('c', hi, mi, cr, fa).tolist())
+
+            cr[321] = fa[321] = 0
+            with self.assertRaises(ZeroDivisionError):
+                _parallel.direct('c', hi, mi, cr, fa, executor=executor,
+                                 chunksize=50)
+
+    def test2(self):
+        """metrics across a threshold sweep"""
+        rng = np.random.RandomState(5)
+        labels = rng.rand(30000) < .4
+        scores = rng.normal(labels*1., 1.)
+        T, B = threshold_sweep(scores, labels)
+        self.assertEqual(B.mcc(threads=2).tolist(), B.mcc().tolist())
+        self.assertEqual(B.accuracy(threads=2).tolist(),
+                         B.accuracy().tolist())
+
+    def test3(self):
+        """columns of auc on threads"""
+        rng = np.random.RandomState(6)
+        labels = rng.rand(200) < .5
+        scores = rng.normal(labels[:, None]*np.arange(7), 1., (200, 7))
+        self.assertEqual(auc(scores, labels, threads=3).tolist(),
+                         auc(scores, labels).tolist())
+
+    def test4(self):
+        with self.assertRaises(ValueError):
+            _parallel.direct('c', 1, 2, 3, 4, workers=2, threads=2)
+
+def suite():
+    return unittest.TestSuite((
+            unittest.makeSuite(Test_direct),
+            unittest.makeSuite(Test_call_keywords),
+            unittest.makeSuite(Test_batch_workers),
+            unittest.makeSuite(Test_threads),
+                              ))
+
+if __name__ == "__main__":
+
+    # run tests
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
@@ -0,0 +1,82 @@
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+This unittest tests the rating scale container.
+"""
+
+import unittest
+
+import numpy as np
+
+from sdt_metrics import SDT, SDTBatch, SDTRatings
+
+class TestSDTRatings__init__(unittest.TestCase):
+    def test0(self):
+        r = SDTRatings([5, 10, 20, 40], [40, 20, 10, 5])
+        self.assertEqual(r.levels, 4)
+        self.assertEqual(r.shape, ())
+        self.assertEqual(r.signal.dtype, np.int64)
+        self.assertEqual(repr(r),
+                         'SDTRatings(signal=[ 5, 10, 20, 40], '
+                         'noise=[40, 20, 10,  5])')
+
+    def test1(self):
+        with self.assertRaises(ValueError):
+            SDTRatings([1, 2, 3], [1, 2])
+        with self.assertRaises(ValueError):
+            SDTRatings([1], [1])
+
+    def test2(self):
+        """subjects"""
+        rng = np.random.RandomState(0)
+        r = SDTRatings(rng.randint(0, 9, (50, 6)), rng.randint(0, 9, (50, 6)))
+        self.assertEqual(len(r), 50)
+        self.assertEqual(r[3:7].shape, (4,))
+        self.assertEqual(r[3].shape, ())
+        self.assertEqual(r.pooled().signal.tolist(),
+                         r.signal.sum(axis=0).tolist())
+
+class TestSDTRatings_counts(unittest.TestCase):
+    def test0(self):
+        r = SDTRatings([5, 10, 20, 40], [40, 20, 10, 5])
+        self.assertEqual([v.tolist() for v in r.counts()],
+                         [[70, 60, 40], [5, 15, 35],
+                          [40, 60, 70], [35, 15, 5]])
+        self.assertEqual(list(r.sdt(1).items()),
+                         list(SDT(HI=60, MI=15, CR=60, FA=15).items()))
+
+        pFA, pHI = r.points()
+        self.assertEqual(pFA.tolist(), [35/75., 15/75., 5/75.])
+        self.assertEqual(pHI.tolist(), [70/75., 60/75., 40/75.])
+
+    def test1(self):
+        """batch holds every criterion of every subject"""
+        rng = np.random.RandomState(1)
+        r = SDTRatings(rng.randint(1, 9, (20, 5)), rng.randint(1, 9, (20, 5)))
+        b = r.batch()
+        self.assertTrue(isinstance(b, SDTBatch))
+        self.assertEqual(len(b), 80)
+        self.assertEqual(list(b[4*7+2].items()),
+                         list(r[7].sdt(2).items()))
+
+class TestSDTRatings_metrics(unittest.TestCase):
+    def test0(self):
+        rng = np.random.RandomState(2)
+        r = SDTRatings(rng.randint(1, 9, (30, 5)), rng.randint(1, 9, (30, 5)))
+        for name in ['dprime', 'aprime', 'mcc', 'beta']:
+            D = getattr(r, name)()
+            self.assertEqual(D.shape, (30, 4))
+            self.assertAlmostEqual(D[11, 3], getattr(r[11].sdt(3), name)(), 13)
+
+def suite():
+    return unittest.TestSuite((
+            unittest.makeSuite(TestSDTRatings__init__),
+            unittest.makeSuite(TestSDTRatings_counts),
+            unittest.makeSuite(TestSDTRatings_metrics),
+                              ))
+
+if __name__ == "__main__":
+
+    # run tests
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
@@ -0,0 +1,122 @@
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+This unittest tests the score based ROC functions.
+"""
+
+import unittest
+
+import numpy as np
+
+from sdt_metrics import SDT, SDTBatch, threshold_sweep, auc
+
+def _brute_sweep(scores, labels):
+    """one pass over the data per threshold"""
+    thresholds = sorted(set(scores), reverse=True)
+    sdts = []
+    for t in thresholds:
+        sdt = SDT(HI=0, MI=0, CR=0, FA=0)
+        for s, y in zip(scores, labels):
+            sdt[('MI', 'HI')[s >= t] if y else ('CR', 'FA')[s >= t]] += 1
+        sdts.append(sdt)
+    return thresholds, sdts
+
+class Test_threshold_sweep(unittest.TestCase):
+    def test0(self):
+        scores = [.9, .8, .8, .7, .6, .6, .6, .3, .1]
+        labels = [1, 1, 0, 1, 0, 1, 0, 0, 0]
+        T, B = threshold_sweep(scores, labels)
+        R_T, R = _brute_sweep(scores, labels)
+
+        self.assertTrue(isinstance(B, SDTBatch))
+        self.assertEqual(T.tolist(), R_T)
+        self.assertEqual([list(sdt.items()) for sdt in B],
+                         [list(sdt.items()) for sdt in R])
+
+    def test1(self):
+        """random scores with many ties"""
+        rng = np.random.RandomState(3)
+        scores = rng.randint(0, 20, 500) / 4.
+        labels = rng.rand(500) < .3
+        T, B = threshold_sweep(scores, labels)
+        R_T, R = _brute_sweep(scores.tolist(), labels.tolist())
+
+        self.assertEqual(T.tolist(), R_T)
+        self.assertEqual(B.data.T.tolist(),
+                         [[sdt[k] for k in B.keys()] for sdt in R])
+
+        # the last threshold says "yes" to everything
+        self.assertEqual(B[-1].p('HI'), 1.)
+        self.assertEqual(B[-1].p('FA'), 1.)
+        self.assertTrue(np.all(np.diff(B['HI']) >= 0))
+        self.assertTrue(np.all(np.diff(B['FA']) >= 0))
+        self.assertTrue(np.all(B.count() == 500))
+
+    def test2(self):
+        """metrics across the sweep"""
+        T, B = threshold_sweep([3, 1, 2, 0], [True, False, True, False])
+        self.assertEqual(B.accuracy().tolist(), [.75, 1., .75, .5])
+
+    def test3(self):
+        T, B = threshold_sweep([], [])
+        self.assertEqual(len(T), 0)
+        self.assertEqual(len(B), 0)
+
+    def test4(self):
+        with self.assertRaises(ValueError):
+            threshold_sweep([1, 2], [1])
+        with self.assertRaises(ValueError):
+            threshold_sweep([1, np.nan], [1, 0])
+
+def _brute_auc(scores, labels):
+    """compares every signal-noise pair"""
+    s = [v for v, y in zip(scores, labels) if y]
+    n = [v for v, y in zip(scores, labels) if not y]
+    return sum((a > b) + .5*(a == b) for a in s for b in n)/(len(s)*len(n))
+
+class Test_auc(unittest.TestCase):
+    def test0(self):
+        scores = [.9, .8, .8, .7, .6, .6, .6, .3, .1]
+        labels = [1, 1, 0, 1, 0, 1, 0, 0, 0]
+        self.assertAlmostEqual(auc(scores, labels),
+                               _brute_auc(scores, labels), 15)
+
+    def test1(self):
+        """several columns with ties"""
+        rng = np.random.RandomState(4)
+        labels = rng.rand(400) < .35
+        scores = np.round(rng.normal(labels[:, None]*np.arange(4), 1.,
+                                     (400, 4)), 1)
+        A = auc(scores, labels)
+        self.assertEqual(A.shape, (4,))
+        for j in range(4):
+            self.assertAlmostEqual(A[j], _brute_auc(scores[:, j].tolist(),
+                                                    labels.tolist()), 14)
+
+    def test2(self):
+        """trapezoidal area under the threshold sweep"""
+        rng = np.random.RandomState(5)
+        labels = rng.rand(1000) < .5
+        scores = rng.randint(0, 30, 1000) + labels*4
+        T, B = threshold_sweep(scores, labels)
+        pFA, pHI = np.r_[0., B.p('FA')], np.r_[0., B.p('HI')]
+        area = np.sum(np.diff(pFA)*(pHI[1:] + pHI[:-1])/2.)
+        self.assertAlmostEqual(auc(scores, labels), area, 14)
+
+    def test3(self):
+        with self.assertRaises(ZeroDivisionError):
+            auc([1, 2, 3], [1, 1, 1])
+        with self.assertRaises(ValueError):
+            auc([[1, 2], [3, 4]], [1, 0, 1])
+
+def suite():
+    return unittest.TestSuite((
+            unittest.makeSuite(Test_threshold_sweep),
+            unittest.makeSuite(Test_auc),
+                              ))
+
+if __name__ == "__main__":
+
+    # run tests
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
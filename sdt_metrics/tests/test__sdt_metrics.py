@@ -8,6 +8,9 @@ import sys
 import unittest
 import doctest
 import random
+import threading
+import subprocess
+import os
 
 from random import shuffle
 from string import digits,ascii_lowercase
@@ -388,6 +391,47 @@ class Test__vmethod_prob(unittest.TestCase):
         """test _prob binding"""
         self.assertEqual(hasattr(mutual_info,'prob'), False)
 
+class Test__vmethod_threads(unittest.TestCase):
+    def test0(self):
+        """concurrent direct and prob calls don't see each other's data"""
+        tables = [(random.randint(1,50), random.randint(1,50),
+                   random.randint(1,50), random.randint(1,50))
+                  for i in range(8)]
+        expected = [(sdt_metrics.dprime(*t), sdt_metrics.mcc(*t),
+                     sdt_metrics.c(t[0]/(t[0]+t[1]), t[3]/(t[2]+t[3])))
+                    for t in tables]
+        errors = []
+
+        def worker(t, r):
+            phi, pfa = t[0]/(t[0]+t[1]), t[3]/(t[2]+t[3])
+            for i in range(2000):
+                got = (sdt_metrics.dprime(*t), sdt_metrics.mcc(*t),
+                       sdt_metrics.c(phi, pfa))
+                if got != r:
+                    errors.append((t, got))
+                    return
+
+        threads = [threading.Thread(target=worker, args=(t, r))
+                   for t, r in zip(tables, expected)]
+        old_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for t in threads: t.start()
+            for t in threads: t.join()
+        finally:
+            sys.setswitchinterval(old_interval)
+
+        self.assertEqual(errors, [])
+
+    def test1(self):
+        """_vmethod doesn't touch the _S singleton"""
+        sdt = _S.getInstance().sdt
+        before = (dict(sdt), sdt._directmode, sdt.pHI, sdt.pFA)
+        sdt_metrics.dprime(20,5,15,10)
+        sdt_metrics.aprime(.8,.4)
+        self.assertEqual((dict(sdt), sdt._directmode, sdt.pHI, sdt.pFA),
+                         before)
+
 class TestSDT__vmethod__call__(unittest.TestCase):
     def test1(self):
         self.assertEqual(str(aprime.prob([12/15., 12/15.], [34/38., 4/8.])),
@@ -405,6 +449,48 @@ class TestSDT__vmethod__call__(unittest.TestCase):
         self.assertEqual(str(aprime.direct(12,3,4,34)),
                          str(aprime(12,3,4,34)))
 
+class Test_lazy_imports(unittest.TestCase):
+    # run in a fresh interpreter so modules imported by other tests
+    # don't count
+    code = '\n'.join([
+        'import sys',
+        'import sdt_metrics',
+        'print(" ".join(m for m in ["numpy", "scipy", "matplotlib", "pylab"]',
+        '               if m in sys.modules))',
+        'sdt_metrics.roc_plot',
+        'print("matplotlib" in sys.modules)'])
+
+    def test0(self):
+        """import sdt_metrics skips numpy and the plotting stack"""
+        root = os.path.dirname(os.path.dirname(sdt_metrics.__file__))
+        out = subprocess.check_output([sys.executable, '-c', self.code],
+                                      cwd=root).decode().splitlines()
+
+        # what keeps the import cheap is what it leaves out; wall clock
+        # time depends too much on the machine to assert
+        self.assertEqual(out[0].strip(), '')
+        self.assertEqual(out[1], 'True')
+
+    def test1(self):
+        self.assertTrue(sdt_metrics.roc_plot is
+                        sdt_metrics.plotting.roc_plot)
+        self.assertTrue('mult_roc_plot' in dir(sdt_metrics))
+
+        with self.assertRaises(AttributeError):
+            sdt_metrics.not_a_metric
+
+    def test2(self):
+        """star imports include the lazily imported names"""
+        namespace = {}
+        exec('from sdt_metrics import *', namespace)
+        for name in ['SDT', 'dprime', 'loglinear_c', 'ltqnorm', 'poc_plot',
+                     'roc_plot', 'mult_roc_plot', 'metric_validation_plot',
+                     'SDTBatch', 'SDTDecay', 'plotting']:
+            self.assertTrue(name in namespace, name)
+        self.assertTrue(namespace['roc_plot'] is
+                        sdt_metrics.plotting.roc_plot)
+        self.assertFalse('sys' in namespace)
+
 class Test_plotting_poc_curve(unittest.TestCase):
     def test1(self):
         """given an SDT object"""
@@ -472,6 +558,39 @@ class Test_plotting_mult_roc_curve(unittest.TestCase):
                                            metric='amzs',
                                            isopleths='bppd',
                                            fname = 'mult_roc_example02.png')
+
+    def test3(self):
+        """vectorized isopleth solver"""
+        import numpy as np
+        from sdt_metrics.plotting._mult_roc_plot import \
+             _metric_surface, _solve_isopleth
+
+        X = np.linspace(.001,.999,64)
+        for metric in ['aprime', 'amzs']:
+            func = getattr(sdt_metrics, metric)
+            val = func(.91, .40)
+            Y = _solve_isopleth(func, val, X, _metric_surface(func, X))
+            # (the isopleth leaves ROC space through the top edge)
+            self.assertTrue(np.sum(Y < .999) > 32)
+            for pHI,pFA in zip(Y, X):
+                if pHI < .999:
+                    self.assertAlmostEqual(func(pHI, pFA), val, 8)
+
+    def test4(self):
+        """isopleth lines are cached across figures"""
+        from sdt_metrics.plotting import _mult_roc_plot
+        if _mult_roc_plot.contourpy is None:
+            return
+
+        _mult_roc_plot._isopleth_cache.clear()
+        for fname in ['mult_roc_example03.png', 'mult_roc_example04.png']:
+            sdt_metrics.plotting.mult_roc_plot(((.91,.40), 'A'),
+                                               ((.76,.56), 'B'),
+                                               isopleths='beta',
+                                               fname=fname)
+        self.assertEqual(len(_mult_roc_plot._isopleth_cache), 1)
+        lines = list(_mult_roc_plot._isopleth_cache.values())[0]
+        self.assertEqual(len(lines), 15)
         
 def suite():
     return unittest.TestSuite((
@@ -506,6 +625,8 @@ def suite():
             unittest.makeSuite(Test__vmethod_direct),
             unittest.makeSuite(Test__vmethod_prob),
             unittest.makeSuite(Test__vmethod_prob),
+            unittest.makeSuite(Test__vmethod_threads),
+            unittest.makeSuite(Test_lazy_imports),
             unittest.makeSuite(Test_plotting_poc_curve),
             unittest.makeSuite(Test_plotting_roc_curve),
             unittest.makeSuite(Test_plotting_mult_roc_curve)
@@ -0,0 +1,102 @@
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+This unittest tests the mergeable score sketch.
+"""
+
+import unittest
+
+import numpy as np
+
+from sdt_metrics import SDT, ScoreSketch, auc
+
+def _data(n=20000, seed=0):
+    rng = np.random.RandomState(seed)
+    labels = rng.rand(n) < .3
+    scores = 1/(1 + np.exp(-rng.normal(labels*1.2, 1.)))
+    return scores, labels
+
+class TestScoreSketch_update(unittest.TestCase):
+    def test0(self):
+        sk = ScoreSketch(0., 1., bins=4)
+        sk.update([.1, .25, .6, .99, -3., 7.], [0, 1, 0, 1, 0, 1])
+        self.assertEqual(sk.counts.tolist(), [[2, 0, 1, 0], [0, 1, 0, 2]])
+        self.assertEqual(sk.count(), 6)
+
+    def test1(self):
+        with self.assertRaises(ValueError):
+            ScoreSketch(1., 0.)
+        with self.assertRaises(ValueError):
+            ScoreSketch().update([.1, np.nan], [0, 1])
+
+class TestScoreSketch_merge(unittest.TestCase):
+    def test0(self):
+        scores, labels = _data()
+        whole = ScoreSketch(bins=64)
+        whole.update(scores, labels)
+
+        parts = []
+        for i in range(0, len(scores), 3000):
+            parts.append(ScoreSketch(bins=64))
+            parts[-1].update(scores[i:i+3000], labels[i:i+3000])
+
+        self.assertEqual(ScoreSketch.merge(parts).counts.tolist(),
+                         whole.counts.tolist())
+        self.assertEqual((parts[0] + parts[1]).count(),
+                         parts[0].count() + parts[1].count())
+
+    def test1(self):
+        with self.assertRaises(ValueError):
+            ScoreSketch(bins=64) + ScoreSketch(bins=32)
+
+    def test2(self):
+        """bytes round trip"""
+        scores, labels = _data()
+        sk = ScoreSketch(-1., 2., bins=100)
+        sk.update(scores, labels)
+        data = sk.to_bytes()
+        self.assertEqual(len(data), 29 + 1600)
+
+        sk2 = ScoreSketch.from_bytes(data)
+        self.assertEqual((sk2.lo, sk2.hi, sk2.bins), (-1., 2., 100))
+        self.assertEqual(sk2.counts.tolist(), sk.counts.tolist())
+        with self.assertRaises(ValueError):
+            ScoreSketch.from_bytes(data[:-8])
+
+class TestScoreSketch_roc(unittest.TestCase):
+    def setUp(self):
+        self.scores, self.labels = _data()
+        self.sk = ScoreSketch(bins=128)
+        self.sk.update(self.scores, self.labels)
+
+    def test0(self):
+        """exact at bin edges"""
+        T, B = self.sk.threshold_sweep()
+        self.assertEqual(len(B), 128)
+        for i in [0, 17, 64, 127]:
+            yes = self.scores >= T[i]
+            R = SDT(HI=np.sum(yes & self.labels), MI=np.sum(~yes & self.labels),
+                    CR=np.sum(~yes & ~self.labels), FA=np.sum(yes & ~self.labels))
+            self.assertEqual(list(B[i].items()), list(R.items()))
+            self.assertEqual(list(self.sk.sdt(T[i]).items()), list(R.items()))
+
+    def test1(self):
+        """AUC bounds contain the exact AUC"""
+        lo, hi = self.sk.auc_bounds()
+        A = auc(self.scores, self.labels)
+        self.assertTrue(lo <= A <= hi)
+        self.assertTrue(lo <= self.sk.auc() <= hi)
+        self.assertTrue(hi - lo < .02)
+
+def suite():
+    return unittest.TestSuite((
+            unittest.makeSuite(TestScoreSketch_update),
+            unittest.makeSuite(TestScoreSketch_merge),
+            unittest.makeSuite(TestScoreSketch_roc),
+                              ))
+
+if __name__ == "__main__":
+
+    # run tests
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
@@ -0,0 +1,155 @@
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+This unittest tests the streaming accumulators.
+"""
+
+import copy
+import pickle
+import unittest
+
+import numpy as np
+
+from sdt_metrics import SDT, SDTAccumulator, compute, HI,MI,CR,FA
+
+def _reference(y_true, y_pred):
+    D = SDT()
+    for t, p in zip(y_true, y_pred):
+        D(((CR, FA), (MI, HI))[t][p])
+    return D
+
+class TestSDTAccumulator_update(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(1)
+        self.y_true = rng.rand(1000) < .3
+        self.y_pred = rng.rand(1000) < .4
+        self.R = _reference(self.y_true.tolist(), self.y_pred.tolist())
+
+    def test0(self):
+        """arrays"""
+        A = SDTAccumulator()
+        A.update(self.y_true[:600], self.y_pred[:600])
+        A.update(self.y_true[600:], self.y_pred[600:])
+        self.assertEqual(A.snapshot(), self.R)
+        self.assertEqual(A.count(), 1000)
+
+    def test1(self):
+        """generators"""
+        A = SDTAccumulator()
+        A.chunksize = 64
+        A.update((bool(t) for t in self.y_true),
+                 (bool(p) for p in self.y_pred))
+        self.assertEqual(A.snapshot(), self.R)
+
+    def test2(self):
+        """consume chunks"""
+        A = SDTAccumulator()
+        A.consume((self.y_true[i:i+100], self.y_pred[i:i+100])
+                  for i in range(0, 1000, 100))
+        self.assertEqual(A.snapshot(), self.R)
+
+    def test3(self):
+        """0/1 labels"""
+        A = SDTAccumulator()
+        A.update([1, 1, 0, 0], [1, 0, 0, 1])
+        self.assertEqual(repr(A), 'SDTAccumulator(HI=1, MI=1, CR=1, FA=1)')
+
+    def test4(self):
+        with self.assertRaises(ValueError):
+            SDTAccumulator().update([1, 1, 0], [1, 0])
+
+class TestSDTAccumulator_metrics(unittest.TestCase):
+    def test0(self):
+        A = SDTAccumulator()
+        A.update([1]*20 + [0]*25, [1]*16 + [0]*4 + [1]*10 + [0]*15)
+        D = SDT(HI=16, MI=4, FA=10, CR=15)
+        for name in ['dprime', 'mcc', 'f1', 'aprime']:
+            self.assertEqual(getattr(A, name)(), getattr(D, name)())
+
+        A.clear()
+        self.assertEqual(A.count(), 0)
+
+class TestSDTAccumulator_weights(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(2)
+        self.y_true = rng.rand(1000) < .3
+        self.y_pred = rng.rand(1000) < .4
+        self.w = rng.choice([.5, 1., 4.], 1000)
+
+    def test0(self):
+        """weighted counts and effective sample size"""
+        A = SDTAccumulator()
+        A.update(self.y_true[:300], self.y_pred[:300], self.w[:300])
+        A.update(self.y_true[300:], self.y_pred[300:], self.w[300:])
+        for k, t, p in [(HI, 1, 1), (MI, 1, 0), (CR, 0, 0), (FA, 0, 1)]:
+            mask = (self.y_true == t) & (self.y_pred == p)
+            self.assertAlmostEqual(A.snapshot()[k], self.w[mask].sum(), 10)
+        self.assertAlmostEqual(A.count(), self.w.sum(), 10)
+        self.assertAlmostEqual(A.neff, self.w.sum()**2/np.sum(self.w**2),
+                               10)
+        self.assertAlmostEqual(A.snapshot().neff, A.neff, 14)
+
+    def test1(self):
+        """generators, and unit weights match the unweighted counts"""
+        A, B = SDTAccumulator(), SDTAccumulator()
+        A.chunksize = 64
+        A.update(iter(self.y_true.tolist()), iter(self.y_pred.tolist()),
+                 iter([1.]*1000))
+        B.update(self.y_true, self.y_pred)
+        self.assertEqual(A.snapshot(), B.snapshot())
+        self.assertEqual(A.neff, 1000.)
+        self.assertEqual(A.dprime(), B.dprime())
+
+    def test2(self):
+        """standard correction uses the effective sample size"""
+        A = SDTAccumulator()
+        A.update([1, 1, 0, 0], [1, 1, 0, 1], [1., 9., 3., 1.])
+        sdt = SDT(HI=10., MI=0., CR=3., FA=1.)
+        self.assertNotEqual(A.dprime(), sdt.dprime())
+        sdt.neff = 14.**2/92.
+        self.assertEqual(A.dprime(), sdt.dprime())
+        self.assertEqual(A.c(), sdt.c())
+        self.assertEqual(A.loglinear_dprime(), sdt.loglinear_dprime())
+        self.assertEqual(sdt.copy().neff, sdt.neff)
+        result = compute(['dprime'], *A.counts, neff=A.neff)
+        self.assertEqual(float(result['dprime']), A.dprime())
+
+        A.clear()
+        self.assertEqual(repr(A), 'SDTAccumulator(HI=0, MI=0, CR=0, FA=0)')
+
+    def test3(self):
+        with self.assertRaises(ValueError):
+            SDTAccumulator().update([1, 1], [1, 0], [1.])
+
+    def test4(self):
+        """consume passes the weights of (y_true, y_pred, w) chunks"""
+        A, B = SDTAccumulator(), SDTAccumulator()
+        A.consume((self.y_true[i:i+100], self.y_pred[i:i+100], self.w[i:i+100])
+                  for i in range(0, 1000, 100))
+        B.update(self.y_true, self.y_pred, self.w)
+        self.assertEqual(A.counts.tolist(), B.counts.tolist())
+        self.assertAlmostEqual(A.neff, B.neff, 10)
+
+    def test5(self):
+        """pickling and deepcopy keep neff, the operators drop it"""
+        sdt = SDT(HI=10., MI=0., CR=3., FA=1.)
+        sdt.neff = 14.**2/92.
+        for other in [pickle.loads(pickle.dumps(sdt)), copy.deepcopy(sdt)]:
+            self.assertEqual(other, sdt)
+            self.assertEqual(other.neff, sdt.neff)
+            self.assertEqual(other.dprime(), sdt.dprime())
+        self.assertEqual((sdt + sdt).neff, None)
+        self.assertEqual(pickle.loads(pickle.dumps(SDT(HI=3))).neff, None)
+
+def suite():
+    return unittest.TestSuite((
+            unittest.makeSuite(TestSDTAccumulator_update),
+            unittest.makeSuite(TestSDTAccumulator_metrics),
+            unittest.makeSuite(TestSDTAccumulator_weights),
+                              ))
+
+if __name__ == "__main__":
+
+    # run tests
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
@@ -0,0 +1,117 @@
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+This unittest tests the cached metric lookup tables.
+"""
+
+import unittest
+
+import numpy as np
+
+import sdt_metrics
+from sdt_metrics import SDT, metric_table, metric_lookup, clear_table_cache
+from sdt_metrics import _tables
+
+class Test_metric_table(unittest.TestCase):
+    def setUp(self):
+        clear_table_cache()
+
+    def test0(self):
+        """cells match the SDT methods"""
+        P, N = 7, 5
+        for name in ['aprime', 'dprime', 'c', 'mcc', 'beta', 'mutual_info']:
+            T = metric_table(name, P, N)
+            self.assertEqual(T.shape, (P+1, N+1))
+            R = [[getattr(SDT(HI=h, MI=P-h, CR=N-f, FA=f), name)()
+                  for f in range(N+1)] for h in range(P+1)]
+            np.testing.assert_allclose(T, R, rtol=1e-14, atol=1e-15)
+
+    def test1(self):
+        """loglinear correction"""
+        T = metric_table(sdt_metrics.dprime, 6, 9, correction='loglinear')
+        self.assertAlmostEqual(
+            T[0, 9], SDT(HI=0, MI=6, CR=0, FA=9).loglinear_dprime(), 14)
+
+    def test2(self):
+        """tables are cached and read-only"""
+        T = metric_table('f1', 10, 10)
+        self.assertTrue(metric_table(sdt_metrics.f1, 10, 10) is T)
+        self.assertTrue(metric_table('f1', 10, 10, 'loglinear') is not T)
+        with self.assertRaises(ValueError):
+            T[0, 0] = 1.
+
+    def test3(self):
+        """least recently used tables are evicted"""
+        size = _tables.table_cache_size
+        try:
+            _tables.table_cache_size = 2
+            T = metric_table('mcc', 3, 3)
+            metric_table('mcc', 4, 4)
+            metric_table('mcc', 3, 3)
+            metric_table('mcc', 5, 5)
+            self.assertEqual(list(_tables._tables.keys()),
+                             [('mcc', 3, 3, 'standard'),
+                              ('mcc', 5, 5, 'standard')])
+            self.assertTrue(metric_table('mcc', 3, 3) is T)
+        finally:
+            _tables.table_cache_size = size
+
+    def test4(self):
+        with self.assertRaises(ValueError):
+            metric_table('SDT', 3, 3)
+        with self.assertRaises(ValueError):
+            metric_table('mcc', 0, 3)
+        with self.assertRaises(ValueError):
+            metric_table('mcc', 3, 3, correction='bogus')
+
+class Test_metric_lookup(unittest.TestCase):
+    def test0(self):
+        self.assertEqual(metric_lookup('accuracy', 20, 5, 15, 10),
+                         SDT(HI=20, MI=5, CR=15, FA=10).accuracy())
+
+    def test1(self):
+        """mixed designs"""
+        rng = np.random.RandomState(0)
+        H, M, C, F = rng.randint(1, 8, (4, 200))
+        np.testing.assert_allclose(metric_lookup('dprime', H, M, C, F),
+                                   sdt_metrics.dprime(H, M, C, F),
+                                   rtol=1e-14)
+
+    def test2(self):
+        with self.assertRaises(ValueError):
+            metric_lookup('dprime', -1, 3, 3, 3)
+
+    def test3(self):
+        """repeated designs are grouped, the shape is kept"""
+        rng = np.random.RandomState(1)
+        H = rng.randint(0, 11, (50, 40))
+        F = rng.randint(0, 9, (50, 40))
+        D = rng.randint(0, 3, (50, 40))
+        M, C = 10 - H + D, 8 - F + D
+        for correction, metric in [('standard', sdt_metrics.dprime),
+                                   ('loglinear', sdt_metrics.loglinear_dprime)]:
+            result = metric_lookup('dprime', H, M, C, F, correction)
+            self.assertEqual(result.shape, (50, 40))
+            np.testing.assert_allclose(result, metric(H, M, C, F), rtol=1e-14)
+
+    def test4(self):
+        """designs that don't repeat fall back to the kernels"""
+        rng = np.random.RandomState(2)
+        H, M, C, F = rng.randint(1, 60, (4, 500))
+        clear_table_cache()
+        result = metric_lookup('c', H, M, C, F, 'loglinear')
+        np.testing.assert_allclose(result, sdt_metrics.loglinear_c(H, M, C, F),
+                                   rtol=1e-14)
+        self.assertEqual(len(sdt_metrics._tables._tables), 0)
+
+def suite():
+    return unittest.TestSuite((
+            unittest.makeSuite(Test_metric_table),
+            unittest.makeSuite(Test_metric_lookup),
+                              ))
+
+if __name__ == "__main__":
+
+    # run tests
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
@@ -0,0 +1,96 @@
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+This unittest tests the unequal variance Gaussian model fit.
+"""
+
+import unittest
+
+import numpy as np
+
+from sdt_metrics import SDTRatings, fit_uvsd, UVSDFit
+from sdt_metrics import _uvsd
+
+def _simulate(rng, mu, sigma, criteria, n):
+    """rating counts of n signal and n noise trials per subject"""
+    S, K = len(mu), len(criteria) + 1
+    xn = rng.normal(0., 1., (S, n))
+    xs = rng.normal(mu[:, None], sigma[:, None], (S, n))
+    rn = (xn[..., None] > criteria).sum(axis=-1)
+    rs = (xs[..., None] > criteria).sum(axis=-1)
+    return SDTRatings([np.bincount(r, minlength=K) for r in rs],
+                      [np.bincount(r, minlength=K) for r in rn])
+
+class Test_fit_uvsd(unittest.TestCase):
+    def test0(self):
+        """recovers the generating parameters"""
+        rng = np.random.RandomState(0)
+        mu, sigma = np.array([1.5]*20), np.array([1.25]*20)
+        criteria = np.array([-.5, 0., .5, 1., 1.5])
+        fit = fit_uvsd(_simulate(rng, mu, sigma, criteria, 5000))
+
+        self.assertTrue(isinstance(fit, UVSDFit))
+        self.assertTrue(np.all(fit.converged))
+        self.assertEqual(fit.criteria.shape, (20, 5))
+        self.assertAlmostEqual(np.mean(fit.mu), 1.5, 1)
+        self.assertAlmostEqual(np.mean(fit.sigma), 1.25, 1)
+        self.assertAlmostEqual(np.mean(fit.slope), .8, 1)
+        np.testing.assert_allclose(fit.criteria.mean(axis=0), criteria,
+                                   atol=.05)
+
+    def test1(self):
+        """the estimate is a maximum of the likelihood"""
+        r = SDTRatings([3, 5, 9, 14, 19], [16, 12, 10, 7, 5])
+        fit = fit_uvsd(r)
+        self.assertTrue(fit.converged)
+        self.assertTrue(fit.grad < 1e-6)
+
+        theta = np.r_[fit.mu, np.log(fit.sigma), fit.criteria][None, :]
+        signal, noise = r.signal[None, :], r.noise[None, :]
+        ll = _uvsd._loglik(signal, noise, *_uvsd._cells(theta)[:2])[0]
+        self.assertAlmostEqual(ll, fit.loglik, 10)
+        rng = np.random.RandomState(1)
+        for i in range(20):
+            t = theta + rng.normal(0., 1e-3, theta.shape)
+            self.assertTrue(
+                _uvsd._loglik(signal, noise, *_uvsd._cells(t)[:2])[0] < ll)
+
+    def test2(self):
+        """summary measures"""
+        fit = fit_uvsd(SDTRatings([1, 2, 3, 10], [10, 3, 2, 1]))
+        self.assertAlmostEqual(fit.da, fit.mu*np.sqrt(2/(1 + fit.sigma**2)))
+        self.assertAlmostEqual(fit.intercept, fit.mu/fit.sigma)
+        self.assertTrue(.5 < fit.az < 1.)
+        self.assertEqual(fit.cov.shape, (5, 5))
+
+    def test3(self):
+        """separated counts are reported as not converged"""
+        fit = fit_uvsd(SDTRatings([[0, 0, 0, 10], [1, 2, 3, 10]],
+                                  [[10, 0, 0, 0], [10, 3, 2, 1]]))
+        self.assertEqual(fit.converged.tolist(), [False, True])
+
+    def test4(self):
+        with self.assertRaises(ValueError):
+            fit_uvsd(SDTRatings([1, 2], [2, 1]))
+        with self.assertRaises(TypeError):
+            fit_uvsd([[1, 2, 3], [3, 2, 1]])
+
+    def test5(self):
+        """halved steps on separated counts are not convergence"""
+        for signal, noise in [([[0, 0, 20, 20]], [[20, 20, 0, 0]]),
+                              ([[0, 0, 5, 5]], [[5, 5, 0, 0]]),
+                              ([[0, 3, 10]], [[10, 3, 0]])]:
+            with np.errstate(over='ignore'):
+                fit = fit_uvsd(SDTRatings(signal, noise))
+            self.assertEqual(fit.converged.tolist(), [False])
+
+def suite():
+    return unittest.TestSuite((
+            unittest.makeSuite(Test_fit_uvsd),
+                              ))
+
+if __name__ == "__main__":
+
+    # run tests
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
@@ -0,0 +1,99 @@
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+This unittest tests the sliding window SDTWindow.
+"""
+
+import unittest
+
+import numpy as np
+
+from sdt_metrics import SDT, SDTBatch, SDTWindow
+
+def _brute_window(events, head, width, key=None):
+    """recounts the events in (head - width, head]"""
+    sdt = SDT(HI=0, MI=0, CR=0, FA=0)
+    for t, k, y, p in events:
+        if head - width < t <= head and (key is None or k == key):
+            sdt[('CR', 'FA', 'MI', 'HI')[2*y + p]] += 1
+    return sdt
+
+class Test_SDTWindow(unittest.TestCase):
+    def test0(self):
+        """slides over a stream of one second buckets"""
+        rng = np.random.RandomState(0)
+        W, events = SDTWindow(10), []
+        for t in range(100, 160):
+            n = rng.randint(0, 20)
+            y = rng.rand(n) < .5
+            p = rng.rand(n) < .3 + .4*y
+            W.update(y, p, t)
+            events.extend((t, None, a, b) for a, b in zip(y.tolist(),
+                                                          p.tolist()))
+            self.assertEqual(list(W.snapshot().items()),
+                             list(_brute_window(events, t, 10).items()))
+        self.assertEqual(W.head, 159)
+
+    def test1(self):
+        """gaps, late events, and expired events"""
+        W = SDTWindow(5)
+        W.update([1, 1, 0], [1, 0, 0], 10)
+        W.update([0], [1], 12)
+        W.update([1], [1], 11)                 # late but in the window
+        self.assertEqual(W.snapshot()['HI'], 2)
+        W.update([1, 0], [1, 1], [3, 14])      # 3 expired
+        self.assertEqual(W.dropped, 1)
+        self.assertEqual(W.count(), 6)
+        W.advance(16)                          # retires 10 and 11
+        self.assertEqual(list(W.snapshot().items()),
+                         [('HI', 0), ('MI', 0), ('CR', 0), ('FA', 2)])
+        W.advance(100)
+        self.assertEqual(W.count(), 0)
+        W.add_counts((4, 3, 2, 1), 100)
+        self.assertAlmostEqual(W.dprime(),
+                               SDT(HI=4, MI=3, CR=2, FA=1).dprime())
+
+    def test2(self):
+        """keyed windows"""
+        rng = np.random.RandomState(1)
+        W, events = SDTWindow(7, keys=4), []
+        for t in range(30):
+            n = rng.randint(0, 40)
+            k = rng.randint(0, 4, n)
+            y = rng.rand(n) < .5
+            p = rng.rand(n) < .5
+            W.update(y, p, t, key=k)
+            events.extend(zip([t]*n, k.tolist(), y.tolist(), p.tolist()))
+
+        B = W.snapshot()
+        self.assertTrue(isinstance(B, SDTBatch))
+        for k in range(4):
+            self.assertEqual(list(B[k].items()),
+                             list(_brute_window(events, 29, 7, k).items()))
+        self.assertEqual(W.accuracy().tolist(), B.accuracy().tolist())
+        self.assertEqual(W.count().tolist(), B.count().tolist())
+
+        W.add_counts(np.ones((4, 4), dtype=int), 29)
+        self.assertEqual(W.count().tolist(), (B.count() + 4).tolist())
+
+    def test3(self):
+        W = SDTWindow(3)
+        with self.assertRaises(ValueError):
+            W.update([1], [1], 0, key=0)
+        with self.assertRaises(ValueError):
+            SDTWindow(3, keys=2).update([1], [1], 0)
+        with self.assertRaises(ValueError):
+            SDTWindow(3, keys=2).update([1], [1], 0, key=2)
+        with self.assertRaises(ValueError):
+            SDTWindow(0)
+
+def suite():
+    return unittest.TestSuite((
+            unittest.makeSuite(Test_SDTWindow),
+                              ))
+
+if __name__ == "__main__":
+
+    # run tests
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
@@ -0,0 +1,117 @@
+# Copyright (c) 2012, Roger Lew [see LICENSE.txt]
+
+"""
+This unittest tests the memoized z-score tables.
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+
+import numpy as np
+
+from sdt_metrics import _kernels, _ztable
+
+_metrics = ['dprime', 'beta', 'c', 'loglinear_dprime', 'loglinear_beta',
+            'loglinear_c', 'dprime_var']
+
+class Test_ztable(unittest.TestCase):
+    def setUp(self):
+        self.enabled = _ztable.enabled
+        self.cache_size = _ztable.ztable_cache_size
+        _ztable.clear_ztable_cache()
+
+        # includes rates of 0 and 1
+        rng = np.random.RandomState(0)
+        self.counts = rng.randint(1, 60, (4, 5000))
+        self.counts[0, :100] = 0
+        self.counts[2, 100:200] = 0
+
+    def tearDown(self):
+        _ztable.enabled = self.enabled
+        _ztable.ztable_cache_size = self.cache_size
+        _ztable.clear_ztable_cache()
+
+    def _compare(self):
+        _ztable.enabled = False
+        R = [_kernels.direct(m, *self.counts) for m in _metrics]
+        _ztable.enabled = True
+        D = [_kernels.direct(m, *self.counts) for m in _metrics]
+        for r, d in zip(R, D):
+            self.assertEqual(d.tolist(), r.tolist())
+
+    def test0(self):
+        """bit-identical to ltqnorm"""
+        self._compare()
+        self.assertEqual(sorted(_ztable._ztables), ['loglinear', 'standard'])
+        self._compare()
+
+    def test1(self):
+        """rates beyond the budget are evaluated directly"""
+        _ztable.ztable_cache_size = _ztable._size(40)
+        self._compare()
+        for table, nmax in _ztable._ztables.values():
+            self.assertTrue(nmax <= 40)
+
+    def test2(self):
+        """least recently used table is evicted"""
+        _ztable.ztable_cache_size = _ztable._size(127) + 10
+        _ztable.lookup([3], [90], 'standard', 200)
+        _ztable.lookup([3], [90], 'loglinear')
+        self.assertEqual(list(_ztable._ztables), ['loglinear'])
+        _ztable.lookup([3], [90], 'standard', 200)
+        self.assertEqual(list(_ztable._ztables), ['standard'])
+
+    def test3(self):
+        """invalid counts fall back (and raise) the usual way"""
+        _ztable.enabled = True
+        self.assertEqual(_ztable.lookup([1.], [2.]), None)
+        self.assertEqual(_ztable.lookup([3], [2]), None)
+        with self.assertRaises(ZeroDivisionError):
+            _kernels.direct('dprime', [0, 1], [0, 1], 2, 3)
+        self.assertAlmostEqual(_kernels.direct('dprime', 3, 4, 5, 6),
+                               _kernels.direct('dprime', 3., 4, 5, 6), 15)
+
+    def test4(self):
+        for nmax in [0, 1, 5, 63, 1000]:
+            self.assertEqual(_ztable._largest_nmax(_ztable._size(nmax)),
+                             nmax)
+            self.assertEqual(_ztable._largest_nmax(_ztable._size(nmax+1)-1),
+                             nmax)
+
+class Test_set_ztable(unittest.TestCase):
+    def test0(self):
+        """the public toggle works after a plain import sdt_metrics"""
+        script = '\n'.join([
+            'import sdt_metrics',
+            'from sdt_metrics import _ztable',
+            'off = sdt_metrics.dprime([3, 0, 7], [4, 5, 1], [6, 2, 8], [2, 4, 0])',
+            'sdt_metrics.set_ztable(True, 1 << 16)',
+            'on = sdt_metrics.dprime([3, 0, 7], [4, 5, 1], [6, 2, 8], [2, 4, 0])',
+            'print(_ztable.enabled, _ztable.ztable_cache_size, on == off)',
+            'print(list(_ztable._ztables))',
+            'sdt_metrics.clear_ztable_cache()',
+            'sdt_metrics.set_ztable(False)',
+            'print(_ztable.enabled, list(_ztable._ztables))'])
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+                   os.path.abspath(__file__))))
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(
+            [root] + [p for p in [env.get('PYTHONPATH')] if p])
+        out = subprocess.check_output([sys.executable, '-c', script],
+                                      env=env).decode().splitlines()
+        self.assertEqual(out, ['True 65536 True', "['standard']",
+                               'False []'])
+
+def suite():
+    return unittest.TestSuite((
+            unittest.makeSuite(Test_ztable),
+            unittest.makeSuite(Test_set_ztable),
+                              ))
+
+if __name__ == "__main__":
+
+    # run tests
+    runner = unittest.TextTestRunner()
+    runner.run(suite())